@@ -10,6 +10,8 @@ from src.common.db.connection import Connection as DBConnection
 from src.config.settings import DB_URL
 from src.models.note import Note
 from src.models.history import History
+from src.models.history_blob import HistoryBlob
+from src.models.history_event import HistoryEvent
 from src.models.issue import Issue
 from src.models.user import User
 from src.models.tag import Tag
@@ -0,0 +1,36 @@
+"""add content_hash and rendered_html to notes
+
+Revision ID: 0b7e4f2c9a11
+Revises: 59e08f095c0e
+Create Date: 2026-10-17 20:41:05.118203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7e4f2c9a11"
+down_revision: Union[str, Sequence[str], None] = "59e08f095c0e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("Notes", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.add_column("Notes", sa.Column("rendered_html", sa.Text(), nullable=True))
+    # the hash can be computed in the database, the HTML is rendered by `python -m src.commands.backfill_notes`
+    op.execute(
+        """UPDATE "Notes" SET content_hash = """
+        """encode(sha256(convert_to(coalesce(content, ''), 'UTF8')), 'hex')"""
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("Notes", "rendered_html")
+    op.drop_column("Notes", "content_hash")
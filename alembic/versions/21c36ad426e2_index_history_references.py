@@ -0,0 +1,34 @@
+"""index the references to history versions and blobs
+
+Revision ID: 21c36ad426e2
+Revises: b11bca030647
+Create Date: 2026-10-18 16:32:48.095127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "21c36ad426e2"
+down_revision: Union[str, Sequence[str], None] = "b11bca030647"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # deleting versions and blobs checks the rows that reference them, `python -m src.commands.compact_history`
+    op.create_index("ix_History_content_hash", "History", ["content_hash"])
+    op.create_index("ix_HistoryBlobs_base_hash", "HistoryBlobs", ["base_hash"])
+    op.create_index("ix_Issues_version_id", "Issues", ["version_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_Issues_version_id", table_name="Issues")
+    op.drop_index("ix_HistoryBlobs_base_hash", table_name="HistoryBlobs")
+    op.drop_index("ix_History_content_hash", table_name="History")
@@ -0,0 +1,244 @@
+"""move history contents to content addressed blobs
+
+Revision ID: 5117ee4069a0
+Revises: f0455048ce11
+Create Date: 2026-10-18 11:47:03.611842
+
+"""
+
+import hashlib
+import json
+import os
+from difflib import SequenceMatcher
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5117ee4069a0"
+down_revision: Union[str, Sequence[str], None] = "f0455048ce11"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+history = sa.table(
+    "History",
+    sa.column("id", sa.Integer),
+    sa.column("note_id", sa.Integer),
+    sa.column("note_content", sa.Text),
+    sa.column("content_delta", sa.Text),
+    sa.column("base_version_id", sa.Integer),
+    sa.column("content_hash", sa.String),
+)
+blobs = sa.table(
+    "HistoryBlobs",
+    sa.column("hash", sa.String),
+    sa.column("size", sa.Integer),
+    sa.column("content", sa.Text),
+    sa.column("delta", sa.Text),
+    sa.column("base_hash", sa.String),
+)
+
+
+# the helpers are copied from src.common.utils as they were when this migration was written, so later changes to the
+# application don't change what this migration does
+SNAPSHOT_INTERVAL = int(os.getenv("HISTORY_SNAPSHOT_INTERVAL", 20))
+
+
+def split_lines(text: str) -> list[str]:
+    return text.splitlines(keepends=True)
+
+
+def make_delta(base: str, text: str, max_ratio: float = 0.5) -> str | None:
+    base_lines = split_lines(base)
+    lines = split_lines(text)
+    operations: list[list[int] | str] = []
+    matcher = SequenceMatcher(None, base_lines, lines)
+    for tag, base_start, base_end, start, end in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([base_start, base_end])
+        elif tag in ("replace", "insert"):
+            operations.append("".join(lines[start:end]))
+
+    delta = json.dumps(operations, separators=(",", ":"), ensure_ascii=False)
+    if len(delta) > max_ratio * len(text):
+        return None
+    return delta
+
+
+def apply_delta(base: str, delta: str) -> str:
+    base_lines = split_lines(base)
+    parts = []
+    for operation in json.loads(delta):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            parts.extend(base_lines[operation[0] : operation[1]])
+    return "".join(parts)
+
+
+def generate_etag(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def note_ids(connection: sa.Connection) -> list[int]:
+    return connection.execute(sa.select(history.c.note_id).distinct()).scalars().all()
+
+
+def blob_content(connection: sa.Connection, content_hash: str, contents: dict) -> str:
+    deltas = []
+    while content_hash not in contents:
+        blob = connection.execute(
+            sa.select(
+                blobs.c.hash, blobs.c.content, blobs.c.delta, blobs.c.base_hash
+            ).where(blobs.c.hash == content_hash)
+        ).one()
+        if blob.content is not None:
+            contents[blob.hash] = blob.content
+            break
+        deltas.append(blob)
+        content_hash = blob.base_hash
+
+    content = contents[content_hash]
+    for blob in reversed(deltas):
+        content = apply_delta(content, blob.delta)
+        contents[blob.hash] = content
+    return content
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "HistoryBlobs",
+        sa.Column("hash", sa.String(64), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("delta", sa.Text(), nullable=True),
+        sa.Column(
+            "base_hash",
+            sa.String(64),
+            sa.ForeignKey("HistoryBlobs.hash"),
+            nullable=True,
+        ),
+    )
+    op.add_column("History", sa.Column("content_hash", sa.String(64), nullable=True))
+
+    # the versions of each note are rebuilt and their distinct contents stored as blobs, the same way new versions are
+    connection = op.get_bind()
+    for note_id in note_ids(connection):
+        versions = connection.execute(
+            sa.select(
+                history.c.id,
+                history.c.note_content,
+                history.c.content_delta,
+                history.c.base_version_id,
+            )
+            .where(history.c.note_id == note_id)
+            .order_by(history.c.id)
+        ).all()
+        contents, hashes = {}, {}
+        for version in versions:
+            if version.note_content is not None:
+                contents[version.id] = version.note_content
+            else:
+                contents[version.id] = apply_delta(
+                    contents[version.base_version_id], version.content_delta
+                )
+            hashes[version.id] = generate_etag(contents[version.id])
+
+        stored = set(
+            connection.execute(
+                sa.select(blobs.c.hash).where(blobs.c.hash.in_(set(hashes.values())))
+            ).scalars()
+        )
+        new_blobs, depths = [], {}
+        previous_hash = previous_content = None
+        for version in versions:
+            content, content_hash = contents[version.id], hashes[version.id]
+            if content_hash not in stored:
+                blob = {
+                    "hash": content_hash,
+                    "size": len(content),
+                    "content": content,
+                    "delta": None,
+                    "base_hash": None,
+                }
+                depths[content_hash] = 0
+                # the depth of the blobs of other notes isn't known, the blob is stored in full
+                depth = depths.get(previous_hash, SNAPSHOT_INTERVAL)
+                if depth + 1 < SNAPSHOT_INTERVAL:
+                    delta = make_delta(previous_content, content)
+                    if delta is not None:
+                        blob.update(content=None, delta=delta, base_hash=previous_hash)
+                        depths[content_hash] = depth + 1
+                stored.add(content_hash)
+                new_blobs.append(blob)
+            previous_hash, previous_content = content_hash, content
+
+        if new_blobs:
+            connection.execute(blobs.insert(), new_blobs)
+        connection.execute(
+            history.update()
+            .where(history.c.id == sa.bindparam("version_id"))
+            .values(content_hash=sa.bindparam("hash")),
+            [
+                {"version_id": version_id, "hash": content_hash}
+                for version_id, content_hash in hashes.items()
+            ],
+        )
+
+    op.alter_column(
+        "History", "content_hash", existing_type=sa.String(64), nullable=False
+    )
+    op.create_foreign_key(
+        "History_content_hash_fkey",
+        "History",
+        "HistoryBlobs",
+        ["content_hash"],
+        ["hash"],
+    )
+    op.drop_constraint("History_base_version_id_fkey", "History", type_="foreignkey")
+    op.drop_column("History", "base_version_id")
+    op.drop_column("History", "content_delta")
+    op.drop_column("History", "note_content")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("History", sa.Column("note_content", sa.Text(), nullable=True))
+    op.add_column("History", sa.Column("content_delta", sa.Text(), nullable=True))
+    op.add_column("History", sa.Column("base_version_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "History_base_version_id_fkey",
+        "History",
+        "History",
+        ["base_version_id"],
+        ["id"],
+    )
+
+    # the versions are stored in full again
+    connection = op.get_bind()
+    for note_id in note_ids(connection):
+        versions = connection.execute(
+            sa.select(history.c.id, history.c.content_hash).where(
+                history.c.note_id == note_id
+            )
+        ).all()
+        contents = {}
+        connection.execute(
+            history.update()
+            .where(history.c.id == sa.bindparam("version_id"))
+            .values(note_content=sa.bindparam("content")),
+            [
+                {
+                    "version_id": version.id,
+                    "content": blob_content(connection, version.content_hash, contents),
+                }
+                for version in versions
+            ],
+        )
+
+    op.drop_constraint("History_content_hash_fkey", "History", type_="foreignkey")
+    op.drop_column("History", "content_hash")
+    op.drop_table("HistoryBlobs")
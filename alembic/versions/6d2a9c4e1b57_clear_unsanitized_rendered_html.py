@@ -0,0 +1,30 @@
+"""clear unsanitized rendered html
+
+Revision ID: 6d2a9c4e1b57
+Revises: 0b7e4f2c9a11
+Create Date: 2026-10-17 22:02:41.530118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6d2a9c4e1b57"
+down_revision: Union[str, Sequence[str], None] = "0b7e4f2c9a11"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the stored HTML wasn't sanitized, it is rendered again on read or by `python -m src.commands.backfill_notes`
+    op.execute('UPDATE "Notes" SET rendered_html = NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
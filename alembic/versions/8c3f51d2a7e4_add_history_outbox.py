@@ -0,0 +1,52 @@
+"""add the history outbox
+
+Revision ID: 8c3f51d2a7e4
+Revises: 21c36ad426e2
+Create Date: 2026-10-18 18:05:26.417390
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c3f51d2a7e4"
+down_revision: Union[str, Sequence[str], None] = "21c36ad426e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "HistoryOutbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "note_id",
+            sa.Integer(),
+            sa.ForeignKey("Notes.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("note_title", sa.String(), nullable=False),
+        sa.Column(
+            "content_hash",
+            sa.String(64),
+            sa.ForeignKey("HistoryBlobs.hash"),
+            nullable=False,
+        ),
+        sa.Column("rev_description", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the versions still in the outbox are moved to History first
+    op.execute(
+        'INSERT INTO "History" (note_id, note_title, content_hash, rev_description, created_at) '
+        'SELECT note_id, note_title, content_hash, rev_description, created_at FROM "HistoryOutbox" ORDER BY id'
+    )
+    op.drop_table("HistoryOutbox")
@@ -0,0 +1,29 @@
+"""index history by note and id
+
+Revision ID: b11bca030647
+Revises: 5117ee4069a0
+Create Date: 2026-10-18 14:05:22.871390
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b11bca030647"
+down_revision: Union[str, Sequence[str], None] = "5117ee4069a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_History_note_id_id", "History", ["note_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_History_note_id_id", table_name="History")
@@ -0,0 +1,157 @@
+"""store history versions as deltas
+
+Revision ID: f0455048ce11
+Revises: 6d2a9c4e1b57
+Create Date: 2026-10-18 09:12:37.204511
+
+"""
+
+import json
+import os
+from difflib import SequenceMatcher
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f0455048ce11"
+down_revision: Union[str, Sequence[str], None] = "6d2a9c4e1b57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+history = sa.table(
+    "History",
+    sa.column("id", sa.Integer),
+    sa.column("note_id", sa.Integer),
+    sa.column("note_content", sa.Text),
+    sa.column("content_delta", sa.Text),
+    sa.column("base_version_id", sa.Integer),
+)
+
+
+# the helpers are copied from src.common.utils as they were when this migration was written, so later changes to the
+# application don't change what this migration does
+SNAPSHOT_INTERVAL = int(os.getenv("HISTORY_SNAPSHOT_INTERVAL", 20))
+
+
+def split_lines(text: str) -> list[str]:
+    return text.splitlines(keepends=True)
+
+
+def make_delta(base: str, text: str, max_ratio: float = 0.5) -> str | None:
+    base_lines = split_lines(base)
+    lines = split_lines(text)
+    operations: list[list[int] | str] = []
+    matcher = SequenceMatcher(None, base_lines, lines)
+    for tag, base_start, base_end, start, end in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([base_start, base_end])
+        elif tag in ("replace", "insert"):
+            operations.append("".join(lines[start:end]))
+
+    delta = json.dumps(operations, separators=(",", ":"), ensure_ascii=False)
+    if len(delta) > max_ratio * len(text):
+        return None
+    return delta
+
+
+def apply_delta(base: str, delta: str) -> str:
+    base_lines = split_lines(base)
+    parts = []
+    for operation in json.loads(delta):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            parts.extend(base_lines[operation[0] : operation[1]])
+    return "".join(parts)
+
+
+def note_ids(connection: sa.Connection) -> list[int]:
+    return connection.execute(sa.select(history.c.note_id).distinct()).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("History", sa.Column("content_delta", sa.Text(), nullable=True))
+    op.add_column("History", sa.Column("base_version_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "History_base_version_id_fkey",
+        "History",
+        "History",
+        ["base_version_id"],
+        ["id"],
+    )
+    op.alter_column("History", "note_content", existing_type=sa.Text(), nullable=True)
+
+    # the existing versions of each note are stored again as deltas, the same way new versions are
+    connection = op.get_bind()
+    for note_id in note_ids(connection):
+        versions = connection.execute(
+            sa.select(history.c.id, history.c.note_content)
+            .where(history.c.note_id == note_id)
+            .order_by(history.c.id)
+        ).all()
+        updates = []
+        depth = 0
+        for previous, version in zip(versions, versions[1:]):
+            delta = None
+            if depth + 1 < SNAPSHOT_INTERVAL:
+                delta = make_delta(previous.note_content, version.note_content)
+            if delta is None:
+                depth = 0
+                continue
+            depth += 1
+            updates.append(
+                {"version_id": version.id, "delta": delta, "base_id": previous.id}
+            )
+        if updates:
+            connection.execute(
+                history.update()
+                .where(history.c.id == sa.bindparam("version_id"))
+                .values(
+                    note_content=None,
+                    content_delta=sa.bindparam("delta"),
+                    base_version_id=sa.bindparam("base_id"),
+                ),
+                updates,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    connection = op.get_bind()
+    for note_id in note_ids(connection):
+        versions = connection.execute(
+            sa.select(
+                history.c.id,
+                history.c.note_content,
+                history.c.content_delta,
+                history.c.base_version_id,
+            )
+            .where(history.c.note_id == note_id)
+            .order_by(history.c.id)
+        ).all()
+        contents = {}
+        updates = []
+        for version in versions:
+            if version.note_content is not None:
+                contents[version.id] = version.note_content
+                continue
+            contents[version.id] = apply_delta(
+                contents[version.base_version_id], version.content_delta
+            )
+            updates.append({"version_id": version.id, "content": contents[version.id]})
+        if updates:
+            connection.execute(
+                history.update()
+                .where(history.c.id == sa.bindparam("version_id"))
+                .values(note_content=sa.bindparam("content")),
+                updates,
+            )
+
+    op.alter_column("History", "note_content", existing_type=sa.Text(), nullable=False)
+    op.drop_constraint("History_base_version_id_fkey", "History", type_="foreignkey")
+    op.drop_column("History", "base_version_id")
+    op.drop_column("History", "content_delta")
@@ -0,0 +1,64 @@
+"""
+This module generates the notes the benchmarks render, with the constructs notes usually have: headings, paragraphs
+with inline markup and links, lists, quotes, tables and code blocks.
+"""
+
+import random
+
+WORDS = (
+    "note project markdown render cache block folder tag history version the of and to in is for with"
+).split()
+
+
+def make_note(size: int, seed: int = 0) -> list[str]:
+    """
+    This method generates the blocks of a note of about size characters.
+
+    :param size: The length of the note in characters.
+    :param seed: The seed of the random generator.
+    :return: The blocks of the note.
+    """
+    rng = random.Random(seed)
+
+    def sentence() -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        words[rng.randrange(len(words))] = f"*{rng.choice(WORDS)}*"
+        words[rng.randrange(len(words))] = f"`{rng.choice(WORDS)}`"
+        if rng.random() < 0.2:
+            words[rng.randrange(len(words))] = (
+                f"[{rng.choice(WORDS)}](https://example.com)"
+            )
+        return " ".join(words).capitalize() + "."
+
+    blocks, length = [], 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.1:
+            block = f"## {sentence()}"
+        elif kind < 0.25:
+            block = "\n".join(f"- {sentence()}" for _ in range(rng.randint(2, 6)))
+        elif kind < 0.3:
+            block = f"> {sentence()}"
+        elif kind < 0.35:
+            lines = [f"line_{i} = {i * 2}" for i in range(rng.randint(2, 8))]
+            block = "\n".join(["```python", *lines, "```"])
+        elif kind < 0.38:
+            rows = [f"| {rng.choice(WORDS)} | {i} |" for i in range(rng.randint(2, 6))]
+            block = "\n".join(["| name | count |", "|---|---|", *rows])
+        else:
+            block = " ".join(sentence() for _ in range(rng.randint(2, 6)))
+        blocks.append(block)
+        length += len(block) + 2
+    return blocks
+
+
+def make_corpus(count: int, size: int, seed: int = 0) -> list[str]:
+    """
+    This method generates many notes.
+
+    :param count: The number of notes.
+    :param size: The length of each note in characters.
+    :param seed: The seed of the random generator.
+    :return: The notes.
+    """
+    return ["\n\n".join(make_note(size, seed + i)) for i in range(count)]
@@ -0,0 +1,90 @@
+"""
+This benchmark compares storing every version of an often edited note in full against storing each distinct content once, as deltas with a full snapshot every HISTORY_SNAPSHOT_INTERVAL blobs: the bytes stored, the time to compute a delta on write and the time to rebuild a version on read. About a third of the versions keep the content of the previous version, like title edits and deletes.
+
+Usage: python -m benchmarks.history_delta [--sizes 0.01 0.1 1] [--versions 200] [--interval 20]
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+
+from benchmarks.corpus import make_note
+from src.common.utils.delta import make_delta
+from src.common.utils.generate_etag import generate_etag
+from src.config.settings import HISTORY_SNAPSHOT_INTERVAL
+from src.services.history import chain_depth, rebuild_contents
+
+Blob = namedtuple("Blob", "hash base_hash content delta")
+# the hash a version references its blob by
+HASH_SIZE = 64
+
+
+def edit(blocks: list[str], rng: random.Random, version: int) -> list[str]:
+    """A few blocks are edited, and sometimes a block is added, like a user working on a note."""
+    blocks = list(blocks)
+    for _ in range(rng.randint(1, 3)):
+        blocks[rng.randrange(len(blocks))] = f"Edited in version {version}."
+    if rng.random() < 0.3:
+        blocks.append(f"Added in version {version}.")
+    return blocks
+
+
+def main(sizes: list[float], count: int, interval: int):
+    print(
+        f"{'size':>8} {'full stored':>12} {'blobs stored':>13} {'ratio':>6} "
+        f"{'delta write':>12} {'rebuild avg':>12} {'rebuild max':>12}"
+    )
+    for size_mb in sizes:
+        rng = random.Random(0)
+        blocks = make_note(int(size_mb * 1024 * 1024))
+        contents = []
+        for i in range(count):
+            if not contents or rng.random() >= 1 / 3:
+                blocks = edit(blocks, rng, i)
+            contents.append("\n\n".join(blocks))
+
+        blobs: dict[str, Blob] = {}
+        hashes = []
+        write_time = 0.0
+        for content in contents:
+            start = time.perf_counter()
+            content_hash = generate_etag(content)
+            if content_hash not in blobs:
+                base_hash = hashes[-1] if hashes else None
+                delta = None
+                if base_hash and chain_depth(blobs.values(), base_hash) + 1 < interval:
+                    base = rebuild_contents(blobs.values(), [base_hash])[base_hash]
+                    delta = make_delta(base, content)
+                if delta is None:
+                    blobs[content_hash] = Blob(content_hash, None, content, None)
+                else:
+                    blobs[content_hash] = Blob(content_hash, base_hash, None, delta)
+            write_time += time.perf_counter() - start
+            hashes.append(content_hash)
+
+        rebuild_times = []
+        for content_hash, content in zip(hashes, contents):
+            start = time.perf_counter()
+            rebuilt = rebuild_contents(blobs.values(), [content_hash])[content_hash]
+            rebuild_times.append(time.perf_counter() - start)
+            assert rebuilt == content
+
+        full = sum(len(content.encode()) for content in contents)
+        stored = HASH_SIZE * count + sum(
+            len((blob.content or blob.delta).encode()) for blob in blobs.values()
+        )
+        print(
+            f"{size_mb:>6}MB {full / 2**20:>10.1f}MB {stored / 2**20:>11.2f}MB {full / stored:>5.0f}x "
+            f"{write_time / count * 1000:>10.2f}ms {sum(rebuild_times) / count * 1000:>10.2f}ms "
+            f"{max(rebuild_times) * 1000:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.01, 0.1, 1])
+    parser.add_argument("--versions", type=int, default=200)
+    parser.add_argument("--interval", type=int, default=HISTORY_SNAPSHOT_INTERVAL)
+    args = parser.parse_args()
+    main(args.sizes, args.versions, args.interval)
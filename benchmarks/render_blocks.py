@@ -0,0 +1,74 @@
+"""
+This benchmark compares rendering a large note at once against rendering it block by block, cold (nothing cached) and after a one-line edit (the other blocks are cached), and checks both give the same HTML.
+
+Usage: python -m benchmarks.render_blocks [--sizes 1 2 5] [--repeat 3] [--engine markdown-it]
+"""
+
+import argparse
+import time
+
+from cachetools import LRUCache
+
+from benchmarks.corpus import make_note
+from src.common.utils.render_markdown import (
+    ENGINES,
+    render_markdown_blocks,
+    render_markdown_to_html,
+)
+
+
+def measure(render, repeat: int) -> tuple[float, str]:
+    best, html = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = render()
+        best = min(best, time.perf_counter() - start)
+    return best, html
+
+
+def main(sizes: list[float], repeat: int, engine: str):
+    print(
+        f"{'size':>8} {'full':>10} {'blocks cold':>12} {'one edit':>10} {'speedup':>8}"
+    )
+    for size_mb in sizes:
+        blocks = make_note(int(size_mb * 1024 * 1024))
+        note = "\n\n".join(blocks)
+
+        full, full_html = measure(lambda: render_markdown_to_html(note, engine), repeat)
+        cold, cold_html = measure(
+            lambda: render_markdown_blocks(
+                note, LRUCache(2**31, getsizeof=len), engine
+            ),
+            repeat,
+        )
+
+        rendered_blocks = LRUCache(2**31, getsizeof=len)
+        render_markdown_blocks(note, rendered_blocks, engine)
+        edited_blocks = list(blocks)
+        edits = iter(range(repeat))
+
+        def edit() -> str:
+            # a different line each time, so every run renders one new block
+            edited_blocks[len(blocks) // 2] = f"Edited paragraph {next(edits)}."
+            return render_markdown_blocks(
+                "\n\n".join(edited_blocks), rendered_blocks, engine
+            )
+
+        edited, edited_html = measure(edit, repeat)
+
+        assert cold_html == full_html
+        assert edited_html == render_markdown_to_html(
+            "\n\n".join(edited_blocks), engine
+        )
+        print(
+            f"{size_mb:>6}MB {full:>9.3f}s {cold:>11.3f}s {edited:>9.3f}s {full / edited:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine", choices=list(ENGINES), default="markdown-it")
+    args = parser.parse_args()
+    main(args.sizes, args.repeat, args.engine)
@@ -0,0 +1,74 @@
+"""
+This benchmark compares the throughput of the Markdown engines on corpora of notes of different sizes, raw and
+followed by the sanitizer, and the cost of building a new sanitizer for each note instead of reusing one.
+
+Usage: python -m benchmarks.render_engines [--repeat 3]
+"""
+
+import argparse
+import time
+
+import bleach
+
+from benchmarks.corpus import make_corpus
+from src.common.utils.render_markdown import (
+    ALLOWED_ATTRIBUTES,
+    ALLOWED_PROTOCOLS,
+    ALLOWED_TAGS,
+    ENGINES,
+    get_renderer,
+)
+
+CORPORA = {
+    "short notes (1000 x 2KB)": (1000, 2 * 1024),
+    "long notes (50 x 64KB)": (50, 64 * 1024),
+    "large notes (4 x 1MB)": (4, 1024 * 1024),
+}
+
+
+def clean_per_call(html: str) -> str:
+    # bleach.clean builds a new Cleaner on every call
+    return bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+    )
+
+
+def throughput(render, notes: list[str], repeat: int) -> float:
+    size = sum(len(note) for note in notes) / (1024 * 1024)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for note in notes:
+            render(note)
+        best = min(best, time.perf_counter() - start)
+    return size / best
+
+
+def main(repeat: int):
+    for corpus, (count, size) in CORPORA.items():
+        notes = make_corpus(count, size)
+        print(corpus)
+        for name in ENGINES:
+            renderer = get_renderer(name)
+            engine, sanitizer = renderer.engine, renderer.sanitizer
+            cases = {
+                "raw": engine.render,
+                "sanitized": renderer.render,
+                "sanitized, new cleaner per note": lambda note: clean_per_call(
+                    engine.render(note)
+                ),
+            }
+            for case, render in cases.items():
+                print(
+                    f"  {name:>12} {case:<32} {throughput(render, notes, repeat):>7.2f} MB/s"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.repeat)
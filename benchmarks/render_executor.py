@@ -0,0 +1,74 @@
+"""
+This benchmark measures how rendering large notes affects the latency of the other requests of a worker, for each
+render executor mode: while the notes are rendered, a probe sleeps 5ms in a loop on the same event loop, like an
+unrelated request would, and the extra time it takes to wake up is recorded.
+
+Usage: python -m benchmarks.render_executor [--size 1] [--renders 4] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.corpus import make_note
+from src.common.utils.render_markdown import render_blocks
+from src.services.render_executor import RenderExecutor
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(stop: asyncio.Event) -> list[float]:
+    delays = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append(time.perf_counter() - start - PROBE_INTERVAL)
+    return delays
+
+
+async def measure(
+    executor: RenderExecutor, notes: list[list[str]]
+) -> tuple[float, list[float]]:
+    # start the pool before measuring
+    await executor.run(render_blocks, ["warm up"], size=executor.threshold)
+
+    stop = asyncio.Event()
+    probing = asyncio.create_task(probe(stop))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            executor.run(render_blocks, note, size=sum(len(block) for block in note))
+            for note in notes
+        )
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await probing
+
+
+def main(size_mb: float, renders: int, workers: int):
+    notes = [make_note(int(size_mb * 1024 * 1024), seed) for seed in range(renders)]
+    print(f"{renders} renders of {size_mb}MB notes, {workers} workers")
+    print(
+        f"{'mode':>8} {'total':>8} {'probe p50':>10} {'probe p99':>10} {'probe max':>10}"
+    )
+    for mode in ("inline", "thread", "process"):
+        executor = RenderExecutor(mode, max_workers=workers, threshold=1)
+        elapsed, delays = asyncio.run(measure(executor, notes))
+        executor.shutdown()
+        delays.sort()
+        p99 = delays[min(len(delays) - 1, int(len(delays) * 0.99))]
+        print(
+            f"{mode:>8} {elapsed:>7.2f}s {statistics.median(delays) * 1000:>8.1f}ms "
+            f"{p99 * 1000:>8.1f}ms {delays[-1] * 1000:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=float, default=1)
+    parser.add_argument("--renders", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    main(args.size, args.renders, args.workers)
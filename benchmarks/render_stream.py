@@ -0,0 +1,75 @@
+"""
+This benchmark compares the JSON render response with the streamed text/html render of large notes that are not
+rendered yet: the time to the first byte sent and the peak memory allocated while the response is produced. The block
+cache is disabled, it is bounded and shared by all the requests, so only the memory of the response itself is measured.
+
+Usage: python -m benchmarks.render_stream [--sizes 1 4]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.corpus import make_note
+from src.schemas.render import RenderResponse
+from src.services.cache import CacheService
+from src.services.redis import RedisCache
+from src.services.render_cache import RenderCache
+
+
+def new_render_cache() -> RenderCache:
+    return RenderCache(
+        CacheService(RedisCache(), enabled=False), use_redis=False, block_cache_size=0
+    )
+
+
+async def json_response(note: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    html = await new_render_cache().render(note)
+    body = RenderResponse(note_id=1, rendered_html=html).model_dump_json()
+    return time.perf_counter() - start, len(body)
+
+
+async def streamed_response(note: str) -> tuple[float, int]:
+    start, first_byte, sent = time.perf_counter(), None, 0
+    async for part in new_render_cache().render_stream(note):
+        first_byte = first_byte or time.perf_counter() - start
+        sent += len(part.encode("utf-8"))
+    return first_byte, sent
+
+
+def measure(response, note: str) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    first_byte, _ = asyncio.run(response(note))
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc slows the rendering down, the memory is measured in a second run
+    tracemalloc.start()
+    asyncio.run(response(note))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte, elapsed, peak / (1024 * 1024)
+
+
+def main(sizes: list[float]):
+    print(
+        f"{'size':>8} {'response':>10} {'first byte':>11} {'total':>8} {'peak memory':>12}"
+    )
+    for size_mb in sizes:
+        note = "\n\n".join(make_note(int(size_mb * 1024 * 1024)))
+        for name, response in (
+            ("json", json_response),
+            ("streamed", streamed_response),
+        ):
+            first_byte, elapsed, peak = measure(response, note)
+            print(
+                f"{size_mb:>6}MB {name:>10} {first_byte:>10.3f}s {elapsed:>7.2f}s {peak:>10.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+    main(args.sizes)
@@ -0,0 +1,130 @@
+"""
+This benchmark counts the database round trips of the write endpoints: the statements executed, the transactions begun
+and the commits of each request. The requests go through the application, so the numbers include the lookups of the
+services and the versions written to the history. It needs a migrated database (DB_URL), it adds its own user, folders
+and notes.
+
+Usage: python -m benchmarks.write_round_trips [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import uuid
+from collections import Counter, defaultdict
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from src.auth.tokens import check_token
+from src.common.db.connection import engine
+from src.dependencies.history import history_outbox
+from src.main import app
+
+
+class RoundTrips:
+    """Counts the statements, begins and commits of the engine while an operation runs."""
+
+    def __init__(self):
+        self.current = Counter()
+        self.operations = defaultdict(Counter)
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self.on_statement)
+        event.listen(sync_engine, "begin", self.on_begin)
+        event.listen(sync_engine, "commit", self.on_commit)
+
+    def on_statement(self, *args):
+        self.current["statements"] += 1
+
+    def on_begin(self, *args):
+        self.current["begins"] += 1
+
+    def on_commit(self, *args):
+        self.current["commits"] += 1
+
+    async def measure(self, operation: str, request):
+        self.current = Counter()
+        response = await request
+        response.raise_for_status()
+        self.operations[operation].update(self.current)
+        self.operations[operation]["requests"] += 1
+        return response.json()
+
+
+async def main(repeat: int):
+    engine.echo = False
+    app.dependency_overrides[check_token] = lambda: None
+    round_trips = RoundTrips()
+    run_id = uuid.uuid4().hex[:8]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://b") as c:
+        username = f"bench-{run_id}"
+        await round_trips.measure(
+            "register user",
+            c.post(
+                "/user/register",
+                params={
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": "benchmark",
+                },
+            ),
+        )
+        for i in range(repeat):
+            name = f"bench-{run_id}-{i}"
+            folder = await round_trips.measure(
+                "create folder", c.post("/folder/", json={"name": name, "parent": 0})
+            )
+            folder_id = folder["folder"]["id"]
+            await round_trips.measure(
+                "rename folder",
+                c.patch(f"/folder/{folder_id}", params={"new_name": f"{name}-renamed"}),
+            )
+            note = await round_trips.measure(
+                "create note",
+                c.post(
+                    "/note/",
+                    json={
+                        "title": name,
+                        "content": "# Benchmark\n\nfirst version",
+                        "username": username,
+                        "tags": [],
+                        "parent_id": folder_id,
+                    },
+                ),
+            )
+            await round_trips.measure(
+                "update note",
+                c.patch(
+                    f"/note/{note['id']}",
+                    json={"content": "# Benchmark\n\nsecond version"},
+                ),
+            )
+            await history_outbox.drain()
+            versions = (await c.get(f"/history/{note['id']}")).json()
+            await round_trips.measure(
+                "restore note",
+                c.post(f"/note/{note['id']}/restore/{versions[0]['id']}"),
+            )
+            await round_trips.measure("delete note", c.delete(f"/note/{note['id']}"))
+            await round_trips.measure("delete folder", c.delete(f"/folder/{folder_id}"))
+    await history_outbox.drain()
+
+    print(
+        f"{'operation':<16} {'statements':>10} {'begins':>7} {'commits':>8} {'round trips':>12}"
+    )
+    for operation, counts in round_trips.operations.items():
+        requests = counts["requests"]
+        statements, begins, commits = (
+            counts[key] / requests for key in ("statements", "begins", "commits")
+        )
+        print(
+            f"{operation:<16} {statements:>10.1f} {begins:>7.1f} {commits:>8.1f} "
+            f"{statements + begins + commits:>12.1f}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
@@ -9,12 +9,14 @@ from fastapi.params import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
 from src.models.user import User
 import jwt
 from src.config.definitions import SECRETE, ALGO
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from src.dependencies.cache import get_cache_service
 from src.repositories.user import UserRepository
 from src.services.user import UserService
 
@@ -65,7 +67,9 @@ async def check_token(
         token = token.credentials
         data = encrypt_jwt_token(token)
         username = data["username"]
-        user_service = UserService(UserRepository(session))
+        user_service = UserService(
+            UserRepository(session), get_cache_service(), UnitOfWork(session)
+        )
         saved_user = await user_service.get_user_by_username(username)
         if not saved_user:
             raise HTTPException(status_code=409, detail="Unauthorized")
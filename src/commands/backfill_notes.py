@@ -0,0 +1,80 @@
+"""
+This module backfills the content hash and the rendered HTML of the notes written before they were stored with the
+notes, it is safe to run more than once, only the notes missing them are updated. After changing RENDER_ENGINE, run it
+with --all to render every note again with the new engine.
+
+Usage: python -m src.commands.backfill_notes [--batch-size 500] [--all]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from src.common.db.connection import Connection, engine
+from src.common.utils.generate_etag import generate_etag
+from src.common.utils.render_markdown import render_markdown_to_html
+from src.config.definitions import EXPORT_BATCH_SIZE
+from src.models.history import History
+from src.models.issue import Issue
+from src.repositories.note import NoteRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_notes(
+    batch_size: int = EXPORT_BATCH_SIZE, only_missing: bool = True
+) -> int:
+    """
+    This method computes and stores the content hash and the rendered HTML of the notes missing them, a batch at a
+    time, each batch is committed on its own.
+
+    :param batch_size: The number of notes updated per batch.
+    :param only_missing: If False, every note is rendered again.
+    :return: The number of notes updated.
+    """
+    updated = 0
+    after = None
+    async with Connection.get_session_factory()() as session:
+        note_repository = NoteRepository(session)
+        while True:
+            notes = await note_repository.get_notes_to_render(
+                batch_size, after, only_missing
+            )
+            if not notes:
+                break
+
+            await note_repository.set_rendered(
+                [
+                    {
+                        "id": note.id,
+                        "content_hash": generate_etag(note.content),
+                        "rendered_html": render_markdown_to_html(note.content),
+                    }
+                    for note in notes
+                ]
+            )
+            await session.commit()
+            updated += len(notes)
+            after = notes[-1].id
+            logger.info("Backfilled %d notes", updated)
+    return updated
+
+
+async def main(batch_size: int, only_missing: bool):
+    try:
+        updated = await backfill_notes(batch_size, only_missing)
+        print(f"Backfilled {updated} notes")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill the content hash and the rendered HTML of the notes"
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--all", action="store_true", help="render every note, not only the missing"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, not args.all))
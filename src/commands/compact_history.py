@@ -0,0 +1,148 @@
+"""
+This module applies the retention policy to the history of the notes: the versions the policy doesn't keep are deleted,
+then the blobs no version uses anymore. The notes are handled a batch at a time and the versions are deleted in small
+chunks, each committed on its own, so the job never holds long locks on the History table and can run while the
+application is serving.
+
+Only the blobs no version uses and no other blob is based on are deleted. A delta blob in the middle of a chain is
+kept while a blob after it is based on it, even if no version uses it anymore, it is reclaimed once the blobs based on
+it are deleted, so the bytes reclaimed can be less than the size of the versions deleted.
+
+Usage: python -m src.commands.compact_history [--keep-all-days 7] [--keep-hourly-days 30] [--batch-size 500]
+[--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from src.common.db.connection import Connection, engine
+from src.common.utils.retention import RetentionPolicy
+from src.config.definitions import EXPORT_BATCH_SIZE
+from src.config.settings import HISTORY_KEEP_ALL_DAYS, HISTORY_KEEP_HOURLY_DAYS
+from src.repositories.history import HistoryRepository
+
+# the relationships of the notes refer to these models by name, their mappers shall be registered
+import src.models.folder  # noqa: F401
+import src.models.tag  # noqa: F401
+import src.models.user  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompactionReport:
+    versions: int = 0
+    blobs: int = 0
+    bytes: int = 0
+
+
+async def compact_history(
+    policy: RetentionPolicy,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> CompactionReport:
+    """
+    This method deletes the versions the retention policy doesn't keep and the blobs they leave unused.
+
+    :param policy: The retention policy.
+    :param batch_size: The number of notes handled, and of versions deleted, per transaction.
+    :param dry_run: If True, only count the versions that would be deleted.
+    :return: The numbers of versions and blobs deleted, and the bytes of their contents, deltas, titles and
+    descriptions.
+    """
+    report = CompactionReport()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    after = None
+    async with Connection.get_session_factory()() as session:
+        history_repository = HistoryRepository(session)
+        while True:
+            note_ids = await history_repository.get_versioned_notes(batch_size, after)
+            if not note_ids:
+                break
+            after = note_ids[-1]
+
+            versions = await history_repository.get_versions_retention(note_ids)
+            expired = policy.expired_versions(versions, now)
+            await session.commit()
+            if dry_run:
+                report.versions += len(expired)
+                continue
+
+            for start in range(0, len(expired), batch_size):
+                deleted = await history_repository.delete_versions(
+                    expired[start : start + batch_size]
+                )
+                await session.commit()
+                report.versions += len(deleted)
+                report.bytes += sum(row.size for row in deleted)
+
+                # a deleted blob may leave its base unused, which is deleted in turn
+                content_hashes = {row.content_hash for row in deleted}
+                while content_hashes:
+                    blobs = await history_repository.delete_unused_blobs(
+                        list(content_hashes)
+                    )
+                    await session.commit()
+                    report.blobs += len(blobs)
+                    report.bytes += sum(blob.size for blob in blobs)
+                    content_hashes = {
+                        blob.base_hash for blob in blobs if blob.base_hash is not None
+                    }
+            logger.info(
+                "Compacted the history of %d notes, %d versions deleted",
+                len(note_ids),
+                report.versions,
+            )
+    return report
+
+
+async def main(policy: RetentionPolicy, batch_size: int, dry_run: bool):
+    try:
+        report = await compact_history(policy, batch_size, dry_run)
+        if dry_run:
+            print(f"{report.versions} versions would be deleted")
+        else:
+            print(
+                f"Deleted {report.versions} versions and {report.blobs} blobs, "
+                f"{report.bytes} bytes reclaimed"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete the versions of the notes the retention policy doesn't keep",
+        epilog="The blobs still used as the base of another blob are kept, even if no version uses them, so the "
+        "bytes reclaimed can be less than the size of the versions deleted.",
+    )
+    parser.add_argument(
+        "--keep-all-days",
+        type=float,
+        default=HISTORY_KEEP_ALL_DAYS,
+        help="every version younger than this is kept",
+    )
+    parser.add_argument(
+        "--keep-hourly-days",
+        type=float,
+        default=HISTORY_KEEP_HOURLY_DAYS,
+        help="the latest version of each hour is kept until this age, then of each day",
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count the versions to delete"
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            RetentionPolicy(
+                timedelta(days=args.keep_all_days),
+                timedelta(days=args.keep_hourly_days),
+            ),
+            args.batch_size,
+            args.dry_run,
+        )
+    )
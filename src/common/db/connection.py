@@ -25,6 +25,15 @@ class Connection:
         async with SessionLocal() as session:
             yield session
 
+    @staticmethod
+    def get_session_factory() -> async_sessionmaker[AsyncSession]:
+        """
+        This method returns the session factory, used by the work that outlives the request, like streaming responses,
+        where the session of the request is already closed.
+        :return: The async session factory.
+        """
+        return SessionLocal
+
     @staticmethod
     def get_base():
         return Base
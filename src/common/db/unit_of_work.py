@@ -0,0 +1,20 @@
+"""
+This module is the unit of work of a request: the repositories only add and flush their changes, the service commits
+them once at the end of the operation, so an operation that changes many rows is one transaction and one commit. If the
+operation fails nothing is committed, the changes are rolled back when the session of the request is closed.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class UnitOfWork:
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def commit(self) -> None:
+        """
+        This method commits every change of the request, the objects keep their loaded attributes, they aren't loaded
+        again after the commit.
+        """
+        await self.session.commit()
@@ -0,0 +1,58 @@
+"""
+This module is used to store the versions of a note as line deltas, a delta keeps the ranges of lines copied from the
+previous version and the text of the lines that were added, so a version that changed a few lines costs about the size
+of the change instead of a full copy of the note.
+
+A delta is a JSON list, each item is either a [start, end] range of lines of the base text, or a string of new text:
+    [[0, 12], "an edited line\\n", [13, 40]]
+"""
+
+import json
+from difflib import SequenceMatcher
+
+
+def split_lines(text: str) -> list[str]:
+    return text.splitlines(keepends=True)
+
+
+def make_delta(base: str, text: str, max_ratio: float = 0.5) -> str | None:
+    """
+    This method computes the delta of a text from a base text.
+
+    :param base: The base text, usually the previous version.
+    :param text: The new text.
+    :param max_ratio: The largest size of the delta relative to the text, a larger delta isn't worth storing.
+    :return: The delta, or None if the text should be stored in full.
+    """
+    base_lines = split_lines(base)
+    lines = split_lines(text)
+    operations: list[list[int] | str] = []
+    matcher = SequenceMatcher(None, base_lines, lines)
+    for tag, base_start, base_end, start, end in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([base_start, base_end])
+        elif tag in ("replace", "insert"):
+            operations.append("".join(lines[start:end]))
+
+    delta = json.dumps(operations, separators=(",", ":"), ensure_ascii=False)
+    if len(delta) > max_ratio * len(text):
+        return None
+    return delta
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """
+    This method rebuilds a text from its base text and its delta.
+
+    :param base: The base text the delta was computed from.
+    :param delta: The delta.
+    :return: The text.
+    """
+    base_lines = split_lines(base)
+    parts = []
+    for operation in json.loads(delta):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            parts.extend(base_lines[operation[0] : operation[1]])
+    return "".join(parts)
@@ -0,0 +1,87 @@
+"""
+This module is used to compute the differences between two versions of a note. Only the changed parts are returned,
+each with its character offsets in both texts, so the size of a diff is about the size of the change whatever the size
+of the note.
+
+The texts are compared line by line, with the word granularity the lines that were replaced are compared again word by
+word, so an edited word doesn't show as a whole changed line.
+"""
+
+import re
+from difflib import SequenceMatcher
+from itertools import accumulate
+from typing import Any, Literal
+
+from src.common.utils.delta import split_lines
+
+DiffGranularity = Literal["line", "word"]
+
+WORDS = re.compile(r"\s+|\w+|[^\w\s]")
+
+
+def diff_tokens(
+    old_tokens: list[str],
+    new_tokens: list[str],
+    old_offset: int = 0,
+    new_offset: int = 0,
+) -> list[dict[str, Any]]:
+    """
+    This method compares two lists of tokens.
+
+    :param old_tokens: The tokens of the old text.
+    :param new_tokens: The tokens of the new text.
+    :param old_offset: The offset of the first old token in the old text.
+    :param new_offset: The offset of the first new token in the new text.
+    :return: The changes, with their offsets in the texts.
+    """
+    old_starts = list(accumulate(map(len, old_tokens), initial=old_offset))
+    new_starts = list(accumulate(map(len, new_tokens), initial=new_offset))
+    changes = []
+    matcher = SequenceMatcher(None, old_tokens, new_tokens)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        changes.append(
+            {
+                "op": tag,
+                "old_start": old_starts[old_start],
+                "old_end": old_starts[old_end],
+                "new_start": new_starts[new_start],
+                "new_end": new_starts[new_end],
+                "old_text": "".join(old_tokens[old_start:old_end]),
+                "new_text": "".join(new_tokens[new_start:new_end]),
+            }
+        )
+    return changes
+
+
+def diff_texts(
+    old: str, new: str, granularity: DiffGranularity = "line"
+) -> list[dict[str, Any]]:
+    """
+    This method computes the changes from a text to another.
+
+    :param old: The old text.
+    :param new: The new text.
+    :param granularity: "line" to compare whole lines, "word" to compare the replaced lines word by word.
+    :return: The changes (op, old_start, old_end, new_start, new_end, old_text, new_text), the offsets are in
+    characters and the end offsets are exclusive.
+    """
+    changes = diff_tokens(split_lines(old), split_lines(new))
+    if granularity == "line":
+        return changes
+
+    word_changes = []
+    for change in changes:
+        if change["op"] != "replace":
+            word_changes.append(change)
+            continue
+        word_changes.extend(
+            diff_tokens(
+                WORDS.findall(change["old_text"]),
+                WORDS.findall(change["new_text"]),
+                change["old_start"],
+                change["new_start"],
+            )
+        )
+    return word_changes
@@ -13,3 +13,20 @@ def generate_etag(content: str) -> str:
     """
     """Generate a strong ETag from note content."""
     return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """
+    This method checks an etag against the If-None-Match header, which can be a list of etags, quoted or weak, or *.
+    :param etag: The current etag of the note.
+    :param if_none_match: The value of the If-None-Match header.
+    :return: True if the client has the current version.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/").strip('"') == etag
+        for tag in if_none_match.split(",")
+    )
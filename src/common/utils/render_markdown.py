@@ -1,16 +1,362 @@
 """
-This module is used to render any Markdown text to an HTML format using markdown library.
+This module is used to render any Markdown text to a sanitized HTML format, with one of the Markdown engines
+(the markdown library by default, or markdown-it-py), the output of the engine is always passed through the
+sanitizer, which only keeps the tags and attributes Markdown produces.
+
+Large notes are rendered block by block: the text is split on the blank lines between its top-level blocks, and the
+HTML of each block is cached by the hash of the block, so after an edit only the blocks that changed are rendered
+again, and blocks shared by many notes or versions are rendered once.
 """
 
-from markdown import markdown
+import hashlib
+import re
+import threading
+from functools import lru_cache
+from itertools import chain
+from typing import Iterator, MutableMapping
+
+from bleach.sanitizer import Cleaner
+from markdown import Markdown, markdown
+from markdown_it import MarkdownIt
+
+from src.config.settings import RENDER_ENGINE
+
+BLANK_LINES = re.compile(r"(\n(?:[ \t]*\n)+)")
+LIST_ITEM = re.compile(r"^ {0,3}(?:[*+-]|\d+[.)])(?:[ \t]|$)", re.M)
+BLOCKQUOTE = re.compile(r"^ {0,3}>", re.M)
+FENCE = re.compile(r"^([ \t]*)(`{3,}|~{3,})", re.M)
+# Raw HTML, inline or not, and reference definitions, also inside blockquotes and list items, can affect text outside
+# of their block
+UNSPLITTABLE = re.compile(
+    r"<[A-Za-z/!?]|^(?:[ \t]|>|[*+-][ \t]|\d+[.)][ \t])*\[[^\]]+\]:", re.M
+)
+
+ALLOWED_TAGS = frozenset(
+    {
+        "a", "abbr", "b", "blockquote", "br", "code", "del", "em", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i",
+        "img", "li", "ol", "p", "pre", "s", "strong", "table", "tbody", "td", "th", "thead", "tr", "ul",
+    }
+)  # fmt: skip
+ALLOWED_ATTRIBUTES = {
+    "a": ["href", "title"],
+    "abbr": ["title"],
+    "img": ["src", "alt", "title"],
+    "ol": ["start"],
+    "code": ["class"],
+}
+ALLOWED_PROTOCOLS = frozenset({"http", "https", "mailto"})
+
+
+class Sanitizer:
+    """
+    The sanitizer of the rendered HTML, a bleach Cleaner built once and reused, one per thread since a Cleaner keeps
+    the state of its parser.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def get_cleaner(self) -> Cleaner:
+        cleaner = getattr(self.local, "cleaner", None)
+        if cleaner is None:
+            cleaner = Cleaner(
+                tags=ALLOWED_TAGS,
+                attributes=ALLOWED_ATTRIBUTES,
+                protocols=ALLOWED_PROTOCOLS,
+            )
+            self.local.cleaner = cleaner
+        return cleaner
+
+    def sanitize(self, html: str) -> str:
+        """
+        This method removes the tags, attributes and links that are not allowed from an HTML text, the HTML of
+        disallowed tags is escaped.
+
+        :param html: The HTML text.
+        :return: The sanitized HTML text.
+        """
+        return self.get_cleaner().clean(html)
+
+
+class MarkdownEngine:
+    """The base class of the Markdown engines, an engine renders Markdown texts to (not sanitized) HTML."""
+
+    # The text between the HTML of two consecutive top-level blocks
+    separator = "\n"
+
+    def render(self, markdown_text: str) -> str:
+        raise NotImplementedError
+
+    def render_blocks(self, blocks: list[str]) -> list[str]:
+        return [self.render(block) for block in blocks]
+
+
+class PythonMarkdownEngine(MarkdownEngine):
+    """The engine of the markdown library."""
+
+    separator = "\n"
+
+    def render(self, markdown_text: str) -> str:
+        return markdown(markdown_text)
+
+    def render_blocks(self, blocks: list[str]) -> list[str]:
+        # a Markdown instance isn't thread-safe, one is used per call
+        md = Markdown()
+        return [md.reset().convert(block) for block in blocks]
+
 
+class MarkdownItEngine(MarkdownEngine):
+    """The engine of markdown-it-py, CommonMark with tables and strikethrough."""
 
-def render_markdown_to_html(markdown_text: str) -> str:
+    separator = ""
+
+    def __init__(self):
+        self.md = MarkdownIt("commonmark").enable(["table", "strikethrough"])
+
+    def render(self, markdown_text: str) -> str:
+        return self.md.render(markdown_text)
+
+
+ENGINES: dict[str, type[MarkdownEngine]] = {
+    "markdown-it": MarkdownItEngine,
+    "markdown": PythonMarkdownEngine,
+}
+
+
+class MarkdownRenderer:
+    """A Markdown engine followed by the sanitizer."""
+
+    def __init__(self, engine: MarkdownEngine, sanitizer: Sanitizer):
+        self.engine = engine
+        self.sanitizer = sanitizer
+
+    @property
+    def separator(self) -> str:
+        return self.engine.separator
+
+    def render(self, markdown_text: str) -> str:
+        return self.sanitizer.sanitize(self.engine.render(markdown_text))
+
+    def render_blocks(self, blocks: list[str]) -> list[str]:
+        return [
+            self.sanitizer.sanitize(html) for html in self.engine.render_blocks(blocks)
+        ]
+
+
+@lru_cache
+def get_renderer(engine: str = RENDER_ENGINE) -> MarkdownRenderer:
+    """
+    This method returns the renderer of an engine, it is built once per process.
+
+    :param engine: The name of the engine, one of ENGINES.
+    :return: The renderer.
+    """
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Unknown Markdown engine {engine}, use one of {list(ENGINES)}"
+        )
+    return MarkdownRenderer(ENGINES[engine](), Sanitizer())
+
+
+def render_markdown_to_html(markdown_text: str, engine: str = RENDER_ENGINE) -> str:
     """
     This method is used to render any Markdown text t an HTML format.
 
     :param markdown_text: The text to render.
-    :return: The rendered HTML text.
+    :param engine: The name of the engine to render with.
+    :return: The rendered and sanitized HTML text.
     """
-    html = markdown(markdown_text)
+    html = get_renderer(engine).render(markdown_text)
     return html
+
+
+def split_markdown_blocks(markdown_text: str) -> list[str] | None:
+    """
+    This method splits a Markdown text into its top-level blocks, the blocks that continue the previous block, like
+    list items, blockquotes, indented lines or the rest of a fenced code block, are kept with it, so each block renders
+    the same alone.
+
+    :param markdown_text: The text to split.
+    :return: The blocks, or None if the text has a construct that can't be rendered block by block.
+    """
+    blocks = iter_markdown_blocks(markdown_text)
+    return None if blocks is None else list(blocks)
+
+
+def iter_markdown_blocks(markdown_text: str) -> Iterator[str] | None:
+    """
+    This method is split_markdown_blocks, with the blocks generated one at a time, so the text can be rendered in
+    chunks without holding a copy of all its blocks.
+
+    :param markdown_text: The text to split.
+    :return: An iterator of the blocks, or None if the text has a construct that can't be rendered block by block.
+    """
+    text = markdown_text.replace("\r\n", "\n").replace("\r", "\n")
+    if UNSPLITTABLE.search(text):
+        return None
+    # only the fences at the start of the line are always top-level, the others can be in a list item or code
+    if any(fence.group(1) for fence in FENCE.finditer(text)):
+        return None
+    return generate_markdown_blocks(text, FENCE.search(text) is not None)
+
+
+def generate_markdown_blocks(text: str, has_fences: bool) -> Iterator[str]:
+    """
+    This method generates the blocks of a normalized Markdown text, see split_markdown_blocks.
+
+    :param text: The text to split, with "\\n" line endings.
+    :param has_fences: If the text has fenced code blocks, to skip looking for them otherwise.
+    :return: An iterator of the blocks.
+    """
+    pieces: list[str] = []
+    has_list_item = has_blockquote = False
+    fence = None
+    position, separator = 0, ""
+    for match in chain(BLANK_LINES.finditer(text), [None]):
+        block = text[position : None if match is None else match.start()]
+        if pieces and (
+            not block
+            or fence is not None
+            or block[:1] in (" ", "\t")
+            or (has_list_item and LIST_ITEM.match(block))
+            or (has_blockquote and BLOCKQUOTE.match(block))
+        ):
+            pieces += (separator, block)
+        else:
+            if pieces:
+                # the block keeps the end of its last line, it matters for an unclosed fence
+                pieces.append("\n")
+                yield "".join(pieces)
+            pieces = [block]
+            has_list_item = has_blockquote = False
+        has_list_item = has_list_item or LIST_ITEM.search(block) is not None
+        has_blockquote = has_blockquote or BLOCKQUOTE.search(block) is not None
+        if has_fences:
+            fence = open_fence(block, fence)
+        if match is not None:
+            position, separator = match.end(), match.group()
+    yield "".join(pieces)
+
+
+def open_fence(block: str, fence: str | None) -> str | None:
+    """
+    This method finds if a fenced code block is still open at the end of a block.
+
+    :param block: The Markdown text of the block.
+    :param fence: The marker of the fence open before the block, or None.
+    :return: The marker of the fence open at the end of the block, or None.
+    """
+    for match in FENCE.finditer(block):
+        marker = match.group(2)
+        line_end = block.find("\n", match.end())
+        rest = block[match.end() : None if line_end == -1 else line_end]
+        if fence is None:
+            # the info string of a backtick fence can't have backticks, ```code``` is inline code
+            if not (marker[0] == "`" and "`" in rest):
+                fence = marker
+        elif marker[0] == fence[0] and len(marker) >= len(fence) and not rest.strip():
+            fence = None
+    return fence
+
+
+def block_key(block: str) -> str:
+    """
+    This method returns the key a rendered block is cached by.
+
+    :param block: The Markdown text of the block.
+    :return: The hash of the block.
+    """
+    return hashlib.blake2b(block.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_blocks(blocks: list[str], engine: str = RENDER_ENGINE) -> list[str]:
+    """
+    This method renders many blocks, it only depends on its arguments, so it can run in another process.
+
+    :param blocks: The Markdown texts of the blocks.
+    :param engine: The name of the engine to render with.
+    :return: The rendered and sanitized HTML of each block.
+    """
+    return get_renderer(engine).render_blocks(blocks)
+
+
+def lookup_blocks(
+    blocks: list[str], rendered_blocks: MutableMapping[str, str]
+) -> tuple[dict[str, str], list[str]]:
+    """
+    This method finds the blocks that are already rendered.
+
+    :param blocks: The blocks of the text.
+    :param rendered_blocks: The cache of the rendered blocks, by the hash of the block.
+    :return: The HTML of the rendered blocks by their text, and the blocks to render (without duplicates).
+    """
+    found: dict[str, str] = {}
+    missing: dict[str, None] = {}
+    for block in blocks:
+        if block in found or block in missing:
+            continue
+        block_html = rendered_blocks.get(block_key(block))
+        if block_html is None:
+            missing[block] = None
+        else:
+            found[block] = block_html
+    return found, list(missing)
+
+
+def cache_blocks(
+    blocks: list[str], html: list[str], rendered_blocks: MutableMapping[str, str]
+) -> dict[str, str]:
+    """
+    This method caches newly rendered blocks.
+
+    :param blocks: The rendered blocks.
+    :param html: The HTML of each block.
+    :param rendered_blocks: The cache of the rendered blocks, by the hash of the block.
+    :return: The HTML of the blocks by their text.
+    """
+    for block, block_html in zip(blocks, html):
+        try:
+            rendered_blocks[block_key(block)] = block_html
+        except ValueError:
+            # larger than the whole cache
+            pass
+    return dict(zip(blocks, html))
+
+
+def join_blocks(
+    blocks: list[str], rendered: dict[str, str], engine: str = RENDER_ENGINE
+) -> str:
+    """
+    This method joins the HTML of the blocks of a text, the same way the engine renders the whole text.
+
+    :param blocks: The blocks of the text.
+    :param rendered: The HTML of every block by its text.
+    :param engine: The name of the engine the blocks were rendered with.
+    :return: The rendered HTML text.
+    """
+    separator = get_renderer(engine).separator
+    return separator.join(rendered[block] for block in blocks if rendered[block])
+
+
+def render_markdown_blocks(
+    markdown_text: str,
+    rendered_blocks: MutableMapping[str, str],
+    engine: str = RENDER_ENGINE,
+) -> str:
+    """
+    This method renders a Markdown text block by block, reusing the HTML of the blocks already rendered, the result is
+    the same as rendering the whole text at once.
+
+    :param markdown_text: The text to render.
+    :param rendered_blocks: The cache of the rendered blocks, by the hash of the block, only used with one engine.
+    :param engine: The name of the engine to render with.
+    :return: The rendered and sanitized HTML text.
+    """
+    blocks = split_markdown_blocks(markdown_text)
+    if blocks is None:
+        return render_markdown_to_html(markdown_text, engine)
+
+    rendered, missing = lookup_blocks(blocks, rendered_blocks)
+    html = render_blocks(missing, engine)
+    rendered.update(cache_blocks(missing, html, rendered_blocks))
+    return join_blocks(blocks, rendered, engine)
@@ -0,0 +1,64 @@
+"""
+This module is the retention policy of the history of notes: every version is kept for a while, then only the latest
+version of each hour, then only the latest version of each day. The latest version of a note and the versions with
+grammar issues are always kept, the versions soft deleted are not kept once they are out of the keep all period.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from src.config.settings import HISTORY_KEEP_ALL_DAYS, HISTORY_KEEP_HOURLY_DAYS
+
+
+@dataclass
+class RetentionPolicy:
+    """How long every version is kept, and how long the latest version of each hour is kept, after that one per day."""
+
+    keep_all: timedelta = timedelta(days=HISTORY_KEEP_ALL_DAYS)
+    keep_hourly: timedelta = timedelta(days=HISTORY_KEEP_HOURLY_DAYS)
+
+    def bucket(self, created_at: datetime, now: datetime) -> datetime | None:
+        """
+        This method finds the period a version is kept for.
+
+        :param created_at: The time the version was created.
+        :param now: The current time.
+        :return: The start of the hour or day only one version is kept for, None if every version is kept.
+        """
+        age = now - created_at
+        if age < self.keep_all:
+            return None
+        if age < self.keep_hourly:
+            return created_at.replace(minute=0, second=0, microsecond=0)
+        return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def expired_versions(self, versions: Iterable[Any], now: datetime) -> list[int]:
+        """
+        This method selects the versions the policy doesn't keep.
+
+        :param versions: All the versions of some notes, with their id, note_id, created_at, deleted and pinned (if
+        the version has grammar issues).
+        :param now: The current time.
+        :return: The ids of the versions to delete.
+        """
+        expired = []
+        latest_notes, kept_buckets = set(), set()
+        for version in sorted(versions, key=lambda v: v.id, reverse=True):
+            if version.note_id not in latest_notes:
+                latest_notes.add(version.note_id)
+                kept_buckets.add(
+                    (version.note_id, self.bucket(version.created_at, now))
+                )
+                continue
+            if version.pinned:
+                continue
+
+            bucket = self.bucket(version.created_at, now)
+            if bucket is None:
+                continue
+            if version.deleted or (version.note_id, bucket) in kept_buckets:
+                expired.append(version.id)
+            else:
+                kept_buckets.add((version.note_id, bucket))
+        return expired
@@ -2,6 +2,35 @@ ENV_PATH = ".env"
 SECRETE = "Ulquiorra: What is a heart? If I rip open your chest, will I see it?"
 ALGO = "HS256"
 
+CACHE_KEY_VERSION = "v1"
 ALL_NOTES_REDIS_KEY = "/notes/all"
+USER_NOTES_REDIS_KEY = "/notes/user"
+FOLDER_NOTES_REDIS_KEY = "/notes/folder"
+TAG_NOTES_REDIS_KEY = "/notes/tag"
 NOTE_ID_REDIS_KEY = "/note/id"
+NOTE_ETAG_REDIS_KEY = "/note/etag"
+FOLDER_ID_REDIS_KEY = "/folder/id"
+FOLDER_TREE_REDIS_KEY = "/folder/tree"
+TAG_ID_REDIS_KEY = "/tag/id"
 SUMMARY_KEY = "/summary"
+RENDER_KEY = "/render"
+HISTORY_DIFF_KEY = "/history/diff"
+# the key of the postgres advisory lock held by the worker draining the history outbox
+HISTORY_OUTBOX_LOCK = 0x4849535459
+# the key of the postgres advisory lock shared by the writes that reuse a blob and held alone to delete unused blobs
+HISTORY_BLOBS_LOCK = 0x424C4F4253
+
+NOTE_GENERATION_KEY = "/generation/note"
+NOTES_GENERATION_KEY = "/generation/notes"
+FOLDERS_GENERATION_KEY = "/generation/folders"
+TAGS_GENERATION_KEY = "/generation/tags"
+USERS_GENERATION_KEY = "/generation/users"
+CACHE_INVALIDATION_CHANNEL = "/cache/invalidations"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BULK_NOTES = 10000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NOTE_EXCERPT_LENGTH = 200
+EXPORT_BATCH_SIZE = 500
+RENDER_STREAM_CHUNK_SIZE = 64 * 1024
@@ -22,5 +22,29 @@ DB_URL = (
 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_URL = os.getenv("REDIS_URL") or f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").casefold() == "true"
+CACHE_EXPIRE = int(os.getenv("CACHE_EXPIRE", 300))
+SUMMARY_CACHE_EXPIRE = int(os.getenv("SUMMARY_CACHE_EXPIRE", 86400))
+SUMMARY_STALE_WHILE_REVALIDATE = int(os.getenv("SUMMARY_STALE_WHILE_REVALIDATE", 3600))
+RENDER_CACHE_EXPIRE = int(os.getenv("RENDER_CACHE_EXPIRE", 3600))
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", 64 * 1024 * 1024))
+RENDER_BLOCK_CACHE_SIZE = int(os.getenv("RENDER_BLOCK_CACHE_SIZE", 32 * 1024 * 1024))
+RENDER_CACHE_REDIS = os.getenv("RENDER_CACHE_REDIS", "true").casefold() == "true"
+RENDER_ENGINE = os.getenv("RENDER_ENGINE", "markdown")
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "process")
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 0)) or None
+RENDER_OFFLOAD_THRESHOLD = int(os.getenv("RENDER_OFFLOAD_THRESHOLD", 64 * 1024))
+RENDER_MAX_PENDING = int(os.getenv("RENDER_MAX_PENDING", 0)) or None
+RENDER_QUEUE_TIMEOUT = float(os.getenv("RENDER_QUEUE_TIMEOUT", 10))
+LOCAL_CACHE_SIZE = int(os.getenv("LOCAL_CACHE_SIZE", 10000))
+LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", 30))
+HISTORY_SNAPSHOT_INTERVAL = int(os.getenv("HISTORY_SNAPSHOT_INTERVAL", 20))
+HISTORY_DIFF_CACHE_EXPIRE = int(os.getenv("HISTORY_DIFF_CACHE_EXPIRE", 86400))
+HISTORY_KEEP_ALL_DAYS = float(os.getenv("HISTORY_KEEP_ALL_DAYS", 7))
+HISTORY_KEEP_HOURLY_DAYS = float(os.getenv("HISTORY_KEEP_HOURLY_DAYS", 30))
+HISTORY_OUTBOX_BATCH_SIZE = int(os.getenv("HISTORY_OUTBOX_BATCH_SIZE", 500))
+HISTORY_OUTBOX_INTERVAL = float(os.getenv("HISTORY_OUTBOX_INTERVAL", 1))
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -0,0 +1,52 @@
+from src.config.settings import (
+    REDIS_URL,
+    CACHE_ENABLED,
+    CACHE_EXPIRE,
+    LOCAL_CACHE_SIZE,
+    LOCAL_CACHE_TTL,
+    RENDER_CACHE_SIZE,
+    RENDER_BLOCK_CACHE_SIZE,
+    RENDER_CACHE_REDIS,
+    RENDER_CACHE_EXPIRE,
+    RENDER_EXECUTOR,
+    RENDER_WORKERS,
+    RENDER_OFFLOAD_THRESHOLD,
+    RENDER_MAX_PENDING,
+    RENDER_QUEUE_TIMEOUT,
+)
+from src.services.cache import CacheService, LocalCache
+from src.services.redis import RedisCache
+from src.services.render_cache import RenderCache
+from src.services.render_executor import RenderExecutor
+
+cache_service = CacheService(
+    RedisCache(REDIS_URL),
+    CACHE_ENABLED,
+    CACHE_EXPIRE,
+    LocalCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL),
+)
+
+render_executor = RenderExecutor(
+    RENDER_EXECUTOR,
+    RENDER_WORKERS,
+    RENDER_OFFLOAD_THRESHOLD,
+    RENDER_MAX_PENDING,
+    RENDER_QUEUE_TIMEOUT,
+)
+
+render_cache = RenderCache(
+    cache_service,
+    RENDER_CACHE_SIZE,
+    RENDER_CACHE_REDIS,
+    RENDER_CACHE_EXPIRE,
+    RENDER_BLOCK_CACHE_SIZE,
+    render_executor,
+)
+
+
+def get_cache_service() -> CacheService:
+    return cache_service
+
+
+def get_render_cache() -> RenderCache:
+    return render_cache
@@ -0,0 +1,7 @@
+from src.common.db.connection import Connection
+from src.services.export import ExportService
+
+
+def get_export_service() -> ExportService:
+    export_service = ExportService(Connection.get_session_factory())
+    return export_service
@@ -2,15 +2,21 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
+from src.dependencies.cache import get_cache_service
 from src.repositories.folder import FolderRepository
 from src.repositories.note import NoteRepository
+from src.services.cache import CacheService
 from src.services.folder import FolderService
 
 
 def get_folder_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
 ) -> FolderService:
     folder_repository: FolderRepository = FolderRepository(session)
     note_repository: NoteRepository = NoteRepository(session)
-    folder_service = FolderService(folder_repository, note_repository)
+    folder_service = FolderService(
+        folder_repository, note_repository, cache, UnitOfWork(session)
+    )
     return folder_service
@@ -2,13 +2,19 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.dependencies.cache import get_cache_service
 from src.repositories.history import HistoryRepository
+from src.services.cache import CacheService
 from src.services.history import HistoryService
+from src.services.history_outbox import HistoryOutbox
+
+history_outbox = HistoryOutbox(Connection.get_session_factory())
 
 
 def get_history_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
 ) -> HistoryService:
     history_repository: HistoryRepository = HistoryRepository(session)
-    history_service = HistoryService(history_repository)
+    history_service = HistoryService(history_repository, cache)
     return history_service
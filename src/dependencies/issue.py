@@ -2,15 +2,24 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
+from src.dependencies.cache import get_cache_service
 from src.repositories.history import HistoryRepository
 from src.repositories.issue import IssueRepository
+from src.services.cache import CacheService
+from src.services.history import HistoryService
 from src.services.issue import IssueService
 
 
 def get_issue_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
 ) -> IssueService:
     issue_repository: IssueRepository = IssueRepository(session)
     history_repository: HistoryRepository = HistoryRepository(session)
-    issue_service = IssueService(issue_repository, history_repository)
+    issue_service = IssueService(
+        issue_repository,
+        HistoryService(history_repository, cache),
+        UnitOfWork(session),
+    )
     return issue_service
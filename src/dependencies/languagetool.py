@@ -2,21 +2,28 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
+from src.dependencies.cache import get_cache_service
 from src.repositories.history import HistoryRepository
 from src.repositories.issue import IssueRepository
+from src.services.cache import CacheService
+from src.services.history import HistoryService
 from src.services.issue import IssueService
 from src.services.languagetool import LanguageToolService
 
 
 def get_languagetool_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
 ) -> LanguageToolService:
     history_repository: HistoryRepository = HistoryRepository(session)
+    history_service: HistoryService = HistoryService(history_repository, cache)
+    unit_of_work = UnitOfWork(session)
     issue_service: IssueService = IssueService(
-        IssueRepository(session), history_repository
+        IssueRepository(session), history_service, unit_of_work
     )
     languagetool_service: LanguageToolService = LanguageToolService(
-        history_repository, issue_service
+        history_repository, issue_service, history_service, unit_of_work
     )
 
     return languagetool_service
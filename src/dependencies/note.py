@@ -2,22 +2,34 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
+from src.dependencies.cache import get_cache_service, get_render_cache
 from src.repositories.history import HistoryRepository
 from src.repositories.note import NoteRepository
 from src.repositories.tag import TagRepository
 from src.repositories.user import UserRepository
+from src.services.cache import CacheService
 from src.services.history import HistoryService
 from src.services.note import NoteService
+from src.services.render_cache import RenderCache
 
 
 def get_note_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
+    render_cache: RenderCache = Depends(get_render_cache),
 ) -> NoteService:
     note_repository: NoteRepository = NoteRepository(session)
     user_repository: UserRepository = UserRepository(session)
     tag_repository: TagRepository = TagRepository(session)
-    history_service = HistoryService(HistoryRepository(session))
+    history_service = HistoryService(HistoryRepository(session), cache)
     note_service = NoteService(
-        note_repository, user_repository, tag_repository, history_service
+        note_repository,
+        user_repository,
+        tag_repository,
+        history_service,
+        cache,
+        render_cache,
+        UnitOfWork(session),
     )
     return note_service
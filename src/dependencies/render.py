@@ -2,11 +2,21 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.dependencies.cache import get_render_cache
+from src.dependencies.note import get_note_service
 from src.repositories.note import NoteRepository
+from src.services.note import NoteService
 from src.services.render import RenderService
+from src.services.render_cache import RenderCache
 
 
-def get_render_service(session: AsyncSession = Depends(Connection.get_session)):
+def get_render_service(
+    session: AsyncSession = Depends(Connection.get_session),
+    render_cache: RenderCache = Depends(get_render_cache),
+    note_service: NoteService = Depends(get_note_service),
+):
     note_repository: NoteRepository = NoteRepository(session)
-    render_service: RenderService = RenderService(note_repository)
+    render_service: RenderService = RenderService(
+        note_repository, render_cache, note_service
+    )
     return render_service
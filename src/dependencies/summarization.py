@@ -2,11 +2,16 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.dependencies.cache import get_cache_service
 from src.repositories.note import NoteRepository
+from src.services.cache import CacheService
 from src.services.summarization import SummarizeNotes
 
 
-def get_summarization_service(session: AsyncSession = Depends(Connection.get_session)):
+def get_summarization_service(
+    session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
+):
     note_repository = NoteRepository(session)
-    summarize_service = SummarizeNotes(note_repository)
+    summarize_service = SummarizeNotes(note_repository, cache)
     return summarize_service
@@ -2,13 +2,21 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
+from src.dependencies.cache import get_cache_service
+from src.repositories.note import NoteRepository
 from src.repositories.tag import TagRepository
+from src.services.cache import CacheService
 from src.services.tag import TagService
 
 
 def get_tag_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
 ) -> TagService:
     tag_repository: TagRepository = TagRepository(session)
-    tag_service = TagService(tag_repository)
+    note_repository: NoteRepository = NoteRepository(session)
+    tag_service = TagService(
+        tag_repository, note_repository, cache, UnitOfWork(session)
+    )
     return tag_service
@@ -2,13 +2,17 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.db.connection import Connection
+from src.common.db.unit_of_work import UnitOfWork
+from src.dependencies.cache import get_cache_service
 from src.repositories.user import UserRepository
+from src.services.cache import CacheService
 from src.services.user import UserService
 
 
 def get_user_service(
     session: AsyncSession = Depends(Connection.get_session),
+    cache: CacheService = Depends(get_cache_service),
 ) -> UserService:
     user_repository: UserRepository = UserRepository(session)
-    user_service = UserService(user_repository)
+    user_service = UserService(user_repository, cache, UnitOfWork(session))
     return user_service
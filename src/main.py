@@ -1,5 +1,10 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from src.dependencies.cache import cache_service, render_executor
+from src.dependencies.history import history_outbox
 from src.routes.user import router as user_router
 from src.routes.note import router as note_router
 from src.routes.history import router as history_router
@@ -44,6 +49,23 @@ tags_metadata = [
     },
 ]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    This method runs the background tasks of the application, the cache invalidations listener keeps the in-process
+    cache of this worker in sync with the writes handled by the other workers, and the history outbox is drained to
+    History. The render pool is stopped on shutdown, after the last versions are drained.
+    """
+    invalidations_listener = asyncio.create_task(cache_service.listen_invalidations())
+    outbox_drainer = asyncio.create_task(history_outbox.run())
+    yield
+    invalidations_listener.cancel()
+    outbox_drainer.cancel()
+    await history_outbox.drain()
+    render_executor.shutdown()
+
+
 app = FastAPI(
     title="Revisionary",
     description="Backend service that allows users to manage their notes.",
@@ -53,6 +75,7 @@ app = FastAPI(
         "email": "kareem@example.com",
     },
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
 )
 
 app.include_router(user_router, prefix="/user", tags=["Users"])
@@ -1,21 +1,26 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from src.common.db.connection import Connection
+from src.models.history_blob import HistoryBlob
 from src.models.issue import Issue
 from src.models.note import Note
 
 
 class History(Connection.get_base()):
     __tablename__ = "History"
+    # the versions of a note are listed by keyset pagination on the id
+    __table_args__ = (Index("ix_History_note_id_id", "note_id", "id"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     rev_description = Column(String, nullable=False, default="")
     note_id = Column(Integer, ForeignKey("Notes.id", ondelete="CASCADE"))
     note_title = Column(String, nullable=False)
-    note_content = Column(Text, nullable=False, default="")
+    content_hash = Column(
+        String(64), ForeignKey("HistoryBlobs.hash"), nullable=False, index=True
+    )
     created_at = Column(DateTime, default=datetime.utcnow)
     deleted = Column(Integer, nullable=False, server_default="0")
     issues = relationship(
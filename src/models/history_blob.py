@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, Text
+
+from src.common.db.connection import Connection
+
+
+class HistoryBlob(Connection.get_base()):
+    __tablename__ = "HistoryBlobs"
+
+    # the SHA-256 of the content, identical contents are stored once whatever the note or version
+    hash = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False, default=0)
+    # a blob is stored either in full (content) or as a delta from its base blob (delta), blobs are never changed
+    content = Column(Text, nullable=True)
+    delta = Column(Text, nullable=True)
+    base_hash = Column(
+        String(64), ForeignKey("HistoryBlobs.hash"), nullable=True, index=True
+    )
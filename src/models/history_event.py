@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from src.common.db.connection import Connection
+
+
+class HistoryEvent(Connection.get_base()):
+    """A version of a note waiting in the outbox, it is written with the note and moved to History in batches."""
+
+    __tablename__ = "HistoryOutbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    note_id = Column(Integer, ForeignKey("Notes.id", ondelete="CASCADE"))
+    note_title = Column(String, nullable=False)
+    content_hash = Column(String(64), ForeignKey("HistoryBlobs.hash"), nullable=False)
+    rev_description = Column(String, nullable=False, default="")
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -11,6 +11,8 @@ class Note(Connection.get_base()):
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String, nullable=False, default="unnamed_note")
     content = Column(Text, default="")
+    content_hash = Column(String(64), nullable=True)
+    rendered_html = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("Users.id"), nullable=False)
     parent_id = Column(Integer, ForeignKey("Folders.id"), default=0, nullable=False)
     deleted = Column(Integer, nullable=False, default=0)
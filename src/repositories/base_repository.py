@@ -1,5 +1,5 @@
 from typing import TypeVar, Generic, List, Optional
-from sqlalchemy import select
+from sqlalchemy import select, update, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 T = TypeVar("T")
@@ -14,10 +14,27 @@ class BaseRepository(Generic[T]):
 
     async def create(self, obj: T) -> T:
         self.session.add(obj)
-        await self.session.commit()
-        await self.session.refresh(obj)
+        # the id is needed before the commit, by the response or the rows that reference the object
+        await self.session.flush()
         return obj
 
+    def paginate(self, query: Select, limit: int | None, after: int | None) -> Select:
+        """
+        This method applies keyset pagination on the id of the model, so the cost of a page doesn't depend on how deep
+        the client pages.
+
+        :param query: The query to paginate.
+        :param limit: The maximum number of rows to return, None returns all rows.
+        :param after: The id of the last row of the previous page (the cursor).
+        :return: The paginated query.
+        """
+        if after is not None:
+            query = query.where(self.model.id > after)
+        query = query.order_by(self.model.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
     async def get_all(self) -> List[T]:
         query = select(self.model).where(self.model.deleted == 0)
         res = await self.session.execute(query)
@@ -31,9 +48,9 @@ class BaseRepository(Generic[T]):
         return res.scalars().first()
 
     async def delete(self, obj_id: int) -> bool:
-        obj = await self.get_by_id(obj_id)
-        if obj:
-            obj.deleted = 1
-            await self.session.commit()
-            return True
-        return False
+        res = await self.session.execute(
+            update(self.model)
+            .where((self.model.deleted == 0) & (self.model.id == obj_id))
+            .values(deleted=1)
+        )
+        return res.rowcount > 0
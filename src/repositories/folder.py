@@ -1,20 +1,30 @@
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import all_, func, literal, select
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.orm import selectinload
 
 from src.models.folder import Folder
 from src.models.note import Note
 from src.repositories.base_repository import BaseRepository
+from src.schemas.folder import FolderTreeNotes
 
 
 class FolderRepository(BaseRepository[Folder]):
     def __init__(self, session):
         super().__init__(session, Folder)
 
+    async def get_by_id(self, folder_id: int) -> Optional[Folder]:
+        query = (
+            select(Folder)
+            .where((Folder.deleted == 0) & (Folder.id == folder_id))
+            .options(selectinload(Folder.parent))
+        )
+        res = await self.session.execute(query)
+        return res.scalars().first()
+
     async def rename_folder(self, stored_folder: Folder, new_name: str) -> Folder:
         stored_folder.name = new_name
-        await self.session.commit()
-        await self.session.refresh(stored_folder)
+        await self.session.flush()
         return stored_folder
 
     async def get_folder_by_name_parent(
@@ -25,3 +35,59 @@ class FolderRepository(BaseRepository[Folder]):
         )
         res = await self.session.execute(query)
         return res.scalars().first()
+
+    async def get_tree(
+        self, folder_id: int, depth: Optional[int], notes: FolderTreeNotes = "none"
+    ) -> List:
+        """
+        This method loads a folder and all its subfolders in one recursive query. Each folder carries the path of ids
+        from the root of the tree, a folder already in the path isn't loaded again, so a cycle in the parent links
+        (the root folder is its own parent) can't make the query recurse forever.
+
+        :param folder_id: The id of the root folder of the tree.
+        :param depth: The number of levels of subfolders to load, None to load them all.
+        :param notes: "count" to add the number of notes of each folder, "titles" to add a row per note.
+        :return: The folders (id, name, parent_id, depth) ordered by depth, then the count of their notes or a row per
+        note (note_id, note_title) with the folders without notes having None.
+        """
+        tree = (
+            select(
+                Folder.id,
+                Folder.name,
+                Folder.parent_id,
+                literal(0).label("depth"),
+                array([Folder.id]).label("path"),
+            )
+            .where((Folder.id == folder_id) & (Folder.deleted == 0))
+            .cte("tree", recursive=True)
+        )
+        children = Folder.parent_id == tree.c.id
+        children &= (Folder.deleted == 0) & (Folder.id != all_(tree.c.path))
+        if depth is not None:
+            children &= tree.c.depth < depth
+        tree = tree.union_all(
+            select(
+                Folder.id,
+                Folder.name,
+                Folder.parent_id,
+                tree.c.depth + 1,
+                tree.c.path.concat(Folder.id),
+            ).join(tree, children)
+        )
+
+        query = select(tree.c.id, tree.c.name, tree.c.parent_id, tree.c.depth)
+        order = [tree.c.depth, tree.c.id]
+        if notes == "count":
+            notes_count = (
+                select(func.count(Note.id))
+                .where((Note.parent_id == tree.c.id) & (Note.deleted == 0))
+                .scalar_subquery()
+            )
+            query = query.add_columns(notes_count.label("notes_count"))
+        elif notes == "titles":
+            query = query.add_columns(
+                Note.id.label("note_id"), Note.title.label("note_title")
+            ).outerjoin(Note, (Note.parent_id == tree.c.id) & (Note.deleted == 0))
+            order.append(Note.id)
+        res = await self.session.execute(query.order_by(*order))
+        return res.all()
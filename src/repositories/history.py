@@ -1,7 +1,16 @@
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Row, delete, exists, func, literal, select
+from sqlalchemy.orm import aliased
 
 from src.models.history import History
+from src.config.definitions import HISTORY_BLOBS_LOCK, HISTORY_OUTBOX_LOCK
+from src.models.history_blob import HistoryBlob
+from src.models.history_event import HistoryEvent
+from src.models.issue import Issue
+from src.models.note import Note
 from src.repositories.base_repository import BaseRepository
 
 
@@ -9,12 +18,334 @@ class HistoryRepository(BaseRepository[History]):
     def __init__(self, session: AsyncSession):
         super().__init__(session, History)
 
-    async def get_all_note_versions(self, note_id: int) -> list[History]:
+    async def get_all_note_versions(
+        self, note_id: int, limit: int | None = None, after: int | None = None
+    ) -> list[History]:
+        query = select(History).where(History.note_id == note_id)
+        res = await self.session.execute(self.paginate(query, limit, after))
+        return res.scalars().all()
+
+    async def get_note_versions_summary(
+        self, note_id: int, limit: int | None = None, after: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        This method gets a page of the versions of a note for list views, the length of the content is read from its
+        blob, so the content is never read.
+
+        :param note_id: The id of the note.
+        :param limit: The maximum number of versions to return.
+        :param after: The id of the last version of the previous page.
+        :return: The summaries of the versions as dictionaries.
+        """
+        query = (
+            select(
+                History.id,
+                History.rev_description,
+                History.note_id,
+                History.created_at,
+                HistoryBlob.size.label("content_length"),
+            )
+            .join(HistoryBlob, HistoryBlob.hash == History.content_hash)
+            .where(History.note_id == note_id)
+        )
+        res = await self.session.execute(self.paginate(query, limit, after))
+        return res.mappings().all()
+
+    async def lock_blobs(self):
+        """
+        This method takes the shared lock of the blobs until the end of the transaction, a write takes it before it
+        finds the blobs it reuses, so they can't be deleted as unused before the write commits its versions.
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock_shared(HISTORY_BLOBS_LOCK))
+        )
+
+    async def blob_exists(self, content_hash: str) -> bool:
+        res = await self.session.execute(
+            select(HistoryBlob.hash).where(HistoryBlob.hash == content_hash)
+        )
+        return res.first() is not None
+
+    async def get_latest_content_hash(self, note_id: int) -> str | None:
+        """
+        This method gets the content hash of the latest version of a note, the versions still in the outbox are newer
+        than the versions in History.
+
+        :param note_id: The id of the note.
+        :return: The content hash, None if the note has no version.
+        """
+        pending = (
+            select(HistoryEvent.content_hash)
+            .where(HistoryEvent.note_id == note_id)
+            .order_by(HistoryEvent.id.desc())
+            .limit(1)
+        )
+        latest = (
+            select(History.content_hash)
+            .where(History.note_id == note_id)
+            .order_by(History.id.desc())
+            .limit(1)
+        )
+        res = await self.session.execute(
+            select(func.coalesce(pending.scalar_subquery(), latest.scalar_subquery()))
+        )
+        return res.scalar()
+
+    async def get_blob_chains(self, content_hashes: list[str]) -> list[Row]:
+        """
+        This method gets blobs and the blobs they are based on, back to the blobs stored in full, in one recursive
+        query.
+
+        :param content_hashes: The hashes of the blobs.
+        :return: The blobs (hash, base_hash, content, delta) of the chains, in no particular order.
+        """
+        columns = (
+            HistoryBlob.hash,
+            HistoryBlob.base_hash,
+            HistoryBlob.content,
+            HistoryBlob.delta,
+        )
+        chain = (
+            select(*columns)
+            .where(HistoryBlob.hash.in_(content_hashes))
+            .cte(recursive=True)
+        )
+        # union drops the blobs shared by many chains
+        chain = chain.union(
+            select(*columns).join(chain, HistoryBlob.hash == chain.c.base_hash)
+        )
+        res = await self.session.execute(select(chain))
+        return res.all()
+
+    async def add_blob(self, blob: dict):
+        """
+        This method stores a blob if no blob has the same hash.
+
+        :param blob: The columns of the blob.
+        """
+        await self.session.execute(
+            insert(HistoryBlob).values(**blob).on_conflict_do_nothing()
+        )
+
+    async def get_stored_blobs(self, content_hashes: list[str]) -> set[str]:
+        if not content_hashes:
+            return set()
+        res = await self.session.execute(
+            select(HistoryBlob.hash).where(HistoryBlob.hash.in_(content_hashes))
+        )
+        return set(res.scalars().all())
+
+    async def get_blobs_depths(self, content_hashes: list[str]) -> dict[str, int]:
+        """
+        This method counts the deltas to apply to rebuild many blobs, in one recursive query that doesn't read the
+        contents.
+
+        :param content_hashes: The hashes of the blobs.
+        :return: The number of deltas of each blob found.
+        """
+        if not content_hashes:
+            return {}
+        chain = (
+            select(
+                HistoryBlob.hash.label("start"),
+                HistoryBlob.base_hash,
+                literal(0).label("depth"),
+            )
+            .where(HistoryBlob.hash.in_(content_hashes))
+            .cte(recursive=True)
+        )
+        chain = chain.union_all(
+            select(chain.c.start, HistoryBlob.base_hash, chain.c.depth + 1).join(
+                chain, HistoryBlob.hash == chain.c.base_hash
+            )
+        )
+        res = await self.session.execute(
+            select(chain.c.start, func.max(chain.c.depth)).group_by(chain.c.start)
+        )
+        return dict(res.all())
+
+    async def add_blobs(self, blobs: list[dict]):
+        """
+        This method stores many blobs, the blobs already stored by another transaction are skipped.
+
+        :param blobs: The columns of the blobs.
+        """
+        if blobs:
+            await self.session.execute(
+                insert(HistoryBlob).on_conflict_do_nothing(), blobs
+            )
+
+    async def add_events(self, events: list[dict]):
+        """
+        This method adds many versions to the outbox, the rows of their notes shall already be locked by the write, like
+        by NoteRepository.get_notes_contents, see add_event.
+
+        :param events: The columns of the versions.
+        """
+        if events:
+            await self.session.execute(insert(HistoryEvent), events)
+
+    async def add_event(self, event: HistoryEvent):
+        """
+        This method adds a version to the outbox. The row of the note is locked first, so the versions of a note get
+        their outbox ids in the order their transactions commit.
+
+        :param event: The version.
+        """
+        await self.session.execute(
+            select(Note.id).where(Note.id == event.note_id).with_for_update()
+        )
+        self.session.add(event)
+
+    async def lock_outbox(self) -> bool:
+        """
+        This method takes the lock of the outbox until the end of the transaction, only one worker drains it at a
+        time so two drainers never interleave the versions of a note.
+
+        :return: True if the lock was taken, False if another worker holds it.
+        """
+        res = await self.session.execute(
+            select(func.pg_try_advisory_xact_lock(HISTORY_OUTBOX_LOCK))
+        )
+        return res.scalar_one()
+
+    async def get_outbox_events(self, limit: int) -> list[Row]:
         res = await self.session.execute(
-            select(History).where(History.note_id == note_id)
+            select(
+                HistoryEvent.id,
+                HistoryEvent.note_id,
+                HistoryEvent.note_title,
+                HistoryEvent.content_hash,
+                HistoryEvent.rev_description,
+                HistoryEvent.created_at,
+            )
+            .order_by(HistoryEvent.id)
+            .limit(limit)
+        )
+        return res.all()
+
+    async def move_outbox_events(self, events: list[Row]):
+        """
+        This method inserts the versions of the outbox in History, in the order of their outbox ids, and removes them
+        from the outbox in the same transaction.
+
+        :param events: The versions, as returned by get_outbox_events.
+        """
+        await self.session.execute(
+            insert(History),
+            [
+                {
+                    "note_id": event.note_id,
+                    "note_title": event.note_title,
+                    "content_hash": event.content_hash,
+                    "rev_description": event.rev_description,
+                    "created_at": event.created_at,
+                }
+                for event in events
+            ],
+        )
+        await self.session.execute(
+            delete(HistoryEvent).where(
+                HistoryEvent.id.in_([event.id for event in events])
+            )
         )
+
+    async def get_note_content_hash(self, note_id: int) -> Row | None:
+        res = await self.session.execute(
+            select(Note.content_hash).where((Note.deleted == 0) & (Note.id == note_id))
+        )
+        return res.first()
+
+    async def get_note_content(self, note_id: int) -> str:
+        res = await self.session.execute(
+            select(func.coalesce(Note.content, "")).where(Note.id == note_id)
+        )
+        return res.scalar_one()
+
+    async def get_versioned_notes(
+        self, limit: int, after: int | None = None
+    ) -> list[int]:
+        """
+        This method gets a page of the ids of the notes that have versions.
+
+        :param limit: The maximum number of notes to return.
+        :param after: The id of the last note of the previous page.
+        :return: The ids of the notes.
+        """
+        query = select(History.note_id).distinct().where(History.note_id.is_not(None))
+        if after is not None:
+            query = query.where(History.note_id > after)
+        res = await self.session.execute(query.order_by(History.note_id).limit(limit))
         return res.scalars().all()
 
+    async def get_versions_retention(self, note_ids: list[int]) -> list[Row]:
+        """
+        This method gets what the retention policy needs to know about the versions of some notes, without their
+        contents.
+
+        :param note_ids: The ids of the notes.
+        :return: Rows with the id, note_id, created_at, deleted and pinned (if the version has issues) of the versions.
+        """
+        pinned = exists().where(Issue.version_id == History.id)
+        res = await self.session.execute(
+            select(
+                History.id,
+                History.note_id,
+                History.created_at,
+                History.deleted,
+                pinned.label("pinned"),
+            ).where(History.note_id.in_(note_ids))
+        )
+        return res.all()
+
+    async def delete_versions(self, version_ids: list[int]) -> list[Row]:
+        """
+        This method deletes versions, their blobs are kept.
+
+        :param version_ids: The ids of the versions.
+        :return: Rows with the content_hash of each deleted version and the size of its title and description.
+        """
+        res = await self.session.execute(
+            delete(History)
+            .where(History.id.in_(version_ids))
+            .returning(
+                History.content_hash,
+                (
+                    func.octet_length(History.note_title)
+                    + func.octet_length(History.rev_description)
+                ).label("size"),
+            )
+        )
+        return res.all()
+
+    async def delete_unused_blobs(self, content_hashes: list[str]) -> list[Row]:
+        """
+        This method deletes the blobs no version, in History or in the outbox, uses and no other blob is based on. The
+        lock of the blobs is taken first, it waits for the writes that may reuse a blob to commit, see lock_blobs.
+
+        :param content_hashes: The hashes of the blobs that may be unused.
+        :return: Rows with the base_hash and the size of the stored content or delta of each deleted blob.
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(HISTORY_BLOBS_LOCK))
+        )
+        based_blob = aliased(HistoryBlob)
+        res = await self.session.execute(
+            delete(HistoryBlob)
+            .where(
+                HistoryBlob.hash.in_(content_hashes),
+                ~exists().where(History.content_hash == HistoryBlob.hash),
+                ~exists().where(HistoryEvent.content_hash == HistoryBlob.hash),
+                ~exists().where(based_blob.base_hash == HistoryBlob.hash),
+            )
+            .returning(
+                HistoryBlob.base_hash,
+                func.octet_length(
+                    func.coalesce(HistoryBlob.content, HistoryBlob.delta)
+                ).label("size"),
+            )
+        )
+        return res.all()
+
     async def update_version(self, version: History):
-        await self.session.commit()
-        await self.session.refresh(version)
+        await self.session.flush()
@@ -16,5 +16,4 @@ class IssueRepository(BaseRepository[Issue]):
         return res.scalars().all()
 
     async def update_issue(self, issue: Issue):
-        await self.session.commit()
-        await self.session.refresh(issue)
+        await self.session.flush()
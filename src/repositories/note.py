@@ -1,9 +1,13 @@
-from typing import List, Optional
-from sqlalchemy import insert, select, update
+from typing import Any, AsyncIterator, List, Optional
+from sqlalchemy import Row, case, delete, func, insert, select, update
 from sqlalchemy.orm import selectinload
 
+from src.config.definitions import NOTE_EXCERPT_LENGTH
+from src.models.folder import Folder
 from src.models.note import Note
 from src.models.note_tag import note_tags
+from src.models.tag import Tag
+from src.models.user import User
 from src.schemas.note import NoteUpdate
 from src.repositories.base_repository import BaseRepository, T
 
@@ -26,10 +30,14 @@ class NoteRepository(BaseRepository[Note]):
         note = res.scalars().first()
         return note
 
-    async def get_all(self) -> List[T]:
+    async def get_all(
+        self, limit: int | None = None, after: int | None = None
+    ) -> List[T]:
         """
         This method to get all note from the database where deleted field is set to be 0.
 
+        :param limit: The maximum number of notes to return.
+        :param after: The id of the last note of the previous page.
         :return: All notes found inside the database.
         """
         query = (
@@ -41,20 +49,222 @@ class NoteRepository(BaseRepository[Note]):
                 selectinload(Note.user),
             )
         )
-        res = await self.session.execute(query)
+        res = await self.session.execute(self.paginate(query, limit, after))
         notes = res.scalars().all()
         return notes
 
+    async def get_content_hash(self, note_id: int) -> Optional[Row]:
+        """
+        This method gets only the stored content hash of a note, used to answer conditional requests without loading
+        the note.
+
+        :param note_id: The id of the note.
+        :return: A row with the id and the content_hash of the note (None if it isn't computed yet), or None if the
+        note is not found.
+        """
+        res = await self.session.execute(
+            select(Note.id, Note.content_hash).where(
+                (Note.deleted == 0) & (Note.id == note_id)
+            )
+        )
+        return res.first()
+
+    async def get_content(self, note_id: int) -> Optional[str]:
+        """
+        This method gets only the content of a note, without its relations, used to render a note without stored HTML.
+
+        :param note_id: The id of the note.
+        :return: The content of the note, or None if the note is not found.
+        """
+        res = await self.session.execute(
+            select(Note.content).where((Note.deleted == 0) & (Note.id == note_id))
+        )
+        return res.scalar_one_or_none()
+
+    async def get_rendered(self, note_id: int) -> Optional[Row]:
+        """
+        This method gets only the stored content hash and rendered HTML of a note, without its content or relations.
+
+        :param note_id: The id of the note.
+        :return: A row with the content_hash and rendered_html of the note, or None if the note is not found.
+        """
+        res = await self.session.execute(
+            select(Note.content_hash, Note.rendered_html).where(
+                (Note.deleted == 0) & (Note.id == note_id)
+            )
+        )
+        return res.first()
+
+    async def get_notes_rendered(
+        self,
+        note_ids: List[int] | None = None,
+        folder_id: int | None = None,
+        limit: int | None = None,
+        after: int | None = None,
+    ) -> List[Row]:
+        """
+        This method gets the stored content hash and rendered HTML of many notes in one query, the content is only
+        selected for the notes missing them.
+
+        :param note_ids: Only return the notes with these ids.
+        :param folder_id: Only return the notes inside this folder.
+        :param limit: The maximum number of notes to return.
+        :param after: The id of the last note of the previous page.
+        :return: Rows with the id, content_hash, rendered_html and content (None if not needed) of the notes.
+        """
+        missing = Note.content_hash.is_(None) | Note.rendered_html.is_(None)
+        query = select(
+            Note.id,
+            Note.content_hash,
+            Note.rendered_html,
+            case((missing, func.coalesce(Note.content, ""))).label("content"),
+        ).where(Note.deleted == 0)
+        if note_ids is not None:
+            query = query.where(Note.id.in_(note_ids))
+        if folder_id is not None:
+            query = query.where(Note.parent_id == folder_id)
+
+        res = await self.session.execute(self.paginate(query, limit, after))
+        return res.all()
+
+    async def get_notes_to_render(
+        self, limit: int, after: int | None = None, only_missing: bool = True
+    ) -> List[Row]:
+        """
+        This method gets a page of the notes whose content hash or rendered HTML isn't stored yet.
+
+        :param limit: The maximum number of notes to return.
+        :param after: The id of the last note of the previous page.
+        :param only_missing: If False, all the notes are returned, used to render them again with another engine.
+        :return: Rows with the id and the content of the notes.
+        """
+        query = select(Note.id, func.coalesce(Note.content, "").label("content"))
+        if only_missing:
+            query = query.where(
+                Note.content_hash.is_(None) | Note.rendered_html.is_(None)
+            )
+        res = await self.session.execute(self.paginate(query, limit, after))
+        return res.all()
+
+    async def set_rendered(self, rendered: List[dict[str, Any]]) -> None:
+        """
+        This method stores the content hash and the rendered HTML of many notes in one statement.
+
+        :param rendered: Dictionaries with the id, content_hash and rendered_html of the notes.
+        """
+        if not rendered:
+            return
+        await self.session.execute(update(Note), rendered)
+
     async def update_note(self, stored_note: Note, note: NoteUpdate) -> Note:
+        """
+        This method applies the changes to a note.
+
+        :param stored_note: The note.
+        :param note: The changes, the unset fields are not changed.
+        :return: The changed note.
+        """
         update_data = note.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(stored_note, field, value)
 
-        await self.session.commit()
-        await self.session.refresh(stored_note)
         return stored_note
 
-    async def get_user_notes(self, user_id: int) -> List[Note]:
+    async def restore_note(self, note_id: int, values: dict[str, Any]) -> bool:
+        """
+        This method overwrites the title, content, content hash and rendered HTML of a note in one statement.
+
+        :param note_id: The id of the note.
+        :param values: The new values of the columns.
+        :return: True if the note was found, else False.
+        """
+        res = await self.session.execute(
+            update(Note)
+            .where((Note.deleted == 0) & (Note.id == note_id))
+            .values(**values)
+            .returning(Note.id)
+        )
+        return res.scalar_one_or_none() is not None
+
+    async def get_parents_ids(self, folder_ids: list[int]) -> set[int]:
+        """
+        This method checks many folders in one query.
+
+        :param folder_ids: The ids of the folders.
+        :return: The ids of the folders found with deleted field set to 0.
+        """
+        if not folder_ids:
+            return set()
+        res = await self.session.execute(
+            select(Folder.id).where(Folder.id.in_(folder_ids) & (Folder.deleted == 0))
+        )
+        return set(res.scalars().all())
+
+    async def get_notes_contents(self, note_ids: list[int]) -> list[Row]:
+        """
+        This method gets the title and the content of many notes in one query, without their relationships. The rows
+        are locked until the end of the transaction, in the order of their ids so two writes can't deadlock, the
+        versions of the notes are then queued in the order their writes commit, even when a note isn't changed.
+
+        :param note_ids: The ids of the notes.
+        :return: Rows with the id, title, content and content_hash of the notes found with deleted field set to 0.
+        """
+        if not note_ids:
+            return []
+        res = await self.session.execute(
+            select(Note.id, Note.title, Note.content, Note.content_hash)
+            .where(Note.id.in_(note_ids) & (Note.deleted == 0))
+            .order_by(Note.id)
+            .with_for_update()
+        )
+        return res.all()
+
+    async def insert_notes(self, notes: List[dict[str, Any]]) -> List[int]:
+        """
+        This method inserts many notes, the rows are sent in batches of many rows per statement.
+
+        :param notes: Dictionaries with the columns of the notes.
+        :return: The ids of the notes, in the order of the dictionaries.
+        """
+        if not notes:
+            return []
+        res = await self.session.execute(
+            insert(Note).returning(Note.id, sort_by_parameter_order=True), notes
+        )
+        return res.scalars().all()
+
+    async def update_notes(self, notes: List[dict[str, Any]]) -> None:
+        """
+        This method updates many notes by their ids.
+
+        :param notes: Dictionaries with the id and the changed columns of the notes.
+        """
+        if notes:
+            await self.session.execute(update(Note), notes)
+
+    async def add_notes_tags(self, notes_tags: List[dict[str, int]]) -> None:
+        """
+        This method attaches tags to notes.
+
+        :param notes_tags: Dictionaries with the note_id and the tag_id.
+        """
+        if notes_tags:
+            await self.session.execute(insert(note_tags), notes_tags)
+
+    async def remove_notes_tags(self, note_ids: List[int]) -> None:
+        """
+        This method detaches all the tags of many notes in one statement.
+
+        :param note_ids: The ids of the notes.
+        """
+        if note_ids:
+            await self.session.execute(
+                delete(note_tags).where(note_tags.c.note_id.in_(note_ids))
+            )
+
+    async def get_user_notes(
+        self, user_id: int, limit: int | None = None, after: int | None = None
+    ) -> List[Note]:
         query = (
             select(Note)
             .where((Note.deleted == 0) & (Note.user_id == user_id))
@@ -64,20 +274,20 @@ class NoteRepository(BaseRepository[Note]):
                 selectinload(Note.user),
             )
         )
-        res = await self.session.execute(query)
+        res = await self.session.execute(self.paginate(query, limit, after))
         return res.scalars().all()
 
     async def add_tag_note(self, note_id: int, tag_id: int) -> None:
         stmt = insert(note_tags).values(note_id=note_id, tag_id=tag_id)
         await self.session.execute(stmt)
-        await self.session.commit()
 
     async def delete_folder_notes(self, folder_id: int):
         stmt = update(Note).where(Note.parent_id == folder_id).values(deleted=1)
         await self.session.execute(stmt)
-        await self.session.commit()
 
-    async def get_folder_notes(self, folder_id: int) -> List[Note]:
+    async def get_folder_notes(
+        self, folder_id: int, limit: int | None = None, after: int | None = None
+    ) -> List[Note]:
         query = (
             select(Note)
             .where((Note.deleted == 0) & (Note.parent_id == folder_id))
@@ -87,5 +297,127 @@ class NoteRepository(BaseRepository[Note]):
                 selectinload(Note.user),
             )
         )
-        res = await self.session.execute(query)
+        res = await self.session.execute(self.paginate(query, limit, after))
         return res.scalars().all()
+
+    async def get_notes_summary(
+        self,
+        user_id: int | None = None,
+        folder_id: int | None = None,
+        tag_id: int | None = None,
+        limit: int | None = None,
+        after: int | None = None,
+    ) -> List[dict[str, Any]]:
+        """
+        This method gets a page of notes for list views, it selects only the columns needed (id, title, parent, content
+        length and a short excerpt) instead of loading the full note rows, then loads the tags of the page in one query.
+
+        :param user_id: Only return the notes of this user.
+        :param folder_id: Only return the notes inside this folder.
+        :param tag_id: Only return the notes with this tag.
+        :param limit: The maximum number of notes to return.
+        :param after: The id of the last note of the previous page.
+        :return: The summaries of the notes as dictionaries.
+        """
+        content = func.coalesce(Note.content, "")
+        query = (
+            select(
+                Note.id,
+                Note.title,
+                Note.parent_id,
+                Folder.name.label("parent_name"),
+                func.length(content).label("content_length"),
+                func.substr(content, 1, NOTE_EXCERPT_LENGTH).label("excerpt"),
+            )
+            .join(Folder, Folder.id == Note.parent_id)
+            .where(Note.deleted == 0)
+        )
+        if user_id is not None:
+            query = query.where(Note.user_id == user_id)
+        if folder_id is not None:
+            query = query.where(Note.parent_id == folder_id)
+        if tag_id is not None:
+            query = query.join(note_tags, note_tags.c.note_id == Note.id).where(
+                note_tags.c.tag_id == tag_id
+            )
+
+        res = await self.session.execute(self.paginate(query, limit, after))
+        rows = res.all()
+        if not rows:
+            return []
+
+        notes_tags = await self.get_notes_tags([row.id for row in rows])
+
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "parent": {"id": row.parent_id, "name": row.parent_name},
+                "tags": notes_tags.get(row.id, []),
+                "content_length": row.content_length,
+                "excerpt": row.excerpt,
+            }
+            for row in rows
+        ]
+
+    async def get_notes_tags(
+        self, note_ids: List[int]
+    ) -> dict[int, list[dict[str, Any]]]:
+        """
+        This method gets the tags of many notes in one query.
+
+        :param note_ids: The ids of the notes.
+        :return: A dictionary of note id to the list of its tags (id and name).
+        """
+        if not note_ids:
+            return {}
+
+        res = await self.session.execute(
+            select(note_tags.c.note_id, Tag.id, Tag.name)
+            .join(Tag, Tag.id == note_tags.c.tag_id)
+            .where(note_tags.c.note_id.in_(note_ids))
+        )
+        notes_tags: dict[int, list[dict[str, Any]]] = {}
+        for note_id, tag_id, tag_name in res.all():
+            notes_tags.setdefault(note_id, []).append({"id": tag_id, "name": tag_name})
+        return notes_tags
+
+    async def stream_notes(
+        self, batch_size: int
+    ) -> AsyncIterator[List[dict[str, Any]]]:
+        """
+        This method streams all the notes with deleted field set to 0 in batches, the rows are read through a server
+        side cursor, so only one batch is held in memory at a time.
+
+        :param batch_size: The number of notes fetched from the cursor at a time.
+        :return: An async iterator of batches of notes as dictionaries.
+        """
+        query = (
+            select(
+                Note.id,
+                Note.title,
+                func.coalesce(Note.content, "").label("content"),
+                User.username,
+                Note.parent_id,
+                Folder.name.label("parent_name"),
+            )
+            .join(User, User.id == Note.user_id)
+            .join(Folder, Folder.id == Note.parent_id)
+            .where(Note.deleted == 0)
+            .order_by(Note.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for rows in result.partitions(batch_size):
+            notes_tags = await self.get_notes_tags([row.id for row in rows])
+            yield [
+                {
+                    "id": row.id,
+                    "title": row.title,
+                    "content": row.content,
+                    "username": row.username,
+                    "parent": {"id": row.parent_id, "name": row.parent_name},
+                    "tags": notes_tags.get(row.id, []),
+                }
+                for row in rows
+            ]
@@ -1,5 +1,6 @@
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import Select, delete, literal, select
+from sqlalchemy.dialects.postgresql import insert
 
 from src.models.note import Note
 from src.models.note_tag import note_tags
@@ -13,8 +14,7 @@ class TagRepository(BaseRepository[Tag]):
 
     async def rename_tag(self, stored_tag: Tag, new_name: str) -> Tag:
         stored_tag.name = new_name
-        await self.session.commit()
-        await self.session.refresh(stored_tag)
+        await self.session.flush()
         return stored_tag
 
     async def get_tag_notes(self, tag_id: int) -> List[Note]:
@@ -31,6 +31,20 @@ class TagRepository(BaseRepository[Tag]):
         res = await self.session.execute(query)
         return res.scalars().first()
 
+    async def get_tags_ids(self, tag_names: list[str]) -> dict[str, int]:
+        """
+        This method gets the ids of many tags in one query.
+
+        :param tag_names: The names of the tags.
+        :return: The ids of the tags found by their names.
+        """
+        if not tag_names:
+            return {}
+        res = await self.session.execute(
+            select(Tag.name, Tag.id).where(Tag.name.in_(tag_names))
+        )
+        return dict(res.all())
+
     async def validate_tags(self, tag_names: list[str]):
         if not tag_names:
             return True, []
@@ -45,3 +59,59 @@ class TagRepository(BaseRepository[Tag]):
             return False, missing_names
 
         return True, tags
+
+    def select_notes(
+        self, note_ids: Optional[List[int]], folder_id: Optional[int]
+    ) -> Select:
+        """
+        This method builds the query selecting the ids of the notes a tag is attached to or detached from.
+
+        :param note_ids: The ids of the notes, or None to select the notes by their folder.
+        :param folder_id: The id of the folder of the notes.
+        :return: The query.
+        """
+        query = select(Note.id).where(Note.deleted == 0)
+        if note_ids is not None:
+            return query.where(Note.id.in_(note_ids))
+        return query.where(Note.parent_id == folder_id)
+
+    async def attach_notes(
+        self, tag_id: int, note_ids: Optional[List[int]], folder_id: Optional[int]
+    ) -> List[int]:
+        """
+        This method attaches a tag to many notes in one statement, the notes that already have the tag are skipped.
+
+        :param tag_id: The id of the tag.
+        :param note_ids: The ids of the notes, or None to select the notes by their folder.
+        :param folder_id: The id of the folder of the notes.
+        :return: The ids of the notes the tag is attached to.
+        """
+        notes = self.select_notes(note_ids, folder_id).add_columns(literal(tag_id))
+        res = await self.session.execute(
+            insert(note_tags)
+            .from_select(["note_id", "tag_id"], notes)
+            .on_conflict_do_nothing()
+            .returning(note_tags.c.note_id)
+        )
+        return res.scalars().all()
+
+    async def detach_notes(
+        self, tag_id: int, note_ids: Optional[List[int]], folder_id: Optional[int]
+    ) -> List[int]:
+        """
+        This method detaches a tag from many notes in one statement.
+
+        :param tag_id: The id of the tag.
+        :param note_ids: The ids of the notes, or None to select the notes by their folder.
+        :param folder_id: The id of the folder of the notes.
+        :return: The ids of the notes the tag is detached from.
+        """
+        res = await self.session.execute(
+            delete(note_tags)
+            .where(
+                (note_tags.c.tag_id == tag_id)
+                & note_tags.c.note_id.in_(self.select_notes(note_ids, folder_id))
+            )
+            .returning(note_tags.c.note_id)
+        )
+        return res.scalars().all()
@@ -36,6 +36,22 @@ class UserRepository:
         user = res.scalars().first()
         return user
 
+    async def get_users_ids(self, usernames: list[str]) -> dict[str, int]:
+        """
+        This method to get the ids of many users with deleted field set to 0 in one query.
+
+        :param usernames: The names of the users.
+        :return: The ids of the users found by their usernames.
+        """
+        if not usernames:
+            return {}
+        res = await self.session.execute(
+            select(User.username, User.id).where(
+                User.username.in_(usernames) & (User.deleted == 0)
+            )
+        )
+        return dict(res.all())
+
     async def update_user(self, stored_user: User, user: UserUpdate):
         """
         This method to update the user's data.
@@ -48,8 +64,7 @@ class UserRepository:
         for field, value in update_data.items():
             setattr(stored_user, field, value)
 
-        await self.session.commit()
-        await self.session.refresh(user)
+        await self.session.flush()
 
     async def delete_user(self, username: str):
         """
@@ -59,7 +74,7 @@ class UserRepository:
 
         user = await self.get_user_by_username(username)
         user.deleted = 1
-        await self.session.commit()
+        await self.session.flush()
 
     async def add_new_user(self, user: User):
         """
@@ -67,4 +82,4 @@ class UserRepository:
         :param user: The user to be added.
         """
         self.session.add(user)
-        await self.session.commit()
+        await self.session.flush()
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 
 from src.auth.tokens import check_token
+from src.config.definitions import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from src.dependencies.folder import get_folder_service
-from src.schemas.folder import FolderResponse, FolderRequest
-from src.schemas.note import NoteResponse
+from src.schemas.folder import (
+    FolderResponse,
+    FolderRequest,
+    FolderTreeNotes,
+    FolderTreeResponse,
+)
+from src.schemas.note import NoteResponse, NoteFields, NoteSummaryResponse
 from src.services.folder import FolderService
 
 router = APIRouter(dependencies=[Depends(check_token)])
@@ -46,11 +52,51 @@ async def get_folder_by_id(
     return folder
 
 
+@router.get(
+    "/tree/{folder_id}",
+    summary="Get the tree of a folder",
+    description="This endpoint returns a folder with its subfolders nested to the requested depth, loaded in one "
+    "query, notes=count adds the number of notes of each folder and notes=titles adds the ids and titles of its notes",
+    response_model=FolderTreeResponse,
+    response_model_exclude_none=True,
+    response_description="The returned data is the requested folder and its subfolders",
+    responses={
+        200: {"description": "The folder tree requested returned successfully"},
+        404: {"description": "Folder not found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def get_folder_tree(
+    folder_id: int,
+    depth: int | None = Query(
+        default=None, ge=0, description="The levels of subfolders, all if not set"
+    ),
+    notes: FolderTreeNotes = Query(
+        default="none", description="count or titles of the notes of each folder"
+    ),
+    folder_service: FolderService = Depends(get_folder_service),
+):
+    """
+    This method is to get a folder with its subfolders nested to the requested depth, loaded in one query.
+
+    :param folder_id: The id of the root folder of the tree.
+    :param depth: The levels of subfolders to return, all of them if not set.
+    :param notes: none, count to add the number of notes of each folder, or titles to add the ids and titles of
+    its notes.
+    :param folder_service: The folder service to be used to get the tree.
+    :return: The returned value is the folder and its subfolders.
+    """
+    tree = await folder_service.get_folder_tree(folder_id, depth, notes)
+    return tree
+
+
 @router.get(
     "/notes/{folder_id}",
     summary="Get notes folder by its id",
-    description="This endpoint return a folder's notes if available inside the database",
-    response_model=list[NoteResponse],
+    description="This endpoint return a page of a folder's notes if available inside the database, the cursor of "
+    f"the next page is returned in the {NEXT_CURSOR_HEADER} header, fields=summary returns only the summaries of "
+    "the notes",
+    response_model=list[NoteResponse] | list[NoteSummaryResponse],
     response_description="The returned data is the requested folder's notes",
     responses={
         200: {"description": "The notes requested returned successfully"},
@@ -59,9 +105,20 @@ async def get_folder_by_id(
     status_code=status.HTTP_200_OK,
 )
 async def get_folders_notes(
-    folder_id: int, folder_service: FolderService = Depends(get_folder_service)
+    folder_id: int,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = Query(default=None, description="The cursor of the page"),
+    fields: NoteFields = Query(
+        default="full", description="summary returns only the summaries of the notes"
+    ),
+    folder_service: FolderService = Depends(get_folder_service),
 ):
-    notes = await folder_service.get_folder_notes(folder_id)
+    notes, cursor = await folder_service.get_folder_notes(
+        folder_id, limit, after, fields
+    )
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(cursor)
     return notes
 
 
@@ -3,7 +3,6 @@ from fastapi import APIRouter, Depends, status
 from src.auth.tokens import check_token
 from src.dependencies.issue import get_issue_service
 from src.dependencies.languagetool import get_languagetool_service
-from src.models.history import History
 from src.schemas.history import HistoryResponse
 from src.services.issue import IssueService
 from src.services.languagetool import LanguageToolService
@@ -47,5 +46,5 @@ async def check_version_grammar(
 async def fix_issue(
     issue_id: int, issue_service: IssueService = Depends(get_issue_service)
 ):
-    version: History = await issue_service.fix_issue(issue_id)
+    version: HistoryResponse = await issue_service.fix_issue(issue_id)
     return version
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 
 from src.auth.tokens import check_token
+from src.config.definitions import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from src.dependencies.history import get_history_service
 from src.dependencies.issue import get_issue_service
 from src.models.issue import Issue
-from src.schemas.history import HistoryResponse
+from src.common.utils.diff import DiffGranularity
+from src.schemas.history import (
+    HistoryDiffResponse,
+    HistoryFields,
+    HistoryResponse,
+    HistorySummaryResponse,
+)
 from src.services.history import HistoryService
 from src.services.issue import IssueService
 
@@ -14,8 +21,10 @@ router = APIRouter(dependencies=[Depends(check_token)])
 @router.get(
     "/{note_id}",
     summary="Get note's history  by its id",
-    description="This endpoint returns note's history if available inside the database",
-    response_model=list[HistoryResponse],
+    description="This endpoint returns a page of the note's history if available inside the database, the cursor of "
+    f"the next page is returned in the {NEXT_CURSOR_HEADER} header, fields=summary returns only the metadata of the "
+    "versions",
+    response_model=list[HistoryResponse] | list[HistorySummaryResponse],
     response_description="The returned data is the history of a note",
     responses={
         200: {"description": "All note's history is returned successfully"},
@@ -24,16 +33,32 @@ router = APIRouter(dependencies=[Depends(check_token)])
     status_code=status.HTTP_200_OK,
 )
 async def get_note_history(
-    note_id: int, history_service: HistoryService = Depends(get_history_service)
+    note_id: int,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = Query(default=None, description="The cursor of the page"),
+    fields: HistoryFields = Query(
+        default="full",
+        description="summary returns only the metadata of the versions, without their content",
+    ),
+    history_service: HistoryService = Depends(get_history_service),
 ):
     """
-    This endpoint to get the history and all the previous versions of a certain note.
+    This endpoint to get a page of the history and the previous versions of a certain note.
 
     :param note_id: The id of the note to get its history.
+    :param response: The response to set the next cursor header on.
+    :param limit: The maximum number of versions in the page.
+    :param after: The cursor returned with the previous page.
+    :param fields: The fields to return, full versions or their metadata.
     :param history_service: The service to operate logic for history.
     :return: The history of the note.
     """
-    versions = await history_service.get_note_versions(note_id)
+    versions, cursor = await history_service.get_note_versions(
+        note_id, limit, after, fields
+    )
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(cursor)
     return versions
 
 
@@ -63,6 +88,43 @@ async def get_note_old_version(
     return version
 
 
+@router.get(
+    "/diff/{version_id}",
+    summary="Get the changes of a note's version",
+    description="This endpoint returns the changes from a version of a note to another version (to), or to the "
+    "current note if no other version is given, only the changed parts are returned with their offsets",
+    response_model=HistoryDiffResponse,
+    response_description="The returned data is the changes between the two versions",
+    responses={
+        200: {"description": "The changes are returned successfully"},
+        404: {"description": "Version or note is not found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def get_version_diff(
+    version_id: int,
+    to: int | None = Query(
+        default=None,
+        description="The id of the new version, the current note if not set",
+    ),
+    granularity: DiffGranularity = Query(
+        default="line", description="word compares the replaced lines word by word"
+    ),
+    history_service: HistoryService = Depends(get_history_service),
+):
+    """
+    This endpoint returns the changes from a version of a note to another version or to the current note.
+
+    :param version_id: The id of the old version.
+    :param to: The id of the new version, None to compare with the current note.
+    :param granularity: Compare whole lines or words.
+    :param history_service: The service to operate logic for history.
+    :return: The changes between the two versions.
+    """
+    diff = await history_service.diff_versions(version_id, to, granularity)
+    return diff
+
+
 @router.get(
     "/version/issues/{issue_id}",
     summary="Get version's issues",
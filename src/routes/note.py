@@ -5,12 +5,29 @@ available note, update note's data, and read available notes from
 database.
 """
 
-from fastapi import APIRouter, Depends, Response, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Response, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from src.auth.tokens import check_token
-from src.common.utils.generate_etag import generate_etag
+from src.common.utils.generate_etag import etag_matches
+from src.config.definitions import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    EXPORT_BATCH_SIZE,
+)
+from src.dependencies.export import get_export_service
 from src.dependencies.note import get_note_service
-from src.schemas.note import NoteResponse, NoteRequest, NoteUpdate
+from src.schemas.note import (
+    NoteBulkRequest,
+    NoteBulkResponse,
+    NoteResponse,
+    NoteRequest,
+    NoteUpdate,
+    NoteFields,
+    NoteSummaryResponse,
+)
+from src.services.export import ExportService
 from src.services.note import NoteService
 
 router = APIRouter(dependencies=[Depends(check_token)])
@@ -19,8 +36,9 @@ router = APIRouter(dependencies=[Depends(check_token)])
 @router.get(
     "/",
     summary="Get all notes",
-    description="This endpoint returns all notes available inside the database",
-    response_model=list[NoteResponse],
+    description="This endpoint returns a page of the notes available inside the database, the cursor of the next "
+    f"page is returned in the {NEXT_CURSOR_HEADER} header, fields=summary returns only the summaries of the notes",
+    response_model=list[NoteResponse] | list[NoteSummaryResponse],
     response_description="The returned data are all the notes available inside the database",
     responses={
         200: {"description": "All notes returned successfully"},
@@ -28,17 +46,62 @@ router = APIRouter(dependencies=[Depends(check_token)])
     },
     status_code=status.HTTP_200_OK,
 )
-async def get_all_notes(note_service: NoteService = Depends(get_note_service)):
+async def get_all_notes(
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = Query(default=None, description="The cursor of the page"),
+    fields: NoteFields = Query(
+        default="full", description="summary returns only the summaries of the notes"
+    ),
+    note_service: NoteService = Depends(get_note_service),
+):
     """
-    This method is to get all notes in the database, where deleted field is set to be 0.
+    This method is to get a page of the notes in the database, where deleted field is set to be 0.
 
+    :param response: The response to set the next cursor header on.
+    :param limit: The maximum number of notes in the page.
+    :param after: The cursor returned with the previous page.
+    :param fields: The fields to return, full notes or their summaries.
     :param note_service: The note service to be used to get all notes.
-    :return: The returned value is a list of all available notes inside the database.
+    :return: The returned value is a list of the available notes inside the database.
     """
-    notes = await note_service.get_all_notes()
+    notes, cursor = await note_service.get_all_notes(limit, after, fields)
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(cursor)
     return notes
 
 
+@router.get(
+    "/export",
+    summary="Export all notes",
+    description="This endpoint streams all notes available inside the database as newline-delimited JSON, one note "
+    "per line",
+    response_class=StreamingResponse,
+    response_description="The notes, one JSON object per line",
+    responses={
+        200: {
+            "description": "The notes are streamed successfully",
+            "content": {"application/x-ndjson": {}},
+        },
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def export_notes(
+    batch_size: int = Query(default=EXPORT_BATCH_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    export_service: ExportService = Depends(get_export_service),
+):
+    """
+    This method streams all notes in the database, where deleted field is set to be 0, as NDJSON.
+
+    :param batch_size: The number of notes read from the database at a time.
+    :param export_service: The export service to be used to stream the notes.
+    :return: A streaming response of the notes.
+    """
+    return StreamingResponse(
+        export_service.export_notes(batch_size), media_type="application/x-ndjson"
+    )
+
+
 @router.get(
     "/{note_id}",
     summary="Get note by its id",
@@ -63,25 +126,27 @@ async def get_note_by_id(
 
     :param note_id: The id of the note to be found.
     :param response: The response to be sent.
-    :param if_none_match: The value of the previous etag, checked with current content of note.
+    :param if_none_match: The value of the previous etag, checked with the current view of the note.
     :param note_service: The note service to be used to get the note.
     :return: The note requested.
     """
-    note = await note_service.get_note_by_note_id(note_id)
-    etag = generate_etag(note.content)
+    note, etag = await note_service.get_note_view(note_id)
+    if etag_matches(etag, if_none_match):
+        raise HTTPException(
+            status_code=304, detail="Not modified", headers={"ETag": etag}
+        )
     response.headers["ETag"] = etag
 
-    if etag == if_none_match:
-        raise HTTPException(status_code=304, detail="Not modified")
-
     return note
 
 
 @router.get(
     "/user/{user_id}",
     summary="Get all notes for a certain user",
-    description="This endpoint return a all notes of a user if available inside the database",
-    response_model=list[NoteResponse],
+    description="This endpoint return a page of the notes of a user if available inside the database, the cursor "
+    f"of the next page is returned in the {NEXT_CURSOR_HEADER} header, fields=summary returns only the summaries "
+    "of the notes",
+    response_model=list[NoteResponse] | list[NoteSummaryResponse],
     response_description="The returned data is a list of notes",
     responses={
         200: {"description": "All notes returned successfully"},
@@ -91,17 +156,28 @@ async def get_note_by_id(
 )
 async def get_users_notes(
     user_id: int,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = Query(default=None, description="The cursor of the page"),
+    fields: NoteFields = Query(
+        default="full", description="summary returns only the summaries of the notes"
+    ),
     note_service: NoteService = Depends(get_note_service),
 ):
     """
-    This endpoint get all the user's notes available in the database with deleted field set to 0.
+    This endpoint get a page of the user's notes available in the database with deleted field set to 0.
 
     :param user_id: The id of the user to get their notes.
-
+    :param response: The response to set the next cursor header on.
+    :param limit: The maximum number of notes in the page.
+    :param after: The cursor returned with the previous page.
+    :param fields: The fields to return, full notes or their summaries.
     :param note_service: The note service to be used to get the user's notes.
     :return: The returned value is the notes of a certain user.
     """
-    notes = await note_service.get_user_notes(user_id)
+    notes, cursor = await note_service.get_user_notes(user_id, limit, after, fields)
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(cursor)
     return notes
 
 
@@ -131,6 +207,34 @@ async def add_new_note(
     return note
 
 
+@router.post(
+    "/bulk",
+    summary="Add and update many notes",
+    description="This endpoint adds and updates many notes in one transaction, each item is validated on its own",
+    response_model=NoteBulkResponse,
+    response_description="The returned data is the result of each item",
+    responses={
+        200: {"description": "The valid items are added and updated"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_write_notes(
+    notes: NoteBulkRequest,
+    note_service: NoteService = Depends(get_note_service),
+):
+    """
+    This method adds and updates many notes, the items that aren't valid (unknown user, tag, folder or note) are
+    rejected with their own status, the others are written.
+
+    :param notes: The notes to add and the changes of the notes to update.
+    :param note_service: The note service to be used to write the notes.
+    :return: The result of each item.
+    """
+
+    results = await note_service.bulk_write(notes)
+    return results
+
+
 @router.patch(
     "/{note_id}",
     summary="Update note",
@@ -161,6 +265,37 @@ async def update_note(
     return note
 
 
+@router.post(
+    "/{note_id}/restore/{version_id}",
+    summary="Restore note",
+    description="This endpoint restores a note to one of its versions, a new version is added to its history.",
+    response_model=NoteResponse,
+    response_description="The returned data is the restored note",
+    responses={
+        200: {"description": "The note restored successfully"},
+        404: {"description": "Note or version is not found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def restore_note(
+    note_id: int,
+    version_id: int,
+    note_service: NoteService = Depends(get_note_service),
+):
+    """
+    This endpoint restores a note to one of its versions, the note and the version shall be available if not
+    HTTPException 404 is raised.
+
+    :param note_id: The id of the note to be restored.
+    :param version_id: The id of the version of the note to restore.
+    :param note_service: The note service to be used to restore the note.
+    :return: The restored note.
+    """
+
+    note = await note_service.restore_note(note_id, version_id)
+    return note
+
+
 @router.delete(
     "/{note_id}",
     summary="Delete a note",
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, Response, Header, status
+from fastapi import APIRouter, Depends, Response, Header, Query, status
+from fastapi.responses import StreamingResponse
 
+from src.config.definitions import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from src.dependencies.render import get_render_service
-from src.schemas.render import RenderResponse
+from src.schemas.render import RenderResponse, RenderNotesRequest, RenderedNoteResponse
 from src.services.render import RenderService
 
 router = APIRouter()
@@ -15,6 +17,7 @@ router = APIRouter()
     response_description="The returned data is sanitized HTML code",
     responses={
         200: {"description": "The rendered note requested returned successfully"},
+        304: {"description": "Note not modified"},
         404: {"description": "Note is not found"},
     },
     status_code=status.HTTP_200_OK,
@@ -28,3 +31,100 @@ async def get_rendered_note(
 
     rendered_html = await render_service.render(if_none_match, response, note_id)
     return rendered_html
+
+
+@router.get(
+    "/note/{note_id}/html",
+    summary="Stream a rendered note",
+    description="This endpoint streams a markdown note rendered to HTML code as text/html, the HTML is sent as it is "
+    "rendered, used for very large notes",
+    response_class=StreamingResponse,
+    response_description="The sanitized HTML code",
+    responses={
+        200: {
+            "description": "The rendered note is streamed successfully",
+            "content": {"text/html": {}},
+        },
+        304: {"description": "Note not modified"},
+        404: {"description": "Note is not found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def stream_rendered_note(
+    note_id: int,
+    if_none_match: str | None = Header(default=None),
+    render_service: RenderService = Depends(get_render_service),
+):
+    """
+    This method streams the rendered HTML of a note.
+
+    :param note_id: The id of the note to render.
+    :param if_none_match: The value of the previous etag, checked with current content of note.
+    :param render_service: The render service to be used to render the note.
+    :return: A streaming response of the HTML.
+    """
+    etag, html = await render_service.render_stream(if_none_match, note_id)
+    return StreamingResponse(html, media_type="text/html", headers={"ETag": etag})
+
+
+@router.post(
+    "/notes",
+    summary="Render many notes",
+    description="This endpoint renders a list of notes to HTML code in one request, each note is returned with its "
+    "etag",
+    response_model=list[RenderedNoteResponse],
+    response_description="The rendered notes in the order of the ids, the notes not found are skipped",
+    responses={
+        200: {"description": "The rendered notes returned successfully"},
+        404: {"description": "No notes are found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def render_notes(
+    notes: RenderNotesRequest,
+    render_service: RenderService = Depends(get_render_service),
+):
+    """
+    This method renders many notes by their ids.
+
+    :param notes: The ids of the notes to render.
+    :param render_service: The render service to be used to render the notes.
+    :return: The rendered notes with their etags.
+    """
+    return await render_service.render_notes(notes.note_ids)
+
+
+@router.get(
+    "/folder/{folder_id}",
+    summary="Render the notes of a folder",
+    description="This endpoint renders a page of the notes of a folder to HTML code, each note is returned with its "
+    f"etag, the cursor of the next page is returned in the {NEXT_CURSOR_HEADER} header",
+    response_model=list[RenderedNoteResponse],
+    response_description="The rendered notes of the folder",
+    responses={
+        200: {"description": "The rendered notes returned successfully"},
+        404: {"description": "No notes are found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def render_folder(
+    folder_id: int,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = Query(default=None, description="The cursor of the page"),
+    render_service: RenderService = Depends(get_render_service),
+):
+    """
+    This method renders a page of the notes of a folder.
+
+    :param folder_id: The id of the folder.
+    :param response: The response to set the next cursor header on.
+    :param limit: The maximum number of notes in the page.
+    :param after: The cursor returned with the previous page.
+    :param render_service: The render service to be used to render the notes.
+    :return: The rendered notes with their etags.
+    """
+    notes, cursor = await render_service.render_folder(folder_id, limit, after)
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(cursor)
+    return notes
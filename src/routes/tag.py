@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 
 from src.auth.tokens import check_token
 from src.dependencies.tag import get_tag_service
-from src.schemas.tag import TagResponse, TagRequest
+from src.schemas.note import NoteFields
+from src.schemas.tag import TagNotesRequest, TagNotesResponse, TagResponse, TagRequest
 from src.services.tag import TagService
 
 router = APIRouter(dependencies=[Depends(check_token)])
@@ -47,7 +48,8 @@ async def get_tag_by_id(
 @router.get(
     "/notes/{tag_id}",
     summary="Get notes tag by its id",
-    description="This endpoint return a tag's notes if available inside the database",
+    description="This endpoint return a tag's notes if available inside the database, fields=summary returns only "
+    "the summaries of the notes",
     response_description="The returned data is the requested tag's notes",
     responses={
         200: {"description": "The notes requested returned successfully"},
@@ -56,9 +58,13 @@ async def get_tag_by_id(
     status_code=status.HTTP_200_OK,
 )
 async def get_tags_notes(
-    tag_id: int, tag_service: TagService = Depends(get_tag_service)
+    tag_id: int,
+    fields: NoteFields = Query(
+        default="full", description="summary returns only the summaries of the notes"
+    ),
+    tag_service: TagService = Depends(get_tag_service),
 ):
-    notes = await tag_service.get_tag_notes(tag_id)
+    notes = await tag_service.get_tag_notes(tag_id, fields)
     return notes
 
 
@@ -115,3 +121,47 @@ async def rename_folder(
 async def delete_tag(tag_id: int, tag_service: TagService = Depends(get_tag_service)):
     deleted = await tag_service.delete_tag(tag_id)
     return deleted
+
+
+@router.post(
+    "/{tag_id}/attach",
+    summary="Attach a tag to many notes",
+    description="This endpoint attaches a tag to the notes selected by their ids or by their folder",
+    response_model=TagNotesResponse,
+    response_description="The returned data is the number of notes the tag is attached to",
+    responses={
+        200: {"description": "The tag is attached successfully"},
+        400: {"description": "Neither or both of note_ids and folder_id are set"},
+        404: {"description": "Tag not found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def attach_tag(
+    tag_id: int,
+    notes: TagNotesRequest,
+    tag_service: TagService = Depends(get_tag_service),
+):
+    result = await tag_service.attach_notes(tag_id, notes)
+    return result
+
+
+@router.post(
+    "/{tag_id}/detach",
+    summary="Detach a tag from many notes",
+    description="This endpoint detaches a tag from the notes selected by their ids or by their folder",
+    response_model=TagNotesResponse,
+    response_description="The returned data is the number of notes the tag is detached from",
+    responses={
+        200: {"description": "The tag is detached successfully"},
+        400: {"description": "Neither or both of note_ids and folder_id are set"},
+        404: {"description": "Tag not found"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def detach_tag(
+    tag_id: int,
+    notes: TagNotesRequest,
+    tag_service: TagService = Depends(get_tag_service),
+):
+    result = await tag_service.detach_notes(tag_id, notes)
+    return result
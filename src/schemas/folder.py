@@ -1,5 +1,9 @@
+from typing import List, Literal, Optional
+
 from pydantic import BaseModel, Field
 
+FolderTreeNotes = Literal["none", "count", "titles"]
+
 
 class ChildNotes(BaseModel):
     """Schema of a child note for a parent folder"""
@@ -47,3 +51,35 @@ class FolderResponse(BaseModel):
             ]
         }
     }
+
+
+class FolderTreeResponse(BaseModel):
+    """Schema of a folder with its subfolders, and optionally the count or the titles of its notes"""
+
+    id: int
+    name: str
+    notes_count: Optional[int] = None
+    notes: Optional[List[ChildNotes]] = None
+    children: List["FolderTreeResponse"] = []
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": 1,
+                    "name": "Projects",
+                    "notes_count": 1,
+                    "notes": [{"id": 1, "title": "Implement the project"}],
+                    "children": [
+                        {
+                            "id": 2,
+                            "name": "Archive",
+                            "notes_count": 0,
+                            "notes": [],
+                            "children": [],
+                        }
+                    ],
+                }
+            ]
+        }
+    }
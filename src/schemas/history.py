@@ -1,7 +1,10 @@
 import datetime
+from typing import Literal
 
 from pydantic import BaseModel
 
+from src.common.utils.diff import DiffGranularity
+
 
 class HistoryResponse(BaseModel):
     id: int
@@ -25,3 +28,74 @@ class HistoryResponse(BaseModel):
             ]
         }
     }
+
+
+HistoryFields = Literal["full", "summary"]
+
+
+class HistorySummaryResponse(BaseModel):
+    """Schema for returning a version in list views, without its content"""
+
+    id: int
+    rev_description: str
+    note_id: int
+    created_at: datetime.datetime
+    content_length: int
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": 1,
+                    "rev_description": "Created note",
+                    "note_id": 2,
+                    "created_at": "2025-09-01T07:41:59.496609",
+                    "content_length": 56,
+                }
+            ]
+        }
+    }
+
+
+class DiffChange(BaseModel):
+    """A changed part between two versions, the offsets are in characters and the end offsets are exclusive"""
+
+    op: Literal["insert", "delete", "replace"]
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+    old_text: str
+    new_text: str
+
+
+class HistoryDiffResponse(BaseModel):
+    """Schema for returning the changes from a version to another version or to the current note"""
+
+    from_version_id: int
+    to_version_id: int | None
+    granularity: DiffGranularity
+    changes: list[DiffChange]
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "from_version_id": 1,
+                    "to_version_id": 2,
+                    "granularity": "word",
+                    "changes": [
+                        {
+                            "op": "replace",
+                            "old_start": 6,
+                            "old_end": 11,
+                            "new_start": 6,
+                            "new_end": 13,
+                            "old_text": "final",
+                            "new_text": "capstone",
+                        }
+                    ],
+                }
+            ]
+        }
+    }
@@ -1,7 +1,8 @@
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 from pydantic import BaseModel, Field
 
+from src.config.definitions import MAX_BULK_NOTES
 from src.schemas.folder import ParentResponse
 from src.schemas.tag import TagResponse
 
@@ -55,6 +56,35 @@ class NoteResponse(BaseModel):
     }
 
 
+NoteFields = Literal["full", "summary"]
+
+
+class NoteSummaryResponse(BaseModel):
+    """Schema for returning a note in list views, without its full content"""
+
+    id: int
+    title: str
+    parent: ParentResponse
+    tags: list[TagResponse]
+    content_length: int
+    excerpt: str
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": 1,
+                    "title": "Implement the project",
+                    "parent": {"id": 0, "name": "root"},
+                    "tags": [{"id": 1, "name": "project"}],
+                    "content_length": 66,
+                    "excerpt": "Finish the implementation of the final project for the internship",
+                }
+            ]
+        }
+    }
+
+
 class NoteUpdate(BaseModel):
     """Schema for updating a note"""
 
@@ -75,3 +105,55 @@ class NoteUpdate(BaseModel):
             ]
         }
     }
+
+
+class NoteBulkUpdate(NoteUpdate):
+    """Schema for updating a note in a bulk request"""
+
+    id: int = Field(..., description="The id of the note to update")
+
+
+class NoteBulkRequest(BaseModel):
+    """Schema for creating and updating many notes in one request"""
+
+    create: List[NoteRequest] = Field(
+        default=[], max_length=MAX_BULK_NOTES, description="The notes to add"
+    )
+    update: List[NoteBulkUpdate] = Field(
+        default=[], max_length=MAX_BULK_NOTES, description="The notes to update"
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "create": [
+                        {
+                            "title": "Implement the project",
+                            "content": "Finish the implementation of the final project",
+                            "username": "kareem",
+                            "tags": ["project"],
+                            "parent_id": 0,
+                        }
+                    ],
+                    "update": [{"id": 1, "title": "Updated project title"}],
+                }
+            ]
+        }
+    }
+
+
+class NoteBulkResult(BaseModel):
+    """Schema for the result of one item of a bulk request"""
+
+    index: int = Field(..., description="The position of the item in its list")
+    id: Optional[int] = Field(None, description="The id of the note")
+    status: int = Field(..., description="The HTTP status of the item")
+    detail: Optional[str] = Field(None, description="Why the item was rejected")
+
+
+class NoteBulkResponse(BaseModel):
+    """Schema for returning the results of a bulk request, in the order of the items"""
+
+    created: list[NoteBulkResult]
+    updated: list[NoteBulkResult]
@@ -1,6 +1,9 @@
 import datetime
+from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from src.config.definitions import MAX_PAGE_SIZE
 
 
 class RenderResponse(BaseModel):
@@ -17,3 +20,34 @@ class RenderResponse(BaseModel):
             ]
         }
     }
+
+
+class RenderNotesRequest(BaseModel):
+    """Schema for rendering many notes"""
+
+    note_ids: List[int] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_PAGE_SIZE,
+        description="The ids of the notes to render",
+    )
+
+    model_config = {"json_schema_extra": {"examples": [{"note_ids": [1, 2, 3]}]}}
+
+
+class RenderedNoteResponse(RenderResponse):
+    """Schema for returning a rendered note with its etag"""
+
+    etag: str
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "note_id": 2,
+                    "rendered_html": "<h1>This is a title</h1>\n<p>This is a paragraph.</p>\n",
+                    "etag": "9a10bf1dba8b43c09e10195d493f6f03dbb0c8d2957811f033ea263b2758bf01",
+                }
+            ]
+        }
+    }
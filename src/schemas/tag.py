@@ -1,5 +1,9 @@
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
+from src.config.definitions import MAX_BULK_NOTES
+
 
 class TagResponse(BaseModel):
     """The response schema of tags."""
@@ -18,3 +22,27 @@ class TagRequest(BaseModel):
     name: str = Field(..., title="Name of the Tag", description="The name of the tag.")
 
     model_config = {"json_schema_extra": {"examples": [{"name": "Internship"}]}}
+
+
+class TagNotesRequest(BaseModel):
+    """The input schema of the notes a tag is attached to or detached from, by their ids or by their folder."""
+
+    note_ids: Optional[List[int]] = Field(
+        None, max_length=MAX_BULK_NOTES, description="The ids of the notes."
+    )
+    folder_id: Optional[int] = Field(
+        None, description="The id of the folder, every note inside it is selected."
+    )
+
+    model_config = {
+        "json_schema_extra": {"examples": [{"note_ids": [1, 2, 3]}, {"folder_id": 1}]}
+    }
+
+
+class TagNotesResponse(BaseModel):
+    """The response schema of attaching or detaching a tag."""
+
+    tag_id: int
+    notes: int = Field(..., description="The number of notes changed.")
+
+    model_config = {"json_schema_extra": {"examples": [{"tag_id": 1, "notes": 3}]}}
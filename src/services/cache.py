@@ -0,0 +1,417 @@
+"""
+This module is the cache layer used by the services on top of redis.
+
+Every cached value is stored together with the generations (version counters kept in redis) it depends on, a write
+bumps the generations it affects, so all the values that depend on them become stale at once without the need to find
+their keys. When redis is down the lookups miss and the services read from the database.
+
+The hottest lookups are also kept in an in-process tier in front of redis, every bump is published on a redis channel
+and each worker listens to it to keep the generations of its local tier up to date.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+from cachetools import TTLCache
+from pydantic import TypeAdapter, ValidationError
+from redis.exceptions import RedisError
+
+from src.config.definitions import (
+    CACHE_KEY_VERSION,
+    CACHE_INVALIDATION_CHANNEL,
+    NOTE_GENERATION_KEY,
+    NOTES_GENERATION_KEY,
+    FOLDERS_GENERATION_KEY,
+    TAGS_GENERATION_KEY,
+    USERS_GENERATION_KEY,
+)
+from src.services.redis import RedisCache
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheLookup(Generic[T]):
+    """The result of a cache lookup, it keeps the generations seen on lookup to store the value against them."""
+
+    key: str
+    adapter: TypeAdapter[T]
+    generations: list[int] | None = None
+    value: T | None = None
+    hit: bool = False
+    generation_keys: list[str] = field(default_factory=list)
+    local: bool = False
+    stale: bool = False
+
+
+class LocalCache:
+    """
+    The in-process tier, a bounded LRU with a TTL. Its values are only trusted while the worker is subscribed to the
+    invalidations channel, since it is the only way to know about the writes handled by the other workers.
+
+    The generations are kept in a TTLCache of the same size, a value whose generation was evicted is a miss, since a
+    bump of that generation may have been evicted with it.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30):
+        self.entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generations: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.subscribed = False
+
+    def get(self, key: str, generation_keys: list[str]) -> tuple[bool, Any]:
+        """
+        This method gets a value if it is cached and none of its generations was bumped since.
+
+        :param key: The key of the value.
+        :param generation_keys: The generations the value depends on.
+        :return: If the value was found, and the value.
+        """
+        if not self.subscribed:
+            return False, None
+
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+
+        generations, value = entry
+        current = [
+            self.generations.get(generation_key) for generation_key in generation_keys
+        ]
+        if generations != current:
+            self.entries.pop(key, None)
+            return False, None
+        return True, value
+
+    def set(
+        self, key: str, generation_keys: list[str], generations: list[int], value: Any
+    ):
+        """
+        This method stores a value against the generations seen in redis when it was loaded.
+
+        :param key: The key of the value.
+        :param generation_keys: The generations the value depends on.
+        :param generations: The values of the generations when the value was loaded.
+        :param value: The value.
+        """
+        if not self.subscribed:
+            return
+
+        for generation_key, generation in zip(generation_keys, generations):
+            # set again to keep the generations of the new values from being evicted first
+            self.generations[generation_key] = self.generations.get(
+                generation_key, generation
+            )
+        self.entries[key] = (generations, value)
+
+    def update_generations(self, generations: dict[str, int]):
+        """This method records bumped generations, the values that depend on them become stale."""
+        for generation_key, generation in generations.items():
+            if generation > self.generations.get(generation_key, 0):
+                self.generations[generation_key] = generation
+
+    def clear(self):
+        self.entries.clear()
+        self.generations.clear()
+
+
+class CacheService:
+
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        enabled: bool = True,
+        expire: int = 300,
+        local_cache: LocalCache | None = None,
+    ):
+        self.redis_cache = redis_cache
+        self.enabled = enabled
+        self.expire = expire
+        self.local_cache = local_cache or LocalCache()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        # the generations a write failed to bump, nothing cached is served until they are bumped
+        self._failed_bumps: set[str] = set()
+
+    @staticmethod
+    def key(prefix: str, *parts: Any) -> str:
+        """
+        This method builds a versioned cache key, changing CACHE_KEY_VERSION drops every cached value.
+
+        :param prefix: One of the redis keys in definitions.
+        :param parts: The parts that identify the value, like the id of the note.
+        :return: The versioned key.
+        """
+        return CACHE_KEY_VERSION + prefix + "".join(f"/{part}" for part in parts)
+
+    def note_generations(self, note_id: int) -> list[str]:
+        """The generations a single note depends on: the note itself, the folders, the tags and the users."""
+        return [
+            self.key(NOTE_GENERATION_KEY, note_id),
+            self.key(FOLDERS_GENERATION_KEY),
+            self.key(TAGS_GENERATION_KEY),
+            self.key(USERS_GENERATION_KEY),
+        ]
+
+    def folder_generations(self) -> list[str]:
+        """The generations a single folder depends on."""
+        return [self.key(FOLDERS_GENERATION_KEY)]
+
+    def tag_generations(self) -> list[str]:
+        """The generations a single tag depends on."""
+        return [self.key(TAGS_GENERATION_KEY)]
+
+    def notes_list_generations(self) -> list[str]:
+        """The generations a list of notes depends on: all the notes, the folders, the tags and the users."""
+        return [
+            self.key(NOTES_GENERATION_KEY),
+            self.key(FOLDERS_GENERATION_KEY),
+            self.key(TAGS_GENERATION_KEY),
+            self.key(USERS_GENERATION_KEY),
+        ]
+
+    async def get(
+        self,
+        key: str,
+        adapter: TypeAdapter[T],
+        generation_keys: list[str] = (),
+        local: bool = False,
+    ) -> CacheLookup[T]:
+        """
+        This method looks up a value and the generations it depends on in one round trip.
+
+        :param key: The key of the value.
+        :param adapter: The adapter used to validate the cached value back to its type.
+        :param generation_keys: The generations the value depends on.
+        :param local: If the value is also kept in the in-process tier, used for the hottest lookups.
+        :return: The lookup, with hit set to True if the value is cached and still valid, or stale set to True if the
+        value is still valid but past the time it is fresh for (only for values stored with stale_while_revalidate).
+        """
+        lookup = CacheLookup(
+            key=key, adapter=adapter, generation_keys=list(generation_keys), local=local
+        )
+        if not self.enabled:
+            return lookup
+
+        if self._failed_bumps:
+            await self.bump()
+            if self._failed_bumps:
+                return lookup
+
+        if local:
+            lookup.hit, lookup.value = self.local_cache.get(key, lookup.generation_keys)
+            if lookup.hit:
+                return lookup
+
+        values = await self.redis_cache.mget([key, *lookup.generation_keys])
+        if values is None:
+            return lookup
+
+        raw, lookup.generations = values[0], [int(g or 0) for g in values[1:]]
+        if raw is None:
+            return lookup
+
+        try:
+            entry = json.loads(raw)
+            if entry["generations"] != lookup.generations:
+                return lookup
+            lookup.value = adapter.validate_python(entry["value"])
+        except (ValueError, KeyError, TypeError, ValidationError):
+            return lookup
+
+        if entry.get("fresh_until", float("inf")) < time.time():
+            lookup.stale = True
+            return lookup
+
+        lookup.hit = True
+
+        if local:
+            self.local_cache.set(
+                key, lookup.generation_keys, lookup.generations, lookup.value
+            )
+        return lookup
+
+    async def set(
+        self,
+        lookup: CacheLookup[T],
+        value: T,
+        expire: int | None = None,
+        stale_while_revalidate: int = 0,
+    ):
+        """
+        This method stores a value missed by a lookup, against the generations seen on lookup, so a value loaded while
+        a write was bumping them is never stored as fresh.
+
+        :param lookup: The lookup that missed.
+        :param value: The value loaded from the database.
+        :param expire: The seconds the value is fresh for, the default expire is used if not set.
+        :param stale_while_revalidate: The seconds the value is kept after it expires, to be served while it is being
+        computed again.
+        """
+        if not self.enabled or lookup.generations is None:
+            return
+
+        expire = expire or self.expire
+        entry = {
+            "generations": lookup.generations,
+            "value": lookup.adapter.dump_python(value, mode="json"),
+        }
+        if stale_while_revalidate:
+            entry["fresh_until"] = time.time() + expire
+        await self.redis_cache.set(
+            lookup.key, json.dumps(entry), expire + stale_while_revalidate
+        )
+        if lookup.local:
+            self.local_cache.set(
+                lookup.key, lookup.generation_keys, lookup.generations, value
+            )
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        adapter: TypeAdapter[T],
+        generation_keys: list[str] = (),
+        expire: int | None = None,
+        stale_while_revalidate: int = 0,
+        remote: bool = True,
+    ) -> T:
+        """
+        This method returns a cached value, or computes it on a miss. Concurrent misses for the same key in this worker
+        wait for one computation instead of computing it each (single-flight), and with stale_while_revalidate an
+        expired value is returned right away while one background task computes it again.
+
+        :param key: The key of the value.
+        :param compute: The coroutine function that computes the value, used for expensive values like rendered notes.
+        :param adapter: The adapter used to validate the cached value back to its type.
+        :param generation_keys: The generations the value depends on.
+        :param expire: The seconds the value is fresh for, the default expire is used if not set.
+        :param stale_while_revalidate: The seconds an expired value can still be served while it is computed again.
+        :param remote: If the value is cached in redis, with False only the concurrent computations are coalesced.
+        :return: The value.
+        """
+        if remote:
+            lookup = await self.get(key, adapter, generation_keys)
+        else:
+            lookup = CacheLookup(key=key, adapter=adapter)
+        if lookup.hit:
+            return lookup.value
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(
+                self._compute(lookup, compute, expire, stale_while_revalidate)
+            )
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda done: self._flight_done(key, done))
+
+        if lookup.stale:
+            return lookup.value
+        # shield so a cancelled request doesn't cancel the computation the other requests are waiting for
+        return await asyncio.shield(flight)
+
+    async def _compute(
+        self,
+        lookup: CacheLookup[T],
+        compute: Callable[[], Awaitable[T]],
+        expire: int | None,
+        stale_while_revalidate: int,
+    ) -> T:
+        value = await compute()
+        await self.set(lookup, value, expire, stale_while_revalidate)
+        return value
+
+    def _flight_done(self, key: str, flight: asyncio.Future):
+        self._in_flight.pop(key, None)
+        if not flight.cancelled() and flight.exception() is not None:
+            logger.warning("Computing %s failed: %s", key, flight.exception())
+
+    async def bump(self, *generation_keys: str):
+        """
+        This method increments generations, which invalidates every value that depends on them. If redis can't be
+        reached, the values cached in redis under the old generations would be served as fresh once it is back, so the
+        local tier is cleared and nothing cached is served until the generations are bumped, which is retried with the
+        next lookup or bump.
+
+        :param generation_keys: The generations to bump.
+        """
+        if not self.enabled:
+            return
+
+        generation_keys = list(dict.fromkeys([*self._failed_bumps, *generation_keys]))
+        if not generation_keys:
+            return
+
+        values = await self.redis_cache.incr_many(generation_keys)
+        if values is None:
+            self._failed_bumps.update(generation_keys)
+            self.local_cache.clear()
+            return
+
+        self._failed_bumps.clear()
+        generations = dict(zip(generation_keys, values))
+        self.local_cache.update_generations(generations)
+        await self.redis_cache.publish(
+            CACHE_INVALIDATION_CHANNEL, json.dumps(generations)
+        )
+
+    async def invalidate_note(self, note_id: int):
+        """This method invalidates a note and every list of notes, used when a note is updated or deleted."""
+        await self.bump(
+            self.key(NOTE_GENERATION_KEY, note_id), self.key(NOTES_GENERATION_KEY)
+        )
+
+    async def invalidate_note_ids(self, note_ids: list[int]):
+        """This method invalidates many notes and every list of notes, used when notes are updated in bulk."""
+        await self.bump(
+            *(self.key(NOTE_GENERATION_KEY, note_id) for note_id in note_ids),
+            self.key(NOTES_GENERATION_KEY),
+        )
+
+    async def invalidate_notes(self):
+        """This method invalidates every list of notes, used when a note is added."""
+        await self.bump(self.key(NOTES_GENERATION_KEY))
+
+    async def invalidate_folders(self):
+        """This method invalidates every cached value that shows a folder."""
+        await self.bump(self.key(FOLDERS_GENERATION_KEY))
+
+    async def invalidate_tags(self):
+        """This method invalidates every cached value that shows a tag."""
+        await self.bump(self.key(TAGS_GENERATION_KEY))
+
+    async def invalidate_users(self):
+        """This method invalidates every cached value that shows a user, like the username of the notes."""
+        await self.bump(self.key(USERS_GENERATION_KEY))
+
+    async def listen_invalidations(self, retry_after: float = 5.0):
+        """
+        This method keeps the in-process tier in sync with the writes of every worker, it runs for the lifetime of the
+        application. While it is not subscribed (redis is down) the in-process tier is cleared and skipped.
+
+        :param retry_after: The seconds to wait before subscribing again after the connection is lost.
+        """
+        if not self.enabled:
+            return
+
+        while True:
+            pubsub = self.redis_cache.pubsub()
+            try:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                self.local_cache.clear()
+                self.local_cache.subscribed = True
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.local_cache.update_generations(json.loads(message["data"]))
+            except (RedisError, OSError, ValueError) as e:
+                logger.warning("Cache invalidations listener stopped: %s", e)
+            finally:
+                self.local_cache.subscribed = False
+                self.local_cache.clear()
+                await pubsub.aclose()
+            await asyncio.sleep(retry_after)
@@ -0,0 +1,32 @@
+"""
+This module is the methods used to export the notes, the notes are streamed as newline-delimited JSON (NDJSON).
+"""
+
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.repositories.note import NoteRepository
+from src.schemas.note import NoteResponse
+
+
+class ExportService:
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def export_notes(self, batch_size: int) -> AsyncIterator[str]:
+        """
+        This method streams all the available notes with deleted field set to 0 as NDJSON lines. It opens its own
+        session because the body is streamed after the session of the request is closed, the notes are read in batches
+        through a server side cursor so memory stays constant regardless of the number of notes.
+
+        :param batch_size: The number of notes read from the database at a time.
+        :return: An async iterator of NDJSON lines, one note per line.
+        """
+        async with self.session_factory() as session:
+            note_repository = NoteRepository(session)
+            async for notes in note_repository.stream_notes(batch_size):
+                yield "".join(
+                    NoteResponse(**note).model_dump_json() + "\n" for note in notes
+                )
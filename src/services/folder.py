@@ -5,22 +5,49 @@ delete folder, rename folder, create folder.
 
 from fastapi import HTTPException
 
+from pydantic import TypeAdapter
+
+from src.common.db.unit_of_work import UnitOfWork
+from src.config.definitions import (
+    FOLDER_ID_REDIS_KEY,
+    FOLDER_NOTES_REDIS_KEY,
+    FOLDER_TREE_REDIS_KEY,
+)
 from src.models.folder import Folder
 from src.models.note import Note
 from src.repositories.folder import FolderRepository
 from src.repositories.note import NoteRepository
-from src.schemas.folder import FolderResponse, FolderRequest, ParentResponse
-from src.schemas.note import NoteResponse
+from src.schemas.folder import (
+    ChildNotes,
+    FolderRequest,
+    FolderResponse,
+    FolderTreeNotes,
+    FolderTreeResponse,
+    ParentResponse,
+)
+from src.schemas.note import NoteResponse, NoteFields, NoteSummaryResponse
 from src.schemas.tag import TagResponse
+from src.services.cache import CacheService
+from src.services.note import NOTES_PAGE_ADAPTER
+from src.services.pagination import next_cursor
+
+FOLDER_ADAPTER = TypeAdapter(FolderResponse)
+FOLDER_TREE_ADAPTER = TypeAdapter(FolderTreeResponse)
 
 
 class FolderService:
 
     def __init__(
-        self, folder_repository: FolderRepository, note_repository: NoteRepository
+        self,
+        folder_repository: FolderRepository,
+        note_repository: NoteRepository,
+        cache: CacheService,
+        unit_of_work: UnitOfWork,
     ):
         self.folder_repository = folder_repository
         self.note_repository = note_repository
+        self.cache = cache
+        self.unit_of_work = unit_of_work
 
     async def get_all_folders(self) -> list[FolderResponse] | None:
         """
@@ -47,6 +74,15 @@ class FolderService:
         :return: The folder's data.
         """
         try:
+            lookup = await self.cache.get(
+                self.cache.key(FOLDER_ID_REDIS_KEY, folder_id),
+                FOLDER_ADAPTER,
+                self.cache.folder_generations(),
+                local=True,
+            )
+            if lookup.hit:
+                return lookup.value
+
             folder: Folder | None = await self.folder_repository.get_by_id(folder_id)
             if not folder:
                 raise HTTPException(status_code=404, detail=f"Folder not found")
@@ -56,10 +92,70 @@ class FolderService:
                 name=folder.name,
                 parent=ParentResponse(id=folder.parent.id, name=folder.parent.name),
             )
+            await self.cache.set(lookup, folder_out)
             return folder_out
         except Exception as e:
             raise e
 
+    async def get_folder_tree(
+        self,
+        folder_id: int,
+        depth: int | None = None,
+        notes: FolderTreeNotes = "none",
+    ) -> FolderTreeResponse:
+        """
+        This method is used to get a folder with its subfolders nested to any depth, the whole tree is loaded in one
+        recursive query, it raises a 404 HTTPException if the folder is not found.
+
+        :param folder_id: The id of the root folder of the tree.
+        :param depth: The number of levels of subfolders to return, None to return them all.
+        :param notes: "count" to add the number of notes of each folder, "titles" to add the ids and titles of its notes.
+        :return: The folder and its subfolders.
+        """
+        try:
+            generation_keys = self.cache.folder_generations()
+            if notes != "none":
+                generation_keys = self.cache.notes_list_generations()
+            lookup = await self.cache.get(
+                self.cache.key(FOLDER_TREE_REDIS_KEY, folder_id, depth, notes),
+                FOLDER_TREE_ADAPTER,
+                generation_keys,
+            )
+            if lookup.hit:
+                return lookup.value
+
+            rows = await self.folder_repository.get_tree(folder_id, depth, notes)
+            if not rows:
+                raise HTTPException(status_code=404, detail="Folder not found")
+
+            # the rows are ordered by depth, so a folder always comes after its parent
+            folders: dict[int, FolderTreeResponse] = {}
+            for row in rows:
+                folder = folders.get(row.id)
+                if folder is None:
+                    folder = folders[row.id] = FolderTreeResponse(
+                        id=row.id, name=row.name
+                    )
+                    if row.depth > 0:
+                        folders[row.parent_id].children.append(folder)
+                    if notes == "count":
+                        folder.notes_count = row.notes_count
+                    elif notes == "titles":
+                        folder.notes = []
+                if notes == "titles" and row.note_id is not None:
+                    folder.notes.append(
+                        ChildNotes(id=row.note_id, title=row.note_title)
+                    )
+            if notes == "titles":
+                for folder in folders.values():
+                    folder.notes_count = len(folder.notes)
+
+            tree_out = folders[folder_id]
+            await self.cache.set(lookup, tree_out)
+            return tree_out
+        except Exception as e:
+            raise e
+
     async def rename_folder(self, folder_id: int, name: str) -> FolderResponse:
         """
         This method is used to rename an available folder from database with deleted field set to 0.
@@ -75,6 +171,8 @@ class FolderService:
                 raise HTTPException(status_code=404, detail=f"Folder not found")
 
             await self.folder_repository.rename_folder(stored_folder, name)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_folders()
 
             folder_out = FolderResponse(
                 id=stored_folder.id,
@@ -103,6 +201,9 @@ class FolderService:
 
             await self.folder_repository.delete(folder_id)
             await self.note_repository.delete_folder_notes(folder_id)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_folders()
+            await self.cache.invalidate_notes()
             return True
         except Exception as e:
             raise e
@@ -124,6 +225,8 @@ class FolderService:
                 raise HTTPException(status_code=409, detail="Folder already exists.")
 
             await self.folder_repository.create(new_folder)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_folders()
 
             return {
                 "details": "Folder is added successfully",
@@ -132,21 +235,50 @@ class FolderService:
         except Exception as e:
             raise e
 
-    async def get_folder_notes(self, folder_id: int) -> list[NoteResponse]:
+    async def get_folder_notes(
+        self,
+        folder_id: int,
+        limit: int | None = None,
+        after: int | None = None,
+        fields: NoteFields = "full",
+    ) -> tuple[list[NoteResponse] | list[NoteSummaryResponse], int | None]:
         """
-        This method to get all notes that belongs to certain folder by its id.
+        This method to get a page of the notes that belongs to certain folder by its id.
 
         :param folder_id: The id of the folder to get its notes.
-        :return: Folder child notes.
+        :param limit: The maximum number of notes in the page.
+        :param after: The cursor returned with the previous page, None for the first page.
+        :param fields: "full" to return the whole notes, "summary" to return only the summaries of the notes.
+        :return: Folder child notes and the cursor of the next page.
         """
         try:
+            lookup = await self.cache.get(
+                self.cache.key(FOLDER_NOTES_REDIS_KEY, folder_id, fields, limit, after),
+                NOTES_PAGE_ADAPTER,
+                self.cache.notes_list_generations(),
+            )
+            if lookup.hit:
+                return lookup.value
+
+            if fields == "summary":
+                summaries = await self.note_repository.get_notes_summary(
+                    folder_id=folder_id, limit=limit, after=after
+                )
+                if not summaries and after is None:
+                    raise HTTPException(status_code=404, detail="No notes are found")
+
+                summaries_out = [NoteSummaryResponse(**note) for note in summaries]
+                page = summaries_out, next_cursor(summaries_out, limit)
+                await self.cache.set(lookup, page)
+                return page
+
             notes: list[Note] | None = await self.note_repository.get_folder_notes(
-                folder_id
+                folder_id, limit, after
             )
-            if not notes:
+            if not notes and after is None:
                 raise HTTPException(status_code=404, detail="No notes are found")
 
-            return [
+            notes_out = [
                 NoteResponse(
                     id=note.id,
                     title=note.title,
@@ -157,6 +289,9 @@ class FolderService:
                 )
                 for note in notes
             ]
+            page = notes_out, next_cursor(notes, limit)
+            await self.cache.set(lookup, page)
+            return page
         except Exception as e:
             raise e
 
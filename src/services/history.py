@@ -1,37 +1,306 @@
+"""
+This module is the methods used to handle the history of notes. The content of a version is stored once in a blob
+identified by its SHA-256, so the versions with the same content (like a title edit or a delete) share a blob. A blob is
+stored either in full or as a line delta from the blob of the previous version of the note, every
+HISTORY_SNAPSHOT_INTERVAL blobs (or when the delta isn't much smaller than the content) a blob is stored in full again,
+so rebuilding a content applies a bounded number of deltas.
+
+The new versions are written to an outbox in the transaction of the note change, the outbox drainer moves them to
+History in batches.
+"""
+
+from typing import Any, Iterable
+
 from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import Row
 
+from src.common.utils.delta import apply_delta, make_delta
+from src.common.utils.diff import DiffGranularity, diff_texts
+from src.common.utils.generate_etag import generate_etag
+from src.config.definitions import HISTORY_DIFF_KEY
+from src.config.settings import HISTORY_DIFF_CACHE_EXPIRE, HISTORY_SNAPSHOT_INTERVAL
 from src.models.history import History
+from src.models.history_event import HistoryEvent
 from src.models.note import Note
 from src.repositories.history import HistoryRepository
+from src.schemas.history import (
+    DiffChange,
+    HistoryDiffResponse,
+    HistoryFields,
+    HistoryResponse,
+    HistorySummaryResponse,
+)
+from src.services.cache import CacheService
+from src.services.pagination import next_cursor
+
+DIFF_ADAPTER = TypeAdapter(list[DiffChange])
+
+
+def rebuild_contents(
+    blobs: Iterable[Row], content_hashes: Iterable[str]
+) -> dict[str, str]:
+    """
+    This method rebuilds the contents of blobs from their chains, each blob of the chains is rebuilt once.
+
+    :param blobs: The blobs of the chains (hash, base_hash, content, delta).
+    :param content_hashes: The hashes of the blobs to rebuild.
+    :return: The contents by their hash.
+    """
+    blobs = {blob.hash: blob for blob in blobs}
+    contents: dict[str, str] = {}
+    for content_hash in content_hashes:
+        deltas = []
+        blob = blobs[content_hash]
+        while blob.hash not in contents and blob.content is None:
+            deltas.append(blob)
+            blob = blobs[blob.base_hash]
+
+        content = contents.setdefault(blob.hash, blob.content)
+        for blob in reversed(deltas):
+            content = apply_delta(content, blob.delta)
+            contents[blob.hash] = content
+    return contents
+
+
+def chain_depth(blobs: Iterable[Row], content_hash: str) -> int:
+    """
+    This method counts the deltas to apply to rebuild the content of a blob.
+
+    :param blobs: The blobs of the chain (hash, base_hash, content, delta).
+    :param content_hash: The hash of the blob.
+    :return: The number of deltas.
+    """
+    blobs = {blob.hash: blob for blob in blobs}
+    depth = 0
+    blob = blobs[content_hash]
+    while blob.content is None:
+        depth += 1
+        blob = blobs[blob.base_hash]
+    return depth
+
+
+def version_response(version: History, content: str) -> HistoryResponse:
+    return HistoryResponse(
+        id=version.id,
+        rev_description=version.rev_description,
+        note_id=version.note_id,
+        note_title=version.note_title,
+        note_content=content,
+        created_at=version.created_at,
+    )
 
 
 class HistoryService:
-    def __init__(self, history_repository: HistoryRepository):
+    def __init__(
+        self,
+        history_repository: HistoryRepository,
+        cache: CacheService,
+        snapshot_interval: int = HISTORY_SNAPSHOT_INTERVAL,
+    ):
         self.history_repository = history_repository
+        self.cache = cache
+        self.snapshot_interval = snapshot_interval
 
     async def create_new_history_version(self, note: Note, message: str):
         """
-        This method creates new version of a note and add it to the history database.
+        This method adds a new version of a note to the history outbox, the content is only stored if no version has
+        the same content. Nothing is committed, the version is committed with the change of the note and moved to
+        History later by the outbox drainer.
 
-        :param note: The note to add.
+        :param note: The note to add, with its new title and content.
         :param message: The message of the version.
-        :return:
+        :return: The version added to the outbox.
         """
         try:
-            history = History(
+            content = note.content or ""
+            content_hash = note.content_hash or generate_etag(content)
+            await self.add_blob(content, content_hash, note_id=note.id)
+
+            event = HistoryEvent(
                 note_id=note.id,
                 note_title=note.title,
-                note_content=note.content,
+                content_hash=content_hash,
                 rev_description=message,
             )
-            await self.history_repository.create(history)
-            return history
+            await self.history_repository.add_event(event)
+            return event
         except Exception as e:
             raise e
 
-    async def get_version_by_id(self, version_id: int):
+    async def create_new_history_versions(self, versions: list[dict[str, Any]]):
         """
-        This method get a version of a note by its id.
+        This method adds new versions of many notes to the history outbox in a few statements, whatever the number of
+        versions: the stored blobs are checked in one query, the new contents are stored as deltas from the previous
+        contents of the notes when it is worth it, the depths of the base blobs are read in one query. Nothing is
+        committed.
+
+        :param versions: Dictionaries with the note_id, note_title, content, content_hash and rev_description of each
+        version, and the base_hash and base_content of the previous content of the note (None for a new note).
+        """
+        try:
+            await self.history_repository.lock_blobs()
+            stored = await self.history_repository.get_stored_blobs(
+                list({version["content_hash"] for version in versions})
+            )
+            depths = await self.history_repository.get_blobs_depths(
+                list(
+                    {
+                        version["base_hash"]
+                        for version in versions
+                        if version["base_hash"] is not None
+                        and version["content_hash"] not in stored
+                    }
+                )
+            )
+
+            blobs = {}
+            for version in versions:
+                content, content_hash = version["content"], version["content_hash"]
+                if content_hash in stored or content_hash in blobs:
+                    continue
+                blob = {
+                    "hash": content_hash,
+                    "size": len(content),
+                    "content": content,
+                    "delta": None,
+                    "base_hash": None,
+                }
+                base_hash = version["base_hash"]
+                if (
+                    base_hash in depths
+                    and depths[base_hash] + 1 < self.snapshot_interval
+                ):
+                    delta = make_delta(version["base_content"], content)
+                    if delta is not None:
+                        blob.update(content=None, delta=delta, base_hash=base_hash)
+                blobs[content_hash] = blob
+
+            await self.history_repository.add_blobs(list(blobs.values()))
+            await self.history_repository.add_events(
+                [
+                    {
+                        "note_id": version["note_id"],
+                        "note_title": version["note_title"],
+                        "content_hash": version["content_hash"],
+                        "rev_description": version["rev_description"],
+                    }
+                    for version in versions
+                ]
+            )
+        except Exception as e:
+            raise e
+
+    async def lock_blobs(self):
+        """
+        This method keeps the blobs from being deleted as unused until the transaction ends, it is taken before reading
+        a version whose blob is reused.
+        """
+        try:
+            await self.history_repository.lock_blobs()
+        except Exception as e:
+            raise e
+
+    async def create_restored_version(self, version: History, message: str):
+        """
+        This method adds the version of a note restored to an old version to the history outbox, it references the
+        blob of the old version so no content is rebuilt nor stored. Nothing is committed, the version is committed
+        with the restored note.
+
+        :param version: The version the note is restored to.
+        :param message: The message of the version.
+        :return: The version added to the outbox.
+        """
+        try:
+            event = HistoryEvent(
+                note_id=version.note_id,
+                note_title=version.note_title,
+                content_hash=version.content_hash,
+                rev_description=message,
+            )
+            await self.history_repository.add_event(event)
+            return event
+        except Exception as e:
+            raise e
+
+    async def add_blob(
+        self,
+        content: str,
+        content_hash: str,
+        note_id: int | None = None,
+        base_hash: str | None = None,
+    ):
+        """
+        This method stores the blob of a content if it isn't stored yet, as a delta from the base blob when it is
+        worth it.
+
+        :param content: The content.
+        :param content_hash: The SHA-256 of the content.
+        :param note_id: The id of the note, the base blob is the blob of its latest version.
+        :param base_hash: The hash of the base blob, used instead of the note.
+        """
+        try:
+            await self.history_repository.lock_blobs()
+            if await self.history_repository.blob_exists(content_hash):
+                return
+
+            blob = {
+                "hash": content_hash,
+                "size": len(content),
+                "content": content,
+                "delta": None,
+                "base_hash": None,
+            }
+            if base_hash is None and note_id is not None:
+                base_hash = await self.history_repository.get_latest_content_hash(
+                    note_id
+                )
+            if base_hash is not None:
+                chain = await self.history_repository.get_blob_chains([base_hash])
+                if chain_depth(chain, base_hash) + 1 < self.snapshot_interval:
+                    base_content = rebuild_contents(chain, [base_hash])[base_hash]
+                    delta = make_delta(base_content, content)
+                    if delta is not None:
+                        blob.update(content=None, delta=delta, base_hash=base_hash)
+
+            await self.history_repository.add_blob(blob)
+        except Exception as e:
+            raise e
+
+    async def get_version_content(self, version: History) -> str:
+        """
+        This method gets the content of a version, rebuilt from its deltas if it isn't stored in full.
+
+        :param version: The version.
+        :return: The content of the version.
+        """
+        try:
+            chain = await self.history_repository.get_blob_chains(
+                [version.content_hash]
+            )
+            return rebuild_contents(chain, [version.content_hash])[version.content_hash]
+        except Exception as e:
+            raise e
+
+    async def set_version_content(self, version: History, content: str):
+        """
+        This method changes the content of a version, the blobs are never changed, the version gets the blob of the
+        new content.
+
+        :param version: The version to change.
+        :param content: The new content of the version.
+        """
+        try:
+            content_hash = generate_etag(content)
+            await self.add_blob(content, content_hash, base_hash=version.content_hash)
+            version.content_hash = content_hash
+            await self.history_repository.update_version(version)
+        except Exception as e:
+            raise e
+
+    async def get_version(self, version_id: int) -> History:
+        """
+        This method get the stored version of a note by its id, its content may be stored as a delta.
 
         :param version_id: The id of the version.
         :return: The version from database if found.
@@ -45,18 +314,124 @@ class HistoryService:
         except Exception as e:
             raise e
 
-    async def get_note_versions(self, note_id: int):
+    async def get_version_by_id(self, version_id: int) -> HistoryResponse:
         """
-        This method gets all versions of a note, by the note id.
+        This method get a version of a note by its id.
+
+        :param version_id: The id of the version.
+        :return: The version from database if found.
+        """
+        try:
+            history = await self.get_version(version_id)
+            return version_response(history, await self.get_version_content(history))
+        except Exception as e:
+            raise e
+
+    async def get_note_versions(
+        self,
+        note_id: int,
+        limit: int | None = None,
+        after: int | None = None,
+        fields: HistoryFields = "full",
+    ) -> tuple[list[HistoryResponse] | list[HistorySummaryResponse], int | None]:
+        """
+        This method gets a page of the versions of a note, by the note id, in the order they were created.
 
         :param note_id: The id of the note to get the versions.
-        :return: A list of note versions if found.
+        :param limit: The maximum number of versions in the page.
+        :param after: The cursor returned with the previous page, None for the first page.
+        :param fields: "full" to return the versions with their content, "summary" to return only their metadata.
+        :return: A list of note versions if found, and the cursor of the next page (None on the last page).
         """
         try:
-            versions = await self.history_repository.get_all_note_versions(note_id)
-            if not versions:
+            if fields == "summary":
+                versions = await self.history_repository.get_note_versions_summary(
+                    note_id, limit, after
+                )
+                if not versions and after is None:
+                    raise HTTPException(
+                        status_code=404, detail="No versions were found"
+                    )
+
+                versions_out = [
+                    HistorySummaryResponse(**version) for version in versions
+                ]
+                return versions_out, next_cursor(versions_out, limit)
+
+            versions = await self.history_repository.get_all_note_versions(
+                note_id, limit, after
+            )
+            if not versions and after is None:
                 raise HTTPException(status_code=404, detail="No versions were found")
 
-            return versions
+            chain = await self.history_repository.get_blob_chains(
+                list({version.content_hash for version in versions})
+            )
+            contents = rebuild_contents(
+                chain, (version.content_hash for version in versions)
+            )
+            versions_out = [
+                version_response(version, contents[version.content_hash])
+                for version in versions
+            ]
+            return versions_out, next_cursor(versions_out, limit)
+        except Exception as e:
+            raise e
+
+    async def diff_versions(
+        self,
+        version_id: int,
+        to_version_id: int | None = None,
+        granularity: DiffGranularity = "line",
+    ) -> HistoryDiffResponse:
+        """
+        This method computes the changes from a version to another version, or to the current note. A diff is cached
+        by the hashes of the two contents, so it is computed once for every pair of versions with the same contents.
+
+        :param version_id: The id of the old version.
+        :param to_version_id: The id of the new version, None to compare with the current note.
+        :param granularity: "line" to compare whole lines, "word" to compare the replaced lines word by word.
+        :return: The changes between the two contents.
+        """
+        try:
+            version = await self.get_version(version_id)
+            if to_version_id is not None:
+                to_version = await self.get_version(to_version_id)
+                to_hash = to_version.content_hash
+                get_new_content = lambda: self.get_version_content(to_version)
+            else:
+                note = await self.history_repository.get_note_content_hash(
+                    version.note_id
+                )
+                if not note:
+                    raise HTTPException(status_code=404, detail="Note not found")
+
+                get_new_content = lambda: self.history_repository.get_note_content(
+                    version.note_id
+                )
+                to_hash = note.content_hash or generate_etag(await get_new_content())
+
+            async def compute() -> list[DiffChange]:
+                if version.content_hash == to_hash:
+                    return []
+                old_content = await self.get_version_content(version)
+                changes = diff_texts(old_content, await get_new_content(), granularity)
+                return [DiffChange(**change) for change in changes]
+
+            # the contents of the blobs never change, the diff doesn't depend on any generation
+            changes = await self.cache.get_or_compute(
+                self.cache.key(
+                    HISTORY_DIFF_KEY, granularity, version.content_hash, to_hash
+                ),
+                compute,
+                DIFF_ADAPTER,
+                expire=HISTORY_DIFF_CACHE_EXPIRE,
+            )
+            return HistoryDiffResponse(
+                from_version_id=version.id,
+                to_version_id=to_version_id,
+                granularity=granularity,
+                changes=changes,
+            )
         except Exception as e:
             raise e
@@ -0,0 +1,68 @@
+"""
+This module moves the versions of the notes from the history outbox to History. A note change and its version are
+committed together in the outbox, without a second commit on the write path, and the drainer inserts them in History in
+batches, in the order of their outbox ids.
+
+The outbox ids are taken when a version is inserted, not when it is committed, so the order is only guaranteed for the
+versions of the same note, whose writes hold the row of the note until they commit. The versions of different notes
+can reach History in another order than their commits, and a version committed after a drain can get a lower History
+id than versions of other notes moved by that drain.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config.settings import HISTORY_OUTBOX_BATCH_SIZE, HISTORY_OUTBOX_INTERVAL
+from src.repositories.history import HistoryRepository
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryOutbox:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = HISTORY_OUTBOX_BATCH_SIZE,
+        interval: float = HISTORY_OUTBOX_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+
+    async def drain(self) -> int:
+        """
+        This method moves the versions of the outbox to History, a batch per transaction, until the outbox is empty.
+        Nothing is moved if another worker is draining the outbox.
+
+        :return: The number of versions moved.
+        """
+        moved = 0
+        async with self.session_factory() as session:
+            history_repository = HistoryRepository(session)
+            while True:
+                if not await history_repository.lock_outbox():
+                    await session.rollback()
+                    break
+                events = await history_repository.get_outbox_events(self.batch_size)
+                if not events:
+                    await session.rollback()
+                    break
+                await history_repository.move_outbox_events(events)
+                await session.commit()
+                moved += len(events)
+        return moved
+
+    async def run(self):
+        """
+        This method drains the outbox every interval seconds, it runs for the lifetime of the application.
+        """
+        while True:
+            try:
+                moved = await self.drain()
+                if moved:
+                    logger.info("Moved %d versions to the history", moved)
+            except Exception as e:
+                logger.warning("History outbox drain failed: %s", e)
+            await asyncio.sleep(self.interval)
@@ -2,22 +2,28 @@ from typing import Dict, Any
 
 from fastapi import HTTPException
 
+from src.common.db.unit_of_work import UnitOfWork
 from src.models.history import History
 from src.models.issue import Issue
-from src.repositories.history import HistoryRepository
 from src.repositories.issue import IssueRepository
+from src.schemas.history import HistoryResponse
+from src.services.history import HistoryService, version_response
 
 
 class IssueService:
     def __init__(
-        self, issue_repository: IssueRepository, history_repository: HistoryRepository
+        self,
+        issue_repository: IssueRepository,
+        history_service: HistoryService,
+        unit_of_work: UnitOfWork,
     ):
         self.issue_repository = issue_repository
-        self.history_repository = history_repository
+        self.history_service = history_service
+        self.unit_of_work = unit_of_work
 
     async def create_issue(self, issue: Dict[str, Any], version_id: int):
         """
-        This method create an issue to the database.
+        This method adds an issue to the database, it is committed by the caller.
 
         :param version_id: The id of the version of the note.
         :param issue: The issue to add.
@@ -40,7 +46,7 @@ class IssueService:
         except Exception as e:
             raise e
 
-    async def fix_issue(self, issue_id: int):
+    async def fix_issue(self, issue_id: int) -> HistoryResponse:
         issue: Issue = await self.issue_repository.get_by_id(issue_id)
 
         if not issue:
@@ -49,20 +55,20 @@ class IssueService:
         if issue.fixed:
             raise HTTPException(status_code=400, detail="Issue already fixed")
 
-        version: History = await self.history_repository.get_by_id(issue.version_id)
+        version: History = await self.history_service.get_version(issue.version_id)
 
-        text = version.note_content
+        text = await self.history_service.get_version_content(version)
         suggestion = issue.suggestion
         start = issue.offset
         end = start + issue.length
-        fixed_text = text[:start] + suggestion + text[end]
-        version.note_content = fixed_text
+        fixed_text = text[:start] + suggestion + text[end:]
         issue.fixed = 1
 
-        await self.history_repository.update_version(version)
+        await self.history_service.set_version_content(version, fixed_text)
         await self.issue_repository.update_issue(issue)
+        await self.unit_of_work.commit()
 
-        return version
+        return version_response(version, fixed_text)
 
     async def version_issues(self, version_id: int):
         issues: list[Issue] = await self.issue_repository.get_version_issues(version_id)
@@ -1,18 +1,26 @@
 from fastapi import HTTPException
 
+from src.common.db.unit_of_work import UnitOfWork
 from src.common.utils.grammar_checker import GrammarChecker
 from src.models.history import History
 from src.repositories.history import HistoryRepository
+from src.services.history import HistoryService
 from src.services.issue import IssueService
 
 
 class LanguageToolService:
 
     def __init__(
-        self, history_repository: HistoryRepository, issue_service: IssueService
+        self,
+        history_repository: HistoryRepository,
+        issue_service: IssueService,
+        history_service: HistoryService,
+        unit_of_work: UnitOfWork,
     ):
         self.history_repository = history_repository
         self.issue_service = issue_service
+        self.history_service = history_service
+        self.unit_of_work = unit_of_work
 
     async def check_grammar(self, version_id: int):
         """
@@ -28,13 +36,14 @@ class LanguageToolService:
             if not version:
                 raise HTTPException(status_code=404, detail="Note not found")
 
-            content = version.note_content
+            content = await self.history_service.get_version_content(version)
             grammar_checker = GrammarChecker()
             issues = await grammar_checker.check_text(content)
 
             if issues and len(issues) > 0:
                 for issue in issues:
                     await self.issue_service.create_issue(issue, version_id)
+                await self.unit_of_work.commit()
 
             return issues
 
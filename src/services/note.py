@@ -4,30 +4,44 @@ delete note, update note, add new note.
 """
 
 from fastapi import HTTPException
-
+from pydantic import TypeAdapter
+
+from src.common.db.unit_of_work import UnitOfWork
+from src.common.utils.generate_etag import generate_etag
+from src.config.definitions import (
+    ALL_NOTES_REDIS_KEY,
+    NOTE_ID_REDIS_KEY,
+    NOTE_ETAG_REDIS_KEY,
+    USER_NOTES_REDIS_KEY,
+)
 from src.models.note import Note
 from src.models.user import User
 from src.repositories.note import NoteRepository
 from src.repositories.tag import TagRepository
 from src.repositories.user import UserRepository
 from src.schemas.folder import ParentResponse
-from src.schemas.note import NoteUpdate, NoteRequest, NoteResponse
+from src.schemas.note import (
+    NoteBulkRequest,
+    NoteBulkResponse,
+    NoteBulkResult,
+    NoteUpdate,
+    NoteRequest,
+    NoteResponse,
+    NoteFields,
+    NoteSummaryResponse,
+)
 from src.schemas.tag import TagResponse
 
-# from src.services.redis import RedisCache
+from src.services.cache import CacheService
 from src.services.history import HistoryService
+from src.services.pagination import next_cursor
+from src.services.render_cache import RenderCache
 
-
-# redis_service = RedisCache()
-
-
-# async def check_cache(key: str):
-#     res = await redis_service.get(key)
-#     return res
-#
-#
-# async def write_on_cache(key: str, value: str, expire: int = 300):
-#     await redis_service.set(key, value, expire)
+NOTE_ADAPTER = TypeAdapter(NoteResponse)
+ETAG_ADAPTER = TypeAdapter(str)
+NOTES_PAGE_ADAPTER = TypeAdapter(
+    tuple[list[NoteResponse] | list[NoteSummaryResponse], int | None]
+)
 
 
 class NoteService:
@@ -38,48 +52,68 @@ class NoteService:
         user_repository: UserRepository,
         tag_repository: TagRepository,
         history_service: HistoryService,
+        cache: CacheService,
+        render_cache: RenderCache,
+        unit_of_work: UnitOfWork,
     ) -> None:
         self.note_repository = note_repository
         self.user_repository = user_repository
         self.tag_repository = tag_repository
         self.history_service = history_service
+        self.cache = cache
+        self.render_cache = render_cache
+        self.unit_of_work = unit_of_work
 
-    async def get_all_notes(self) -> list[NoteResponse] | None:
+    async def get_all_notes(
+        self,
+        limit: int | None = None,
+        after: int | None = None,
+        fields: NoteFields = "full",
+    ) -> tuple[list[NoteResponse] | list[NoteSummaryResponse], int | None]:
         """
-        This method is used to get all available notes inside the database with deleted field set to 0,
-        it returns all notes if found, else it raises 404 HTTPException.
+        This method is used to get a page of the available notes inside the database with deleted field set to 0,
+        it returns the notes if found, else it raises 404 HTTPException.
 
-        :return: The returned value is a list of notes if found.
+        :param limit: The maximum number of notes in the page.
+        :param after: The cursor returned with the previous page, None for the first page.
+        :param fields: "full" to return the whole notes, "summary" to return only the summaries of the notes.
+        :return: The returned value is a list of notes and the cursor of the next page (None on the last page).
         """
         try:
-
-            # res = await check_cache(ALL_NOTES_REDIS_KEY)
-            #
-            # if res:
-            #     notes = json.loads(res)
-            #     notes_out = [NoteOut(**note) for note in notes]
-            #     return notes_out
-
-            notes: list[Note] | None = await self.note_repository.get_all()
-            if not notes:
-                raise HTTPException(status_code=404, detail="No notes are found")
-
-            notes_out = [
-                NoteResponse(
-                    id=note.id,
-                    title=note.title,
-                    content=note.content,
-                    username=note.user.username,
-                    parent=ParentResponse(id=note.parent.id, name=note.parent.name),
-                    tags=[TagResponse(id=tag.id, name=tag.name) for tag in note.tags],
+            lookup = await self.cache.get(
+                self.cache.key(ALL_NOTES_REDIS_KEY, fields, limit, after),
+                NOTES_PAGE_ADAPTER,
+                self.cache.notes_list_generations(),
+            )
+            if lookup.hit:
+                return lookup.value
+
+            if fields == "summary":
+                page = await self.get_notes_summary(limit, after)
+            else:
+                notes: list[Note] | None = await self.note_repository.get_all(
+                    limit, after
                 )
-                for note in notes
-            ]
-            # await write_on_cache(
-            #     ALL_NOTES_REDIS_KEY, json.dumps([note.dict() for note in notes_out])
-            # )
+                if not notes and after is None:
+                    raise HTTPException(status_code=404, detail="No notes are found")
+
+                notes_out = [
+                    NoteResponse(
+                        id=note.id,
+                        title=note.title,
+                        content=note.content,
+                        username=note.user.username,
+                        parent=ParentResponse(id=note.parent.id, name=note.parent.name),
+                        tags=[
+                            TagResponse(id=tag.id, name=tag.name) for tag in note.tags
+                        ],
+                    )
+                    for note in notes
+                ]
+                page = notes_out, next_cursor(notes, limit)
 
-            return notes_out
+            await self.cache.set(lookup, page)
+            return page
         except Exception as e:
             raise e
 
@@ -91,13 +125,14 @@ class NoteService:
         :return: The note's data.
         """
         try:
-
-            # res = await check_cache(NOTE_ID_REDIS_KEY + f"/{note_id}")
-            #
-            # if res:
-            #     res_note = json.loads(res)
-            #     notes_out = NoteOut(**res_note)
-            #     return notes_out
+            lookup = await self.cache.get(
+                self.cache.key(NOTE_ID_REDIS_KEY, note_id),
+                NOTE_ADAPTER,
+                self.cache.note_generations(note_id),
+                local=True,
+            )
+            if lookup.hit:
+                return lookup.value
 
             note: Note | None = await self.note_repository.get_by_id(note_id)
             if not note:
@@ -112,14 +147,71 @@ class NoteService:
                 tags=[TagResponse(id=tag.id, name=tag.name) for tag in note.tags],
             )
 
-            # await write_on_cache(
-            #     NOTE_ID_REDIS_KEY + f"/{note_id}", json.dumps(note_out.dict())
-            # )
-
+            await self.cache.set(lookup, note_out)
             return note_out
         except Exception as e:
             raise e
 
+    async def get_note_view(self, note_id: int) -> tuple[NoteResponse, str]:
+        """
+        This method gets a note and the ETag of its view, the hash of every field of the response, so a change of the
+        title, the tags, the folder or the username changes it too, not only a change of the content. The note is
+        cached in the in-process tier, so revalidation requests usually don't reach the database.
+
+        :param note_id: The id of the note.
+        :return: The note and its ETag, if not found it raises 404 HTTPException.
+        """
+        try:
+            note = await self.get_note_by_note_id(note_id)
+            return note, generate_etag(note.model_dump_json())
+        except Exception as e:
+            raise e
+
+    async def get_note_etag(self, note_id: int) -> str:
+        """
+        This method gets the ETag of the content of a note from its stored content hash, without loading the note, the
+        hash is only computed from the content for notes written before it was stored, it is used by the render
+        endpoints, whose responses only depend on the content. It is cached in the in-process tier, so revalidation
+        requests usually don't reach the database.
+
+        :param note_id: The id of the note.
+        :return: The ETag of the note, if not found it raises 404 HTTPException.
+        """
+        try:
+            lookup = await self.cache.get(
+                self.cache.key(NOTE_ETAG_REDIS_KEY, note_id),
+                ETAG_ADAPTER,
+                self.cache.note_generations(note_id),
+                local=True,
+            )
+            if lookup.hit:
+                return lookup.value
+
+            row = await self.note_repository.get_content_hash(note_id)
+            if not row:
+                raise HTTPException(status_code=404, detail=f"Note {note_id} not found")
+
+            etag = row.content_hash
+            if etag is None:
+                content = await self.note_repository.get_content(note_id)
+                etag = generate_etag(content or "")
+
+            await self.cache.set(lookup, etag)
+            return etag
+        except Exception as e:
+            raise e
+
+    async def render_content(self, content: str) -> tuple[str, str]:
+        """
+        This method computes the content hash and the rendered HTML stored with a note when its content is written.
+
+        :param content: The Markdown content of the note.
+        :return: The content hash and the rendered HTML.
+        """
+        content_hash = generate_etag(content)
+        rendered_html = await self.render_cache.render(content, content_hash)
+        return content_hash, rendered_html
+
     async def update_note(self, note_id: int, note: NoteUpdate) -> NoteResponse:
         """
         This method is used to update an available note from database with deleted field set to 0,
@@ -135,6 +227,7 @@ class NoteService:
             if not stored_note:
                 raise HTTPException(status_code=404, detail=f"Note {note_id} not found")
 
+            # the tags are only replaced when tag_names is set, like in the bulk update
             tags_names = note.tag_names
             tags = []
             if tags_names:
@@ -144,12 +237,20 @@ class NoteService:
                         status_code=404, detail=f"Tags {tags} not found"
                     )
 
+            if note.content is not None:
+                stored_note.content_hash, stored_note.rendered_html = (
+                    await self.render_content(note.content)
+                )
+
             updated_note = await self.note_repository.update_note(stored_note, note)
-            updated_note.tags = tags
+            if tags_names is not None:
+                updated_note.tags = tags
 
             await self.history_service.create_new_history_version(
-                stored_note, f"Note updated"
+                updated_note, f"Note updated"
             )
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_note(note_id)
 
             note_response = NoteResponse(
                 id=updated_note.id,
@@ -167,6 +268,51 @@ class NoteService:
         except Exception as e:
             raise e
 
+    async def restore_note(self, note_id: int, version_id: int) -> NoteResponse:
+        """
+        This method restores a note to one of its versions. The content of the version is rebuilt once from its blob
+        chain, its HTML is rendered by the render cache, which is keyed by the content hash, then the note is updated
+        in one statement and committed with its new version, which reuses the blob of the restored version.
+
+        :param note_id: The id of the note.
+        :param version_id: The id of the version to restore.
+        :return: The restored note, if the note or the version is not found it raises 404 HTTPException.
+        """
+        try:
+            # the blob of the version is reused, it can't be deleted by a compaction before the restore commits
+            await self.history_service.lock_blobs()
+            version = await self.history_service.get_version(version_id)
+            if version.note_id != note_id:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Version {version_id} of note {note_id} not found",
+                )
+
+            content = await self.history_service.get_version_content(version)
+            rendered_html = await self.render_cache.render(
+                content, version.content_hash
+            )
+            restored = await self.note_repository.restore_note(
+                note_id,
+                {
+                    "title": version.note_title,
+                    "content": content,
+                    "content_hash": version.content_hash,
+                    "rendered_html": rendered_html,
+                },
+            )
+            if not restored:
+                raise HTTPException(status_code=404, detail=f"Note {note_id} not found")
+
+            await self.history_service.create_restored_version(
+                version, f"Note restored to version {version_id}"
+            )
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_note(note_id)
+            return await self.get_note_by_note_id(note_id)
+        except Exception as e:
+            raise e
+
     async def delete_note(self, note_id: int) -> Note | None:
         """
         This method to delete an available note from database with deleted fild set to 1, this method softly deletes the
@@ -181,11 +327,12 @@ class NoteService:
             if not exists:
                 raise HTTPException(status_code=404, detail="Note not found.")
 
-            await self.note_repository.delete(note_id)
-
             await self.history_service.create_new_history_version(
                 exists, f"Note deleted"
             )
+            await self.note_repository.delete(note_id)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_note(note_id)
             return exists
         except Exception as e:
             raise e
@@ -209,40 +356,219 @@ class NoteService:
             if not exists:
                 raise HTTPException(status_code=404, detail=f"Tags {tags[1]} not found")
 
+            content_hash, rendered_html = await self.render_content(note.content)
             new_note = Note(
                 title=note.title,
                 content=note.content,
-                username=note.username,
+                content_hash=content_hash,
+                rendered_html=rendered_html,
+                user_id=user.id,
                 parent_id=note.parent_id,
+                tags=tags,
             )
 
             await self.note_repository.create(new_note)
-
-            if tags:
-                new_note.tags = tags
-
             await self.history_service.create_new_history_version(
                 new_note, f"Note created: {new_note.id}, {note.title}"
             )
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_notes()
             return new_note
         except Exception as e:
             raise e
 
-    async def get_user_notes(self, user_id: int) -> list[NoteResponse]:
+    async def bulk_write(self, request: NoteBulkRequest) -> NoteBulkResponse:
         """
-        This method to get all notes that belongs to certain user by their id.
+        This method adds and updates many notes in one transaction with a fixed number of statements, whatever the
+        number of notes: the users, tags, folders and updated notes are read in one query each, the notes, their tags
+        and their versions are written in batches. The items that aren't valid are rejected, the others are written.
+        The HTML of the written notes isn't rendered here, it is rendered by the render cache on the first read.
+
+        :param request: The notes to add and the changes of the notes to update.
+        :return: The result of each item, in the order of the items.
+        """
+        try:
+            tag_names = {str(tag) for note in request.create for tag in note.tags or []}
+            tag_names.update(
+                tag for note in request.update for tag in note.tag_names or []
+            )
+            users = await self.user_repository.get_users_ids(
+                list({note.username for note in request.create})
+            )
+            tags = await self.tag_repository.get_tags_ids(list(tag_names))
+            parents = await self.note_repository.get_parents_ids(
+                list({note.parent_id or 0 for note in request.create})
+            )
+            stored_notes = {
+                row.id: row
+                for row in await self.note_repository.get_notes_contents(
+                    list({note.id for note in request.update})
+                )
+            }
+
+            created, new_notes, new_notes_tags = [], [], []
+            for index, note in enumerate(request.create):
+                note_tags = list(dict.fromkeys(str(tag) for tag in note.tags or []))
+                missing_tags = set(note_tags) - tags.keys()
+                if note.username not in users:
+                    result = NoteBulkResult(
+                        index=index, status=404, detail="User not found"
+                    )
+                elif missing_tags:
+                    result = NoteBulkResult(
+                        index=index, status=404, detail=f"Tags {missing_tags} not found"
+                    )
+                elif (note.parent_id or 0) not in parents:
+                    result = NoteBulkResult(
+                        index=index,
+                        status=404,
+                        detail=f"Folder {note.parent_id} not found",
+                    )
+                else:
+                    result = NoteBulkResult(index=index, status=201)
+                    new_notes.append((result, note, note_tags))
+                created.append(result)
+
+            rows = [
+                {
+                    "title": note.title,
+                    "content": note.content,
+                    "content_hash": generate_etag(note.content),
+                    "user_id": users[note.username],
+                    "parent_id": note.parent_id or 0,
+                }
+                for _, note, _ in new_notes
+            ]
+            note_ids = await self.note_repository.insert_notes(rows)
+            versions = []
+            for note_id, row, (result, _, note_tags) in zip(note_ids, rows, new_notes):
+                result.id = note_id
+                new_notes_tags.extend(
+                    {"note_id": note_id, "tag_id": tags[tag]} for tag in note_tags
+                )
+                versions.append(
+                    {
+                        "note_id": note_id,
+                        "note_title": row["title"],
+                        "content": row["content"],
+                        "content_hash": row["content_hash"],
+                        "rev_description": f"Note created: {note_id}, {row['title']}",
+                        "base_hash": None,
+                        "base_content": None,
+                    }
+                )
+
+            updated, changed_notes, retagged, versioned = [], [], {}, set()
+            for index, note in enumerate(request.update):
+                stored = stored_notes.get(note.id)
+                note_tags = list(dict.fromkeys(note.tag_names or []))
+                missing_tags = set(note_tags) - tags.keys()
+                if stored is None:
+                    result = NoteBulkResult(
+                        index=index,
+                        id=note.id,
+                        status=404,
+                        detail=f"Note {note.id} not found",
+                    )
+                elif note.id in versioned:
+                    result = NoteBulkResult(
+                        index=index,
+                        id=note.id,
+                        status=409,
+                        detail=f"Note {note.id} is already updated by this request",
+                    )
+                elif missing_tags:
+                    result = NoteBulkResult(
+                        index=index,
+                        id=note.id,
+                        status=404,
+                        detail=f"Tags {missing_tags} not found",
+                    )
+                else:
+                    result = NoteBulkResult(index=index, id=note.id, status=200)
+                    base_content = stored.content or ""
+                    base_hash = stored.content_hash or generate_etag(base_content)
+                    changes = {"id": note.id}
+                    if note.title is not None:
+                        changes["title"] = note.title
+                    if note.content is not None:
+                        changes["content"] = note.content
+                        changes["content_hash"] = generate_etag(note.content)
+                        changes["rendered_html"] = None
+                    if len(changes) > 1:
+                        changed_notes.append(changes)
+                    if note.tag_names is not None:
+                        retagged[note.id] = note_tags
+                    versioned.add(note.id)
+                    versions.append(
+                        {
+                            "note_id": note.id,
+                            "note_title": changes.get("title", stored.title),
+                            "content": changes.get("content", base_content),
+                            "content_hash": changes.get("content_hash", base_hash),
+                            "rev_description": "Note updated",
+                            "base_hash": base_hash,
+                            "base_content": base_content,
+                        }
+                    )
+                updated.append(result)
+
+            await self.note_repository.update_notes(changed_notes)
+            await self.note_repository.remove_notes_tags(list(retagged))
+            new_notes_tags.extend(
+                {"note_id": note_id, "tag_id": tags[tag]}
+                for note_id, note_tags in retagged.items()
+                for tag in note_tags
+            )
+            await self.note_repository.add_notes_tags(new_notes_tags)
+            await self.history_service.create_new_history_versions(versions)
+            await self.unit_of_work.commit()
+
+            if versioned:
+                await self.cache.invalidate_note_ids(list(versioned))
+            elif note_ids:
+                await self.cache.invalidate_notes()
+            return NoteBulkResponse(created=created, updated=updated)
+        except Exception as e:
+            raise e
+
+    async def get_user_notes(
+        self,
+        user_id: int,
+        limit: int | None = None,
+        after: int | None = None,
+        fields: NoteFields = "full",
+    ) -> tuple[list[NoteResponse] | list[NoteSummaryResponse], int | None]:
+        """
+        This method to get a page of the notes that belongs to certain user by their id.
 
         :param user_id: The id of the user to get their notes.
-        :return: User notes.
+        :param limit: The maximum number of notes in the page.
+        :param after: The cursor returned with the previous page, None for the first page.
+        :param fields: "full" to return the whole notes, "summary" to return only the summaries of the notes.
+        :return: User notes and the cursor of the next page.
         """
         try:
+            lookup = await self.cache.get(
+                self.cache.key(USER_NOTES_REDIS_KEY, user_id, fields, limit, after),
+                NOTES_PAGE_ADAPTER,
+                self.cache.notes_list_generations(),
+            )
+            if lookup.hit:
+                return lookup.value
+
+            if fields == "summary":
+                page = await self.get_notes_summary(limit, after, user_id=user_id)
+                await self.cache.set(lookup, page)
+                return page
+
             notes: list[Note] | None = await self.note_repository.get_user_notes(
-                user_id
+                user_id, limit, after
             )
-            if not notes:
+            if not notes and after is None:
                 raise HTTPException(status_code=404, detail="No notes are found")
 
-            return [
+            notes_out = [
                 NoteResponse(
                     id=note.id,
                     title=note.title,
@@ -253,5 +579,35 @@ class NoteService:
                 )
                 for note in notes
             ]
+            page = notes_out, next_cursor(notes, limit)
+            await self.cache.set(lookup, page)
+            return page
+        except Exception as e:
+            raise e
+
+    async def get_notes_summary(
+        self,
+        limit: int | None = None,
+        after: int | None = None,
+        user_id: int | None = None,
+    ) -> tuple[list[NoteSummaryResponse], int | None]:
+        """
+        This method to get a page of the notes summaries (title, parent, tags, content length and excerpt), without
+        loading the full content of the notes.
+
+        :param limit: The maximum number of notes in the page.
+        :param after: The cursor returned with the previous page, None for the first page.
+        :param user_id: If set, only the notes of this user are returned.
+        :return: The notes summaries and the cursor of the next page.
+        """
+        try:
+            notes = await self.note_repository.get_notes_summary(
+                user_id=user_id, limit=limit, after=after
+            )
+            if not notes and after is None:
+                raise HTTPException(status_code=404, detail="No notes are found")
+
+            notes_out = [NoteSummaryResponse(**note) for note in notes]
+            return notes_out, next_cursor(notes_out, limit)
         except Exception as e:
             raise e
@@ -0,0 +1,18 @@
+"""
+This module contains the helpers used by the services to build keyset (cursor) paginated responses.
+"""
+
+from typing import Any, Sequence
+
+
+def next_cursor(rows: Sequence[Any], limit: int | None) -> int | None:
+    """
+    This method returns the cursor of the next page, which is the id of the last row of a full page.
+
+    :param rows: The rows of the current page, ordered by id.
+    :param limit: The size of the page requested.
+    :return: The cursor of the next page, or None when the current page is the last one.
+    """
+    if limit is None or len(rows) < limit:
+        return None
+    return rows[-1].id
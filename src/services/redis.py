@@ -1,21 +1,124 @@
-# import redis.asyncio as redis
-#
-#
-# class RedisCache:
-#     """This module is used to cache data to redis."""
-#
-#     def __init__(self, redis_url: str = "redis://localhost:6379/0"):
-#         self.redis_url = redis_url
-#         self.redis_client = redis.Redis.from_url(self.redis_url, decode_responses=True)
-#
-#     async def get(self, key: str) -> str | None:
-#         """This method to get data from cache"""
-#         return await self.redis_client.get(key)
-#
-#     async def set(self, key: str, value: str, expire: int = 3600):
-#         """This method to set new data to the cache"""
-#         await self.redis_client.set(key, value, ex=expire)
-#
-#     async def delete(self, key: str):
-#         """This method to delete cached value"""
-#         await self.redis_client.delete(key)
+"""
+This module is the client used to cache data to redis. Redis is only a cache, so every operation falls back
+quietly when redis is not reachable, and the callers go to the database instead.
+"""
+
+import logging
+import time
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache:
+    """This module is used to cache data to redis."""
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        client: redis.Redis | None = None,
+        retry_after: float = 5.0,
+    ):
+        """
+        :param redis_url: The url of the redis server.
+        :param client: An already created client (or an in-memory stand-in with the same interface).
+        :param retry_after: The seconds to skip redis for after it failed, so a down redis doesn't slow every request.
+        """
+        self.redis_url = redis_url
+        self._owns_client = client is None
+        self.redis_client = client or redis.Redis.from_url(
+            self.redis_url,
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+        self.retry_after = retry_after
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """If redis can be used, it is False for a while after an error."""
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, error: Exception):
+        logger.warning("Redis is not available, skipping the cache: %s", error)
+        self._down_until = time.monotonic() + self.retry_after
+
+    async def get(self, key: str) -> str | None:
+        """This method to get data from cache"""
+        values = await self.mget([key])
+        return values[0] if values else None
+
+    async def mget(self, keys: list[str]) -> list[str | None] | None:
+        """This method to get many values from cache in one round trip, it returns None if redis is down"""
+        if not self.available:
+            return None
+        try:
+            return await self.redis_client.mget(keys)
+        except (RedisError, OSError) as e:
+            self._failed(e)
+            return None
+
+    async def incr_many(self, keys: list[str]) -> list[int] | None:
+        """This method to increment many counters in one round trip, it returns None if redis is down"""
+        if not self.available or not keys:
+            return None
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.incr(key)
+            return await pipeline.execute()
+        except (RedisError, OSError) as e:
+            self._failed(e)
+            return None
+
+    async def set(self, key: str, value: str, expire: int = 3600):
+        """This method to set new data to the cache"""
+        if not self.available:
+            return
+        try:
+            await self.redis_client.set(key, value, ex=expire)
+        except (RedisError, OSError) as e:
+            self._failed(e)
+
+    async def delete(self, *keys: str):
+        """This method to delete cached values"""
+        if not self.available or not keys:
+            return
+        try:
+            await self.redis_client.delete(*keys)
+        except (RedisError, OSError) as e:
+            self._failed(e)
+
+    def pubsub(self):
+        """
+        This method returns a pub/sub object on its own connection, without the socket timeout of the cache client
+        since a subscriber waits for messages.
+        """
+        if self.redis_url and self._owns_client:
+            client = redis.Redis.from_url(
+                self.redis_url, decode_responses=True, socket_connect_timeout=0.5
+            )
+            return client.pubsub(ignore_subscribe_messages=True)
+        return self.redis_client.pubsub(ignore_subscribe_messages=True)
+
+    async def publish(self, channel: str, message: str):
+        """This method to publish a message to the subscribers of a channel"""
+        if not self.available:
+            return
+        try:
+            await self.redis_client.publish(channel, message)
+        except (RedisError, OSError) as e:
+            self._failed(e)
+
+    async def incr(self, key: str) -> int | None:
+        """This method to increment a counter, it returns None if redis is down"""
+        if not self.available:
+            return None
+        try:
+            return await self.redis_client.incr(key)
+        except (RedisError, OSError) as e:
+            self._failed(e)
+            return None
@@ -1,19 +1,32 @@
+import asyncio
+from typing import AsyncIterator
+
 from fastapi import HTTPException, Response
+from sqlalchemy import Row
 
-from src.common.utils.generate_etag import generate_etag
-from src.common.utils.render_markdown import render_markdown_to_html
-from src.models.note import Note
+from src.common.utils.generate_etag import etag_matches, generate_etag
 from src.repositories.note import NoteRepository
-from src.schemas.render import RenderResponse
+from src.schemas.render import RenderResponse, RenderedNoteResponse
+from src.services.note import NoteService
+from src.services.pagination import next_cursor
+from src.services.render_cache import RenderCache, iterate_chunks
 
 
 class RenderService:
-    def __init__(self, note_repository: NoteRepository):
+    def __init__(
+        self,
+        note_repository: NoteRepository,
+        render_cache: RenderCache,
+        note_service: NoteService,
+    ):
         self.note_repository = note_repository
+        self.render_cache = render_cache
+        self.note_service = note_service
 
     async def render(self, if_none_match, response: Response, note_id: int):
         """
-        This method to render a Markdown text to a sanitized HTML code.
+        This method to render a Markdown text to a sanitized HTML code, the etag is checked before the note is loaded,
+        so a revalidation request only reads the stored content hash.
 
         :param if_none_match: Etag to check of the note is modified.
         :param response: The response to get the etag.
@@ -21,19 +34,121 @@ class RenderService:
         :return: The rendered text.
         """
         try:
-            note: Note = await self.note_repository.get_by_id(note_id)
+            etag = await self.note_service.get_note_etag(note_id)
+            if etag_matches(etag, if_none_match):
+                raise HTTPException(
+                    status_code=304, detail="Not modified", headers={"ETag": etag}
+                )
 
-            if not note:
+            rendered = await self.note_repository.get_rendered(note_id)
+            if not rendered:
                 raise HTTPException(status_code=404, detail="Note not found")
 
-            etag = generate_etag(note.content)
-            response.headers["ETag"] = etag
-
-            if etag == if_none_match:
-                raise HTTPException(status_code=304, detail="Not modified")
+            rendered_html = rendered.rendered_html
+            if rendered_html is None:
+                content = await self.note_repository.get_content(note_id)
+                if content is None:
+                    raise HTTPException(status_code=404, detail="Note not found")
+                rendered_html = await self.render_cache.render(
+                    content, rendered.content_hash
+                )
 
-            markdown_text = note.content
-            rendered_html = render_markdown_to_html(markdown_text)
+            response.headers["ETag"] = rendered.content_hash or etag
             return RenderResponse(note_id=note_id, rendered_html=rendered_html)
         except Exception as e:
             raise e
+
+    async def render_stream(
+        self, if_none_match, note_id: int
+    ) -> tuple[str, AsyncIterator[str]]:
+        """
+        This method renders a note as a stream of HTML, the stored HTML is sent in chunks, and a note without it is
+        rendered and sent a chunk of blocks at a time, which is used for very large notes.
+
+        :param if_none_match: Etag to check of the note is modified.
+        :param note_id: The id of the note to render.
+        :return: The etag of the note and the stream of its HTML.
+        """
+        try:
+            etag = await self.note_service.get_note_etag(note_id)
+            if etag_matches(etag, if_none_match):
+                raise HTTPException(
+                    status_code=304, detail="Not modified", headers={"ETag": etag}
+                )
+
+            # the stream is sent after the session of the request is closed, so everything it needs is read here
+            rows = await self.note_repository.get_notes_rendered(note_ids=[note_id])
+            if not rows:
+                raise HTTPException(status_code=404, detail="Note not found")
+
+            row = rows[0]
+            if row.rendered_html is not None:
+                stream = iterate_chunks(row.rendered_html)
+            else:
+                stream = self.render_cache.render_stream(row.content, row.content_hash)
+            return row.content_hash or etag, stream
+        except Exception as e:
+            raise e
+
+    async def render_notes(self, note_ids: list[int]) -> list[RenderedNoteResponse]:
+        """
+        This method renders many notes, their contents are fetched in one query and rendered concurrently.
+
+        :param note_ids: The ids of the notes to render.
+        :return: The rendered notes with their etags, in the order of the ids, the notes not found are skipped.
+        """
+        try:
+            rows = await self.note_repository.get_notes_rendered(note_ids=note_ids)
+            if not rows:
+                raise HTTPException(status_code=404, detail="No notes are found")
+
+            rendered = {note.note_id: note for note in await self.render_rows(rows)}
+            return [
+                rendered[note_id]
+                for note_id in dict.fromkeys(note_ids)
+                if note_id in rendered
+            ]
+        except Exception as e:
+            raise e
+
+    async def render_folder(
+        self, folder_id: int, limit: int | None = None, after: int | None = None
+    ) -> tuple[list[RenderedNoteResponse], int | None]:
+        """
+        This method renders a page of the notes of a folder, their contents are fetched in one query and rendered
+        concurrently.
+
+        :param folder_id: The id of the folder.
+        :param limit: The maximum number of notes in the page.
+        :param after: The cursor returned with the previous page, None for the first page.
+        :return: The rendered notes with their etags, and the cursor of the next page.
+        """
+        try:
+            rows = await self.note_repository.get_notes_rendered(
+                folder_id=folder_id, limit=limit, after=after
+            )
+            if not rows and after is None:
+                raise HTTPException(status_code=404, detail="No notes are found")
+
+            return await self.render_rows(rows), next_cursor(rows, limit)
+        except Exception as e:
+            raise e
+
+    async def render_rows(self, rows: list[Row]) -> list[RenderedNoteResponse]:
+        """
+        This method renders the notes missing their stored HTML through the render cache, concurrently.
+
+        :param rows: The rows returned by get_notes_rendered.
+        :return: The rendered notes with their etags.
+        """
+
+        async def render_row(row: Row) -> RenderedNoteResponse:
+            etag = row.content_hash or generate_etag(row.content)
+            rendered_html = row.rendered_html
+            if rendered_html is None:
+                rendered_html = await self.render_cache.render(row.content, etag)
+            return RenderedNoteResponse(
+                note_id=row.id, rendered_html=rendered_html, etag=etag
+            )
+
+        return list(await asyncio.gather(*(render_row(row) for row in rows)))
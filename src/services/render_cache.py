@@ -0,0 +1,172 @@
+"""
+This module caches the rendered HTML of notes by the SHA-256 of their Markdown content (the same hash used as ETag),
+so identical contents, like duplicated notes or restored versions, are rendered only once. On a miss the content is
+rendered block by block, reusing the HTML of the blocks that didn't change, and only the blocks to render are sent to
+the render executor.
+"""
+
+from itertools import chain
+from typing import AsyncIterator
+
+from cachetools import LRUCache
+from pydantic import TypeAdapter
+
+from src.common.utils.generate_etag import generate_etag
+from src.common.utils.render_markdown import (
+    cache_blocks,
+    get_renderer,
+    iter_markdown_blocks,
+    join_blocks,
+    lookup_blocks,
+    render_blocks,
+    render_markdown_to_html,
+    split_markdown_blocks,
+)
+from src.config.definitions import RENDER_KEY, RENDER_STREAM_CHUNK_SIZE
+from src.config.settings import RENDER_ENGINE
+from src.services.cache import CacheService
+from src.services.render_executor import RenderExecutor
+
+RENDER_ADAPTER = TypeAdapter(str)
+
+
+async def iterate_chunks(
+    html: str, chunk_size: int = RENDER_STREAM_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    This method streams an already rendered HTML in chunks.
+
+    :param html: The HTML.
+    :param chunk_size: The length of each chunk.
+    :return: An async iterator of the chunks.
+    """
+    for start in range(0, len(html), chunk_size):
+        yield html[start : start + chunk_size]
+
+
+class RenderCache:
+
+    def __init__(
+        self,
+        cache: CacheService,
+        max_size: int = 64 * 1024 * 1024,
+        use_redis: bool = True,
+        expire: int = 3600,
+        block_cache_size: int = 32 * 1024 * 1024,
+        executor: RenderExecutor | None = None,
+        engine: str = RENDER_ENGINE,
+    ):
+        """
+        :param cache: The cache service, used for the redis tier and to coalesce concurrent renders.
+        :param max_size: The maximum total length of the HTML kept in process, the least recently used is evicted.
+        :param use_redis: If the rendered HTML is shared with the other workers through redis.
+        :param expire: The seconds the rendered HTML is kept in redis.
+        :param block_cache_size: The maximum total length of the HTML of the rendered blocks kept in process.
+        :param executor: The executor the rendering runs on, inline by default.
+        :param engine: The name of the Markdown engine to render with.
+        """
+        self.cache = cache
+        self.max_size = max_size
+        self.use_redis = use_redis
+        self.expire = expire
+        self.rendered: LRUCache = LRUCache(maxsize=max_size, getsizeof=len)
+        self.rendered_blocks: LRUCache = LRUCache(
+            maxsize=block_cache_size, getsizeof=len
+        )
+        self.executor = executor or RenderExecutor("inline")
+        self.engine = engine
+
+    async def render(self, content: str, content_hash: str | None = None) -> str:
+        """
+        This method returns the rendered HTML of a Markdown text, it is rendered only if it isn't cached.
+
+        :param content: The Markdown text.
+        :param content_hash: The SHA-256 of the content if already computed.
+        :return: The rendered HTML.
+        """
+        content_hash = content_hash or generate_etag(content)
+        html = self.rendered.get(content_hash)
+        if html is not None:
+            return html
+
+        html = await self.cache.get_or_compute(
+            self.cache.key(RENDER_KEY, self.engine, content_hash),
+            lambda: self.render_content(content),
+            RENDER_ADAPTER,
+            expire=self.expire,
+            remote=self.use_redis,
+        )
+        if len(html) <= self.max_size:
+            self.rendered[content_hash] = html
+        return html
+
+    async def render_content(self, content: str) -> str:
+        """
+        This method renders a Markdown text on the executor, block by block when it can be split.
+
+        :param content: The Markdown text.
+        :return: The rendered HTML.
+        """
+        blocks = split_markdown_blocks(content)
+        if blocks is None:
+            return await self.executor.run(
+                render_markdown_to_html, content, self.engine, size=len(content)
+            )
+        return await self.render_chunk(blocks)
+
+    async def render_stream(
+        self,
+        content: str,
+        content_hash: str | None = None,
+        chunk_size: int = RENDER_STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[str]:
+        """
+        This method renders a Markdown text as a stream of HTML, the blocks are rendered a chunk at a time and each
+        chunk is sent as soon as it is rendered, so the whole HTML is never built.
+
+        :param content: The Markdown text.
+        :param content_hash: The SHA-256 of the content if already computed.
+        :param chunk_size: The length of Markdown rendered per chunk.
+        :return: An async iterator of the parts of the HTML.
+        """
+        html = self.rendered.get(content_hash or generate_etag(content))
+        blocks = iter_markdown_blocks(content) if html is None else None
+        if blocks is None:
+            html = html or await self.render(content, content_hash)
+            async for part in iterate_chunks(html, chunk_size):
+                yield part
+            return
+
+        separator = get_renderer(self.engine).separator
+        started = False
+        chunk, length = [], 0
+        for block in chain(blocks, [None]):
+            if block is not None:
+                chunk.append(block)
+                length += len(block)
+                if length < chunk_size:
+                    continue
+
+            part = await self.render_chunk(chunk)
+            if part:
+                yield separator + part if started else part
+                started = True
+            chunk, length = [], 0
+
+    async def render_chunk(self, blocks: list[str]) -> str:
+        """
+        This method renders consecutive blocks of a text, reusing the HTML of the blocks already rendered.
+
+        :param blocks: The blocks.
+        :return: The HTML of the blocks, joined the way the engine joins them.
+        """
+        rendered, missing = lookup_blocks(blocks, self.rendered_blocks)
+        if missing:
+            html = await self.executor.run(
+                render_blocks,
+                missing,
+                self.engine,
+                size=sum(len(block) for block in missing),
+            )
+            rendered.update(cache_blocks(missing, html, self.rendered_blocks))
+        return join_blocks(blocks, rendered, self.engine)
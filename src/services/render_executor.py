@@ -0,0 +1,93 @@
+"""
+This module runs the rendering of Markdown, which is CPU bound pure-Python work, outside of the event loop, so
+rendering a large note doesn't stall the other requests of the worker.
+
+Small renders run inline, since handing them to a pool costs more than rendering them. The number of renders running
+or waiting in the pool is bounded, when it is full the renders wait for a free slot, and fail with 503 if they wait
+longer than the queue timeout.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Literal, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+RenderMode = Literal["inline", "thread", "process"]
+
+
+class RenderExecutor:
+
+    def __init__(
+        self,
+        mode: RenderMode = "process",
+        max_workers: int | None = None,
+        threshold: int = 64 * 1024,
+        max_pending: int | None = None,
+        queue_timeout: float = 10.0,
+    ):
+        """
+        :param mode: inline renders in the event loop, thread in a thread pool and process in a process pool.
+        :param max_workers: The number of threads or processes, the number of CPUs by default.
+        :param threshold: The length of the text (in characters) from which rendering is offloaded to the pool.
+        :param max_pending: The maximum number of renders running or waiting in the pool, twice the workers by default.
+        :param queue_timeout: The seconds a render waits for a free slot before failing with 503.
+        """
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.queue_timeout = queue_timeout
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self.pool: Executor | None = None
+
+    def get_pool(self) -> Executor:
+        """This method returns the pool, it is started on the first offloaded render."""
+        if self.pool is None:
+            if self.mode == "process":
+                # spawn, forking a process that runs an event loop and threads isn't safe
+                self.pool = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self.pool = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="render"
+                )
+        return self.pool
+
+    async def run(self, render: Callable[..., T], *args, size: int) -> T:
+        """
+        This method runs a render, in the pool if it is large enough.
+
+        :param render: The function that renders, it must be picklable (defined at module level) for the process pool.
+        :param args: The arguments of the function.
+        :param size: The length of the text to render, compared with the threshold.
+        :return: The result of the function.
+        """
+        if self.mode == "inline" or size < self.threshold:
+            return render(*args)
+
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many notes are being rendered, try again later",
+                headers={"Retry-After": str(max(1, round(self.queue_timeout)))},
+            )
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.get_pool(), render, *args)
+        finally:
+            self.slots.release()
+
+    def shutdown(self):
+        """This method stops the pool, the renders waiting in it are cancelled."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
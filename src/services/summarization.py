@@ -1,28 +1,23 @@
 from fastapi import HTTPException
+from pydantic import TypeAdapter
 
+from src.common.utils.generate_etag import generate_etag
+from src.config.definitions import SUMMARY_KEY
+from src.config.settings import SUMMARY_CACHE_EXPIRE, SUMMARY_STALE_WHILE_REVALIDATE
 from src.models.note import Note
 from src.repositories.note import NoteRepository
 from src.common.utils.gemini_api import send_to_gemini
+from src.services.cache import CacheService
 
-# from src.services.redis import RedisCache
-
-# redis_service = RedisCache()
-
-
-# async def check_cache(key: str):
-#     res = await redis_service.get(key)
-#     return res
-#
-#
-# async def write_on_cache(key: str, value: str, expire: int = 3600):
-#     await redis_service.set(key, value, expire)
+SUMMARY_ADAPTER = TypeAdapter(str)
 
 
 class SummarizeNotes:
     """This module to summarize notes"""
 
-    def __init__(self, note_repository: NoteRepository):
+    def __init__(self, note_repository: NoteRepository, cache: CacheService):
         self.note_repository = note_repository
+        self.cache = cache
 
     async def summarize(self, note_id: int):
         """
@@ -37,16 +32,20 @@ class SummarizeNotes:
             if not note:
                 raise HTTPException(status_code=404, detail="Note not found")
 
-            # res = await check_cache(SUMMARY_KEY)
-            # if res:
-            #     return {"note": {"id": note.id, "title": note.title}, "summary": res}
-
-            response = await send_to_gemini(
-                f"Summarize this note in a few sentences:\n\n{note.content}"
+            async def summarize_note() -> str:
+                response = await send_to_gemini(
+                    f"Summarize this note in a few sentences:\n\n{note.content}"
+                )
+                return response.candidates[0].content.parts[0].text
+
+            # The summary is keyed by the hash of the content, so an edited note is summarized again.
+            summarization = await self.cache.get_or_compute(
+                self.cache.key(SUMMARY_KEY, note.id, generate_etag(note.content)),
+                summarize_note,
+                SUMMARY_ADAPTER,
+                expire=SUMMARY_CACHE_EXPIRE,
+                stale_while_revalidate=SUMMARY_STALE_WHILE_REVALIDATE,
             )
-            summarization = response.candidates[0].content.parts[0].text
-
-            # await write_on_cache(SUMMARY_KEY, summarization)
 
             return {
                 "note": {"id": note.id, "title": note.title},
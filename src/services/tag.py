@@ -1,14 +1,37 @@
 from fastapi import HTTPException
+from pydantic import TypeAdapter
 
+from src.common.db.unit_of_work import UnitOfWork
+from src.config.definitions import TAG_ID_REDIS_KEY, TAG_NOTES_REDIS_KEY
 from src.models.note import Note
 from src.models.tag import Tag
+from src.repositories.note import NoteRepository
 from src.repositories.tag import TagRepository
-from src.schemas.tag import TagRequest, TagResponse
+from src.schemas.note import NoteFields, NoteSummaryResponse
+from src.schemas.tag import (
+    TagNotesRequest,
+    TagNotesResponse,
+    TagRequest,
+    TagResponse,
+)
+from src.services.cache import CacheService
+
+NOTES_SUMMARY_ADAPTER = TypeAdapter(list[NoteSummaryResponse])
+TAG_ADAPTER = TypeAdapter(TagResponse)
 
 
 class TagService:
-    def __init__(self, tag_repository: TagRepository):
+    def __init__(
+        self,
+        tag_repository: TagRepository,
+        note_repository: NoteRepository,
+        cache: CacheService,
+        unit_of_work: UnitOfWork,
+    ):
         self.tag_repository = tag_repository
+        self.note_repository = note_repository
+        self.cache = cache
+        self.unit_of_work = unit_of_work
 
     async def create_tag(self, tag: TagRequest):
         """
@@ -23,6 +46,7 @@ class TagService:
 
         new_tag: Tag = Tag(name=tag.name)
         await self.tag_repository.create(new_tag)
+        await self.unit_of_work.commit()
 
         return {
             "details": "Folder is added successfully",
@@ -47,11 +71,22 @@ class TagService:
         :param tag_id: The id of the tag to get.
         :return: The tag.
         """
+        lookup = await self.cache.get(
+            self.cache.key(TAG_ID_REDIS_KEY, tag_id),
+            TAG_ADAPTER,
+            self.cache.tag_generations(),
+            local=True,
+        )
+        if lookup.hit:
+            return lookup.value
 
         tag: Tag = await self.tag_repository.get_by_id(tag_id)
         if not tag:
             raise HTTPException(status_code=404, detail="Tag not found.")
-        return tag
+
+        tag_out = TagResponse(id=tag.id, name=tag.name)
+        await self.cache.set(lookup, tag_out)
+        return tag_out
 
     async def get_tag_by_name(self, tag_name: str):
         """
@@ -81,6 +116,8 @@ class TagService:
                 raise HTTPException(status_code=404, detail="Tag not found")
 
             await self.tag_repository.rename_tag(stored_tag, new_name)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_tags()
 
             tag_out = TagResponse(id=stored_tag.id, name=stored_tag.name)
             return tag_out
@@ -101,15 +138,76 @@ class TagService:
                 raise HTTPException(status_code=404, detail="Tag not found.")
 
             await self.tag_repository.delete(tag_id)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_tags()
             return True
         except Exception as e:
             raise e
 
-    async def get_tag_notes(self, tag_id: int):
+    async def attach_notes(
+        self, tag_id: int, notes: TagNotesRequest
+    ) -> TagNotesResponse:
+        """
+        This method attaches a tag to many notes, selected by their ids or by their folder, in one statement.
+
+        :param tag_id: The id of the tag.
+        :param notes: The ids of the notes or the id of their folder.
+        :return: The number of notes the tag is attached to, the notes that already had it are not counted.
+        """
+        try:
+            await self.check_tag_notes(tag_id, notes)
+            note_ids = await self.tag_repository.attach_notes(
+                tag_id, notes.note_ids, notes.folder_id
+            )
+            await self.unit_of_work.commit()
+            if note_ids:
+                await self.cache.invalidate_note_ids(note_ids)
+            return TagNotesResponse(tag_id=tag_id, notes=len(note_ids))
+        except Exception as e:
+            raise e
+
+    async def detach_notes(
+        self, tag_id: int, notes: TagNotesRequest
+    ) -> TagNotesResponse:
+        """
+        This method detaches a tag from many notes, selected by their ids or by their folder, in one statement.
+
+        :param tag_id: The id of the tag.
+        :param notes: The ids of the notes or the id of their folder.
+        :return: The number of notes the tag is detached from.
+        """
+        try:
+            await self.check_tag_notes(tag_id, notes)
+            note_ids = await self.tag_repository.detach_notes(
+                tag_id, notes.note_ids, notes.folder_id
+            )
+            await self.unit_of_work.commit()
+            if note_ids:
+                await self.cache.invalidate_note_ids(note_ids)
+            return TagNotesResponse(tag_id=tag_id, notes=len(note_ids))
+        except Exception as e:
+            raise e
+
+    async def check_tag_notes(self, tag_id: int, notes: TagNotesRequest):
+        """
+        This method checks a request to attach or detach a tag, the tag shall be available and the notes shall be
+        selected either by their ids or by their folder.
+
+        :param tag_id: The id of the tag.
+        :param notes: The ids of the notes or the id of their folder.
+        """
+        if (notes.note_ids is None) == (notes.folder_id is None):
+            raise HTTPException(
+                status_code=400, detail="Either note_ids or folder_id is required."
+            )
+        await self.get_tag_by_id(tag_id)
+
+    async def get_tag_notes(self, tag_id: int, fields: NoteFields = "full"):
         """
         This method to get the notes of a certain tag.
 
         :param tag_id: The id of the tag to get its notes.
+        :param fields: "full" to return the whole notes, "summary" to return only the summaries of the notes.
         :return: The notes' of the tag.
         """
         try:
@@ -118,6 +216,20 @@ class TagService:
             if not exists:
                 raise HTTPException(status_code=404, detail="Tag not found.")
 
+            if fields == "summary":
+                lookup = await self.cache.get(
+                    self.cache.key(TAG_NOTES_REDIS_KEY, tag_id, fields),
+                    NOTES_SUMMARY_ADAPTER,
+                    self.cache.notes_list_generations(),
+                )
+                if lookup.hit:
+                    return lookup.value
+
+                summaries = await self.note_repository.get_notes_summary(tag_id=tag_id)
+                summaries_out = [NoteSummaryResponse(**note) for note in summaries]
+                await self.cache.set(lookup, summaries_out)
+                return summaries_out
+
             notes: list[Note] = await self.tag_repository.get_tag_notes(tag_id)
 
             return notes
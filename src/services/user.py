@@ -6,15 +6,24 @@ delete user, update user, register new user and login.
 from fastapi import HTTPException
 
 from src.auth import password, tokens
+from src.common.db.unit_of_work import UnitOfWork
 from src.models.user import User
 from src.repositories.user import UserRepository
 from src.schemas.user import UserRequest, UserUpdate
+from src.services.cache import CacheService
 
 
 class UserService:
 
-    def __init__(self, user_repository: UserRepository):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        cache: CacheService,
+        unit_of_work: UnitOfWork,
+    ):
         self.user_repository = user_repository
+        self.cache = cache
+        self.unit_of_work = unit_of_work
 
     async def get_all_users(self) -> list[User] | None:
         """
@@ -69,6 +78,8 @@ class UserService:
                 )
 
             await self.user_repository.update_user(stored_user, user)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_users()
 
             return user
         except Exception as e:
@@ -84,6 +95,8 @@ class UserService:
         """
         try:
             await self.user_repository.delete_user(username)
+            await self.unit_of_work.commit()
+            await self.cache.invalidate_users()
             return True
         except Exception as e:
             raise e
@@ -127,6 +140,7 @@ class UserService:
             )
 
             await self.user_repository.add_new_user(new_user)
+            await self.unit_of_work.commit()
 
             return {
                 "details": "user is registers",
@@ -68,6 +68,23 @@ async def test_update_note():
     assert data["title"] == "Updated Note Title"
 
 
+@pytest.mark.asyncio
+async def test_update_note_keeps_tags_without_tag_names():
+    note_id = 10
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://127.0.0.1:8000"
+    ) as ac:
+        token = await get_token(ac)
+        headers = {"Authorization": f"Bearer {token}"}
+        tags = (await ac.get(f"/note/{note_id}", headers=headers)).json()["tags"]
+        response = await ac.patch(
+            f"/note/{note_id}", json={"title": "Retitled Note"}, headers=headers
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["tags"] == tags
+
+
 @pytest.mark.asyncio
 async def test_delete_note():
     note_id = 5
@@ -0,0 +1,272 @@
+import asyncio
+
+import pytest
+from pydantic import TypeAdapter
+from redis.exceptions import ConnectionError
+
+from src.schemas.tag import TagResponse
+from src.services.cache import CacheService, LocalCache
+from src.services.redis import RedisCache
+
+TAG_ADAPTER = TypeAdapter(TagResponse)
+
+
+class InMemoryPubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.append(self.queue)
+
+    async def get_message(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.redis.subscribers.remove(self.queue)
+
+
+class InMemoryRedis:
+    """In-memory stand-in for the few redis commands the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.subscribers = []
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return InMemoryPubSub(self)
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def incr(self, key):
+        self.commands.append(self.redis.incr(key))
+
+    async def execute(self):
+        return [await command for command in self.commands]
+
+
+class DownRedis:
+    async def mget(self, keys):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis is down")
+
+    async def incr(self, key):
+        raise ConnectionError("redis is down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis is down")
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_after_set():
+    cache = CacheService(RedisCache(client=InMemoryRedis()))
+    key = cache.key("/tag", 1)
+
+    lookup = await cache.get(key, TAG_ADAPTER, cache.note_generations(1))
+    assert not lookup.hit
+
+    await cache.set(lookup, TagResponse(id=1, name="project"))
+    lookup = await cache.get(key, TAG_ADAPTER, cache.note_generations(1))
+
+    assert lookup.hit
+    assert lookup.value == TagResponse(id=1, name="project")
+
+
+@pytest.mark.asyncio
+async def test_invalidation_bumps_generation():
+    cache = CacheService(RedisCache(client=InMemoryRedis()))
+    key = cache.key("/tag", 1)
+
+    lookup = await cache.get(key, TAG_ADAPTER, cache.note_generations(1))
+    await cache.set(lookup, TagResponse(id=1, name="project"))
+
+    await cache.invalidate_note(2)
+    assert (await cache.get(key, TAG_ADAPTER, cache.note_generations(1))).hit
+
+    await cache.invalidate_note(1)
+    assert not (await cache.get(key, TAG_ADAPTER, cache.note_generations(1))).hit
+
+
+@pytest.mark.asyncio
+async def test_user_change_invalidates_notes():
+    cache = CacheService(RedisCache(client=InMemoryRedis()))
+    note_key, page_key = cache.key("/note", 1), cache.key("/notes/all")
+
+    for key, generation_keys in (
+        (note_key, cache.note_generations(1)),
+        (page_key, cache.notes_list_generations()),
+    ):
+        lookup = await cache.get(key, TAG_ADAPTER, generation_keys)
+        await cache.set(lookup, TagResponse(id=1, name="kareem"))
+
+    await cache.invalidate_users()
+    assert not (await cache.get(note_key, TAG_ADAPTER, cache.note_generations(1))).hit
+    assert not (
+        await cache.get(page_key, TAG_ADAPTER, cache.notes_list_generations())
+    ).hit
+
+
+@pytest.mark.asyncio
+async def test_value_loaded_during_write_is_not_fresh():
+    cache = CacheService(RedisCache(client=InMemoryRedis()))
+    key = cache.key("/tag", 1)
+
+    lookup = await cache.get(key, TAG_ADAPTER, cache.notes_list_generations())
+    await cache.invalidate_tags()
+    await cache.set(lookup, TagResponse(id=1, name="old name"))
+
+    assert not (await cache.get(key, TAG_ADAPTER, cache.notes_list_generations())).hit
+
+
+@pytest.mark.asyncio
+async def test_redis_down_falls_back():
+    redis_cache = RedisCache(client=DownRedis())
+    cache = CacheService(redis_cache)
+
+    lookup = await cache.get(cache.key("/tag", 1), TAG_ADAPTER)
+    await cache.set(lookup, TagResponse(id=1, name="project"))
+    await cache.invalidate_tags()
+
+    assert not lookup.hit
+    assert not redis_cache.available
+
+
+@pytest.mark.asyncio
+async def test_local_tier_is_invalidated_by_other_workers():
+    redis = InMemoryRedis()
+    worker_1 = CacheService(RedisCache(client=redis))
+    worker_2 = CacheService(RedisCache(client=redis))
+    listeners = [
+        asyncio.create_task(worker.listen_invalidations())
+        for worker in (worker_1, worker_2)
+    ]
+    await asyncio.sleep(0)
+
+    key = worker_1.key("/tag", 1)
+    lookup = await worker_1.get(
+        key, TAG_ADAPTER, worker_1.tag_generations(), local=True
+    )
+    await worker_1.set(lookup, TagResponse(id=1, name="project"))
+
+    # served from the in-process tier, even if redis lost the value
+    redis.data.pop(key)
+    lookup = await worker_1.get(
+        key, TAG_ADAPTER, worker_1.tag_generations(), local=True
+    )
+    assert lookup.hit
+
+    await worker_2.invalidate_tags()
+    await asyncio.sleep(0.01)
+    lookup = await worker_1.get(
+        key, TAG_ADAPTER, worker_1.tag_generations(), local=True
+    )
+    assert not lookup.hit
+
+    for listener in listeners:
+        listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once():
+    cache = CacheService(RedisCache(client=InMemoryRedis()))
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "<h1>title</h1>"
+
+    results = await asyncio.gather(
+        *(
+            cache.get_or_compute(cache.key("/render", 1), compute, TypeAdapter(str))
+            for _ in range(10)
+        )
+    )
+
+    assert calls == 1
+    assert set(results) == {"<h1>title</h1>"}
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_served_while_revalidating():
+    cache = CacheService(RedisCache(client=InMemoryRedis()))
+    key = cache.key("/summary", 1)
+    summaries = iter(["old summary", "new summary"])
+
+    async def compute():
+        return next(summaries)
+
+    await cache.get_or_compute(
+        key, compute, TypeAdapter(str), expire=-1, stale_while_revalidate=60
+    )
+    stale = await cache.get_or_compute(
+        key, compute, TypeAdapter(str), stale_while_revalidate=60
+    )
+    await asyncio.sleep(0)
+    fresh = await cache.get_or_compute(
+        key, compute, TypeAdapter(str), stale_while_revalidate=60
+    )
+
+    assert stale == "old summary"
+    assert fresh == "new summary"
+
+
+def test_local_generations_are_bounded():
+    local_cache = LocalCache(maxsize=10)
+    local_cache.subscribed = True
+    local_cache.set("/tag/1", ["/generation/tags"], [0], "project")
+
+    local_cache.update_generations({f"/generation/note/{i}": 1 for i in range(100)})
+
+    assert len(local_cache.generations) <= 10
+    # the generation of the value was evicted, a bump of it may have been too
+    assert local_cache.get("/tag/1", ["/generation/tags"]) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_failed_bump_is_retried_before_serving():
+    redis = InMemoryRedis()
+    cache = CacheService(RedisCache(client=redis, retry_after=0))
+    key = cache.key("/tag", 1)
+    lookup = await cache.get(key, TAG_ADAPTER, cache.tag_generations(), local=True)
+    await cache.set(lookup, TagResponse(id=1, name="project"))
+
+    pipeline = redis.pipeline
+    redis.pipeline = DownRedis().pipeline
+    await cache.invalidate_tags()
+    redis.pipeline = pipeline
+
+    lookup = await cache.get(key, TAG_ADAPTER, cache.tag_generations(), local=True)
+    assert not lookup.hit
+    assert redis.data[cache.key("/generation/tags")] == "1"
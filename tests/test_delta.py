@@ -0,0 +1,16 @@
+from src.common.utils.delta import apply_delta, make_delta
+
+
+def test_delta_rebuilds_the_text():
+    base = "".join(f"line {i}\n" for i in range(100))
+    text = base.replace("line 50\n", "edited line\n") + "last line without newline"
+
+    delta = make_delta(base, text)
+
+    assert delta is not None
+    assert len(delta) < len(text) / 10
+    assert apply_delta(base, delta) == text
+
+
+def test_text_that_changed_too_much_is_stored_in_full():
+    assert make_delta("first version\n", "an entirely different version\n") is None
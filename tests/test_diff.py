@@ -0,0 +1,30 @@
+import pytest
+
+from src.common.utils.diff import diff_texts
+
+
+def apply_changes(old: str, changes: list[dict]) -> str:
+    parts, position = [], 0
+    for change in changes:
+        parts += (old[position : change["old_start"]], change["new_text"])
+        position = change["old_end"]
+    return "".join(parts) + old[position:]
+
+
+@pytest.mark.parametrize("granularity", ["line", "word"])
+def test_changes_rebuild_the_new_text(granularity):
+    old = "# Title\n\nthe quick brown fox\njumps over\n\nthe end"
+    new = "# Title\n\nthe slow brown fox\njumps over\n\nnew paragraph\n\nthe end!"
+
+    changes = diff_texts(old, new, granularity)
+
+    assert apply_changes(old, changes) == new
+    for change in changes:
+        assert old[change["old_start"] : change["old_end"]] == change["old_text"]
+        assert new[change["new_start"] : change["new_end"]] == change["new_text"]
+
+
+def test_word_granularity_only_returns_the_changed_words():
+    changes = diff_texts("the quick brown fox\n", "the slow brown fox\n", "word")
+
+    assert [(c["old_text"], c["new_text"]) for c in changes] == [("quick", "slow")]
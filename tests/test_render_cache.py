@@ -0,0 +1,52 @@
+import pytest
+
+from src.services import render_cache as render_cache_module
+from src.services.cache import CacheService
+from src.services.redis import RedisCache
+from src.services.render_cache import RenderCache
+
+from test_cache import InMemoryRedis
+
+
+@pytest.mark.asyncio
+async def test_identical_content_is_rendered_once(monkeypatch):
+    calls = []
+
+    def render(blocks, engine):
+        calls.extend(blocks)
+        return [f"<p>{block}</p>" for block in blocks]
+
+    monkeypatch.setattr(render_cache_module, "render_blocks", render)
+    render_cache = RenderCache(CacheService(RedisCache(client=InMemoryRedis())))
+
+    first = await render_cache.render("same content")
+    second = await render_cache.render("same content")
+
+    assert first == second == "<p>same content</p>"
+    assert calls == ["same content"]
+
+
+@pytest.mark.asyncio
+async def test_in_process_cache_is_size_bounded():
+    render_cache = RenderCache(
+        CacheService(RedisCache(client=InMemoryRedis())), max_size=40, use_redis=False
+    )
+
+    for i in range(10):
+        await render_cache.render(f"note {i}")
+
+    assert render_cache.rendered.currsize <= 40
+    assert len(render_cache.rendered) < 10
+
+
+@pytest.mark.asyncio
+async def test_streamed_html_matches_rendered_html():
+    render_cache = RenderCache(
+        CacheService(RedisCache(client=InMemoryRedis())), use_redis=False
+    )
+    content = "\n\n".join(f"## Part {i}\n\nsome *text*\n\n- a\n- b" for i in range(50))
+
+    parts = [part async for part in render_cache.render_stream(content, chunk_size=100)]
+
+    assert len(parts) > 1
+    assert "".join(parts) == await render_cache.render(content)
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.render_executor import RenderExecutor
+
+
+def thread_name(_: str) -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_only_large_renders_are_offloaded():
+    executor = RenderExecutor("thread", max_workers=1, threshold=10)
+
+    small = await executor.run(thread_name, "small", size=5)
+    large = await executor.run(thread_name, "large", size=50)
+    executor.shutdown()
+
+    assert small == threading.current_thread().name
+    assert large.startswith("render")
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_rejects_renders():
+    executor = RenderExecutor(
+        "thread", max_workers=1, threshold=0, max_pending=1, queue_timeout=0.05
+    )
+    release = threading.Event()
+    running = asyncio.create_task(executor.run(release.wait, size=1))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(HTTPException) as error:
+        await executor.run(thread_name, "waiting", size=1)
+
+    release.set()
+    await running
+    executor.shutdown()
+    assert error.value.status_code == 503
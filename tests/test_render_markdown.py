@@ -0,0 +1,65 @@
+import pytest
+
+from src.common.utils import render_markdown as render_markdown_module
+from src.common.utils.render_markdown import (
+    ENGINES,
+    render_markdown_blocks,
+    render_markdown_to_html,
+)
+
+DOCUMENTS = [
+    "# Title\n\nsome *text*\n\n---\n\nSetext\n------",
+    "- a\n\n- b\n\n    continued\n\nafter the list",
+    "1. one\n\n2. two\n\n> quote\n\n> more\n\nend",
+    "    code\n\n\n    more code\n\ntext  \nwith a break",
+    "```python\ndef f():\n\n    return 1\n```\n\n```x``` is inline\n\n~~~\nunclosed\n\nfence",
+    "[x]: http://example.com\n\n[link][x]",
+    "<div>\n\nraw html\n\n</div>",
+    "[foo]\n\n> [foo]: /url\n",
+    "[foo]\n\n- [foo]: /url\n",
+    "[foo]\n\n1. > [foo]: /url\n",
+    "a <b>x\n\ny</b>",
+    "-\n\n- item",
+    "1.\n\n2. item\n\n3.",
+]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_rendering_by_blocks_matches_full_rendering(engine):
+    rendered_blocks = {}
+    for document in DOCUMENTS:
+        assert render_markdown_blocks(
+            document, rendered_blocks, engine
+        ) == render_markdown_to_html(document, engine)
+
+
+def test_only_changed_blocks_are_rendered_again(monkeypatch):
+    rendered = []
+    render_blocks = render_markdown_module.render_blocks
+
+    def count_render_blocks(blocks, engine):
+        rendered.extend(blocks)
+        return render_blocks(blocks, engine)
+
+    monkeypatch.setattr(render_markdown_module, "render_blocks", count_render_blocks)
+    rendered_blocks = {}
+    blocks = [f"paragraph {i}" for i in range(100)]
+    render_markdown_blocks("\n\n".join(blocks), rendered_blocks)
+
+    rendered.clear()
+    blocks[50] = "edited paragraph"
+    html = render_markdown_blocks("\n\n".join(blocks), rendered_blocks)
+
+    assert rendered == ["edited paragraph\n"]
+    assert html == render_markdown_to_html("\n\n".join(blocks))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_rendered_html_is_sanitized(engine):
+    html = render_markdown_to_html(
+        "<script>alert(1)</script>\n\n[link](javascript:alert(1)) **bold**", engine
+    )
+
+    assert "<script>" not in html
+    assert 'href="javascript' not in html
+    assert "<strong>bold</strong>" in html
@@ -0,0 +1,45 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from src.common.utils.retention import RetentionPolicy
+
+Version = namedtuple("Version", "id note_id created_at deleted pinned")
+
+NOW = datetime(2025, 9, 30, 12, 0)
+
+
+def make_versions(times: list[datetime], note_id: int = 1) -> list[Version]:
+    return [
+        Version(i, note_id, created_at, 0, False)
+        for i, created_at in enumerate(times, start=1)
+    ]
+
+
+def test_recent_versions_are_all_kept():
+    versions = make_versions([NOW - timedelta(minutes=m) for m in range(100, 0, -1)])
+
+    assert RetentionPolicy().expired_versions(versions, NOW) == []
+
+
+def test_older_versions_are_thinned_per_hour_then_per_day():
+    hourly = [NOW - timedelta(days=10, minutes=m) for m in (90, 70, 30, 10)]
+    daily = [NOW - timedelta(days=40, hours=h) for h in (5, 4, 3)]
+    versions = make_versions([*daily, *hourly, NOW])
+
+    expired = RetentionPolicy().expired_versions(versions, NOW)
+
+    # the latest version of the day, and of each of the two hours, are kept
+    assert sorted(expired) == [1, 2, 4, 6]
+
+
+def test_pinned_deleted_and_latest_versions():
+    old = NOW - timedelta(days=40)
+    versions = [
+        Version(1, 1, old, 0, True),
+        Version(2, 1, old, 1, False),
+        Version(3, 1, old, 0, False),
+        Version(4, 2, old, 1, False),
+    ]
+
+    # the pinned version and the latest version of each note are kept, even if deleted
+    assert RetentionPolicy().expired_versions(versions, NOW) == [2]